@@ -3,23 +3,44 @@ AGENCEI - Sistema de Gerenciamento de Eventos
 Arquivo principal da aplicação
 """
 from flask import Flask, redirect, url_for
-from config import Config
-from extensions import db, login_manager, csrf, limiter
+from config import Config, config
+from extensions import db, login_manager, csrf, limiter, sql_profiler, metricas, compressao
+from utils.db import configurar_sqlite, proteger_pools_contra_fork
 
 
 def create_app(config_class=Config):
     """
     Application Factory Pattern
     Cria e configura a aplicação Flask
+    Aceita a classe de configuração ou o nome do ambiente
+    (ex.: gunicorn "app:create_app('benchmark')")
     """
+    if isinstance(config_class, str):
+        config_class = config[config_class]
+
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Templates: bytecode pré-compilado em disco (flask compilar-templates)
+    from utils.templates import configurar_cache
+    configurar_cache(app)
+
+    # Estáticos: URLs com hash e cache imutável (flask compilar-assets)
+    from utils.assets import configurar_assets
+    configurar_assets(app)
+
     # Inicializar extensões
     db.init_app(app)
+    proteger_pools_contra_fork()
+    with app.app_context():
+        for engine in db.engines.values():
+            configurar_sqlite(engine, app.config['SQLITE_ESPERA_SEGUNDOS'])
     login_manager.init_app(app)
     csrf.init_app(app)
     limiter.init_app(app)
+    sql_profiler.init_app(app)
+    metricas.init_app(app)
+    compressao.init_app(app)
 
     # Configurar Flask-Login
     login_manager.login_view = 'auth.login'
@@ -37,6 +58,10 @@ def create_app(config_class=Config):
     app.register_blueprint(organizador_bp, url_prefix='/organizador')
     app.register_blueprint(aluno_bp, url_prefix='/aluno')
 
+    # Comandos de linha de comando (flask --app app ...)
+    from utils.comandos import registrar_comandos
+    registrar_comandos(app)
+
     # Rota raiz: envia usuário logado para a página correta ou para login
     @app.route('/')
     def index():
@@ -58,9 +83,20 @@ def create_app(config_class=Config):
 
     return app
 
-app = create_app()
+
+def __getattr__(nome):
+    """
+    `app` é criado no primeiro acesso (gunicorn app:app, flask --app app,
+    checkin_asgi), não no import: scripts que só usam create_app não montam
+    uma aplicação a mais
+    """
+    if nome == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()  # cria as tabelas que faltam
-    app.run(debug=True)
+    # Sem DDL na subida: as tabelas são criadas por `python seed.py`
+    create_app().run(debug=True)
 
@@ -0,0 +1,12 @@
+"""
+Benchmarks e testes de carga do AGENCEI
+
+    python -m benchmarks.seed_carga      # popula um banco realista
+    python -m benchmarks.loadtest        # dispara os cenários contra as rotas reais
+
+Sem DATABASE_URL definido, usa um banco próprio (instance/carga.db) para
+nunca apagar o banco de desenvolvimento.
+"""
+import os
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///carga.db')
@@ -0,0 +1,119 @@
+"""
+Verificação: processos filhos nunca usam as conexões do pai
+
+Reproduz o que acontece com `gunicorn --preload`: o pai abre conexões e
+deixa no pool, depois faz fork. Em cada filho confere que a conexão
+entregue pelo pool foi aberta pelo próprio filho (objeto DBAPI diferente
+e, no PostgreSQL, outro backend), com e sem o dispose do post_fork, com
+vários filhos consultando ao mesmo tempo. No fim, o pai continua usando a
+conexão dele normalmente. Sai com código 1 se algo falhar.
+
+Uso (mesmo DATABASE_URL do app):
+    python -m benchmarks.conexoes_fork --filhos 4 --consultas 200
+"""
+import argparse
+import json
+import os
+import sys
+from sqlalchemy import text
+from app import create_app
+from extensions import db
+
+
+def _identidade(conexao):
+    """Quem é a conexão: objeto DBAPI, processo que a abriu e backend do PostgreSQL"""
+    backend = None
+    if conexao.dialect.name == 'postgresql':
+        backend = conexao.scalar(text('SELECT pg_backend_pid()'))
+    return {
+        'dbapi': id(conexao.connection.dbapi_connection),
+        'aberta_por': conexao.connection.info.get('pid'),
+        'backend': backend,
+    }
+
+
+def _filho(engine, dispose, consultas, escrita):
+    """Roda no processo filho: consulta e relata a identidade das conexões usadas"""
+    if dispose:
+        engine.dispose(close=False)
+    vistas = []
+    for _ in range(consultas):
+        with engine.connect() as conexao:
+            conexao.execute(text('SELECT 1')).scalar_one()
+            vistas.append(_identidade(conexao))
+    os.write(escrita, json.dumps({'pid': os.getpid(), 'vistas': vistas}).encode('utf-8'))
+    os.close(escrita)
+
+
+def _rodada(engine, herdada, dispose, filhos, consultas):
+    processos = []
+    for _ in range(filhos):
+        leitura, escrita = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(leitura)
+            codigo = 0
+            try:
+                _filho(engine, dispose, consultas, escrita)
+            except Exception as erro:  # relatado pelo pai como falha
+                print(f'filho {os.getpid()}: {erro!r}', file=sys.stderr)
+                codigo = 1
+            os._exit(codigo)
+        os.close(escrita)
+        processos.append((pid, leitura))
+
+    falhas = []
+    for pid, leitura in processos:
+        with os.fdopen(leitura, 'rb') as arquivo:
+            dados = arquivo.read()
+        _, status = os.waitpid(pid, 0)
+        if status != 0 or not dados:
+            falhas.append(f'filho {pid} terminou com erro')
+            continue
+        relatorio = json.loads(dados)
+        for vista in relatorio['vistas']:
+            if vista['aberta_por'] != relatorio['pid']:
+                falhas.append(f"filho {pid} usou conexão aberta pelo processo {vista['aberta_por']}")
+            if vista['dbapi'] == herdada['dbapi']:
+                falhas.append(f'filho {pid} recebeu o objeto DBAPI do pai')
+            if herdada['backend'] is not None and vista['backend'] == herdada['backend']:
+                falhas.append(f"filho {pid} falou com o backend {vista['backend']} do pai")
+    return sorted(set(falhas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filhos', type=int, default=4)
+    parser.add_argument('--consultas', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app('benchmark')
+    with app.app_context():
+        engine = db.engine
+        print(f'🎯 {engine.url.render_as_string(hide_password=True)} (pid {os.getpid()})')
+
+        # O pai abre a conexão e a devolve ao pool antes do fork
+        with engine.connect() as conexao:
+            herdada = _identidade(conexao)
+
+        falhou = False
+        for dispose, nome in ((False, 'fork sem dispose (checagem de pid)'), (True, 'fork + dispose(close=False)')):
+            falhas = _rodada(engine, herdada, dispose, args.filhos, args.consultas)
+            print(f"{'❌' if falhas else '✅'} {nome}: {args.filhos} filhos x {args.consultas} consultas")
+            for falha in falhas:
+                print(f'   {falha}')
+            falhou |= bool(falhas)
+
+        # A conexão do pai sobreviveu aos filhos (nenhum deles a fechou)
+        with engine.connect() as conexao:
+            conexao.execute(text('SELECT 1')).scalar_one()
+            ainda = _identidade(conexao)
+        mesma = ainda['dbapi'] == herdada['dbapi'] and ainda['backend'] == herdada['backend']
+        print(f"{'✅' if mesma else '❌'} pai continua com a própria conexão")
+        falhou |= not mesma
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
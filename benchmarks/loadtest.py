@@ -0,0 +1,388 @@
+"""
+Teste de carga: dispara cenários concorrentes contra as rotas reais
+
+Cenários:
+    login         tempestade de logins em auth.login (e tentativas inválidas, que devem custar o mesmo)
+    catalogo      navegação em aluno.eventos_disponiveis
+    inscricao     corrida por vagas em aluno.confirmar_inscricao (mesmo evento)
+    checkin       check-ins TOTP simultâneos em aluno.confirmar_presenca
+    checkin_json  o mesmo check-in pelo endpoint JSON aluno.checkin_qr
+    reserva       organizadores disputando a mesma sala/horário em organizador.reservar_sala
+                  (exatamente uma reserva deve vencer)
+
+Relatório por rota: p50/p95/p99, throughput e queries por requisição
+(header X-Query-Count do profiler de SQL, ligado no BenchmarkConfig).
+
+Uso com servidor embutido (threaded):
+    python -m benchmarks.seed_carga
+    python -m benchmarks.loadtest
+
+Contra um gunicorn já em execução (mesmo DATABASE_URL do seed):
+    gunicorn "app:create_app('benchmark')" -w 4 -b 127.0.0.1:8000
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000
+"""
+import argparse
+import http.client
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+from sqlalchemy import func, select
+from werkzeug.serving import make_server
+from app import create_app
+from extensions import db
+from models.evento import Evento
+from models.inscricao import Inscricao
+from models.lista_espera import ListaEspera
+from models.sala import Sala
+from models.user import Usuario
+from benchmarks.seed_carga import (
+    SENHA_CARGA, QR_EVENTO_CHECKIN, QR_EVENTO_CORRIDA, cpf_aluno, cpf_organizador, gerar_cpf
+)
+
+HEADER_QUERIES = 'X-Query-Count'
+_RE_CSRF = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+
+# ================================================================
+#  Servidor embutido
+# ================================================================
+def iniciar_servidor_embutido(app, porta=0):
+    """Sobe o app num servidor threaded em background. Retorna (url, servidor)."""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    servidor = make_server('127.0.0.1', porta, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{servidor.server_port}', servidor
+
+
+# ================================================================
+#  Cliente HTTP (um por usuário virtual)
+# ================================================================
+class Cliente:
+    """Usuário virtual: conexão keep-alive própria, cookies e token CSRF"""
+
+    def __init__(self, url_base, medicoes):
+        partes = urlsplit(url_base)
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.medicoes = medicoes
+        self.cookies = {}
+        self.csrf = None
+        self.conexao = None
+
+    def _conectar(self):
+        if self.conexao is None:
+            self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=60)
+        return self.conexao
+
+    def requisitar(self, metodo, caminho, rota=None, form=None, json_body=None):
+        """
+        Faz a requisição sem seguir redirects.
+        Se `rota` for informada, a medição entra no relatório.
+        Retorna (status, headers, corpo).
+        """
+        headers = {}
+        corpo = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        if form is not None:
+            corpo = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            corpo = json.dumps(json_body)
+            headers['Content-Type'] = 'application/json'
+            if self.csrf:
+                headers['X-CSRFToken'] = self.csrf
+
+        reaproveitada = self.conexao is not None
+        inicio = time.perf_counter()
+        try:
+            conexao = self._conectar()
+            conexao.request(metodo, caminho, body=corpo, headers=headers)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (OSError, http.client.HTTPException):
+            self.conexao = None
+            # Keep-alive encerrado pelo servidor (gthread/gevent) enquanto ociosa: tenta de novo numa conexão nova
+            if reaproveitada:
+                return self.requisitar(metodo, caminho, rota, form, json_body)
+            if rota:
+                self.medicoes.registrar(rota, time.perf_counter() - inicio, 0, None)
+            return 0, None, b''
+        duracao = time.perf_counter() - inicio
+
+        if resposta.will_close:
+            self.conexao.close()
+            self.conexao = None
+
+        for nome, valor in resposta.getheaders():
+            if nome.lower() == 'set-cookie':
+                chave, _, resto = valor.partition('=')
+                self.cookies[chave] = resto.split(';', 1)[0]
+
+        if rota:
+            self.medicoes.registrar(rota, duracao, resposta.status, resposta.getheader(HEADER_QUERIES))
+        return resposta.status, resposta, dados
+
+    def logar(self, cpf, rota=None, senha=SENHA_CARGA):
+        _, _, html = self.requisitar('GET', '/login')
+        encontrado = _RE_CSRF.search(html.decode('utf-8', 'replace'))
+        self.csrf = encontrado.group(1) if encontrado else ''
+        status, resposta, _ = self.requisitar(
+            'POST', '/login', rota=rota,
+            form={'cpf': cpf, 'senha': senha, 'csrf_token': self.csrf}
+        )
+        # Login bem-sucedido redireciona para fora da página de login
+        return status == 302 and '/login' not in (resposta.getheader('Location') or '')
+
+
+# ================================================================
+#  Medições e relatório
+# ================================================================
+class Medicoes:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.amostras = {}
+        self.janelas = {}
+
+    def registrar(self, rota, duracao, status, queries):
+        agora = time.perf_counter()
+        with self.lock:
+            self.amostras.setdefault(rota, []).append((duracao, status, queries))
+            inicio, _ = self.janelas.get(rota, (agora - duracao, agora))
+            self.janelas[rota] = (min(inicio, agora - duracao), agora)
+
+    @staticmethod
+    def _percentil(valores, p):
+        if not valores:
+            return 0.0
+        indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores)) - 1))
+        return valores[indice]
+
+    def relatorio(self):
+        linhas = [
+            f'{"rota":<28}{"n":>6}{"erros":>7}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"req/s":>9}{"queries":>9}',
+            '-' * 86,
+        ]
+        for rota, amostras in self.amostras.items():
+            duracoes = sorted(d * 1000 for d, _, _ in amostras)
+            erros = sum(1 for _, status, _ in amostras if status == 0 or status >= 500)
+            queries = [int(q) for _, _, q in amostras if q is not None]
+            inicio, fim = self.janelas[rota]
+            throughput = len(amostras) / (fim - inicio) if fim > inicio else 0.0
+            media_queries = f'{sum(queries) / len(queries):.1f}' if queries else 'n/d'
+            linhas.append(
+                f'{rota:<28}{len(amostras):>6}{erros:>7}'
+                f'{self._percentil(duracoes, 50):>9.1f}{self._percentil(duracoes, 95):>9.1f}'
+                f'{self._percentil(duracoes, 99):>9.1f}{throughput:>9.1f}{media_queries:>9}'
+            )
+        return '\n'.join(linhas)
+
+
+def disparar(tarefas, concorrencia):
+    """Executa as tarefas em paralelo, liberando todas ao mesmo tempo (barreira)"""
+    barreira = threading.Barrier(min(concorrencia, len(tarefas)) or 1)
+
+    def executar(tarefa):
+        try:
+            barreira.wait(timeout=30)
+        except threading.BrokenBarrierError:
+            pass
+        return tarefa()
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+        return list(pool.map(executar, tarefas))
+
+
+def clientes_logados(url, medicoes, indices, concorrencia, cpf=cpf_aluno):
+    """Prepara usuários virtuais já autenticados (login fora da medição)"""
+    clientes = [Cliente(url, medicoes) for _ in indices]
+    disparar([lambda c=c, i=i: c.logar(cpf(i)) for c, i in zip(clientes, indices)], concorrencia)
+    return clientes
+
+
+# ================================================================
+#  Cenários
+# ================================================================
+def cenario_login(url, medicoes, args):
+    clientes = [Cliente(url, medicoes) for _ in range(args.usuarios)]
+    resultados = disparar(
+        [lambda c=c, i=i: c.logar(cpf_aluno(i), rota='auth.login') for i, c in enumerate(clientes)],
+        args.concorrencia
+    )
+
+    # Falhas medidas em rotas separadas do relatório: o custo (p50) deve ser
+    # o mesmo do login válido, exista o CPF ou não
+    falhas = [Cliente(url, medicoes) for _ in range(args.usuarios // 2)]
+    disparar(
+        [
+            (lambda c=c, i=i: c.logar(cpf_aluno(i), rota='auth.login senha errada', senha='errada'))
+            if i % 2 else
+            (lambda c=c, i=i: c.logar(gerar_cpf(900000000 + i), rota='auth.login cpf inexistente'))
+            for i, c in enumerate(falhas)
+        ],
+        args.concorrencia
+    )
+    return f'{sum(resultados)}/{len(resultados)} logins bem-sucedidos, {len(falhas)} tentativas inválidas'
+
+
+def cenario_catalogo(url, medicoes, args):
+    clientes = clientes_logados(url, medicoes, range(args.usuarios), args.concorrencia)
+
+    def navegar(cliente):
+        for _ in range(args.repeticoes):
+            cliente.requisitar('GET', '/aluno/eventos-disponiveis', rota='aluno.eventos_disponiveis')
+
+    disparar([lambda c=c: navegar(c) for c in clientes], args.concorrencia)
+    return f'{args.usuarios} alunos x {args.repeticoes} páginas'
+
+
+def cenario_inscricao(url, medicoes, args, app):
+    with app.app_context():
+        evento_id = db.session.scalar(select(Evento.id).filter_by(qr_code_link=QR_EVENTO_CORRIDA))
+        capacidade = db.session.get(Evento, evento_id).sala.capacidade
+        Inscricao.query.filter_by(evento_id=evento_id).delete()
+        ListaEspera.query.filter_by(evento_id=evento_id).delete()
+        db.session.commit()
+
+    # Alunos fora do bloco do auditório, para não colidir com o check-in
+    indices = range(args.checkins, args.checkins + args.usuarios)
+    clientes = clientes_logados(url, medicoes, indices, args.concorrencia)
+    caminho = f'/aluno/eventos/{evento_id}/confirmar-inscricao'
+    disparar(
+        [lambda c=c: c.requisitar('POST', caminho, rota='aluno.confirmar_inscricao',
+                                  form={'csrf_token': c.csrf}) for c in clientes],
+        args.concorrencia
+    )
+
+    with app.app_context():
+        inscritos = Inscricao.contar_inscritos(evento_id)
+        em_espera = ListaEspera.tamanho(evento_id)
+    alerta = ' ⚠️ OVERBOOKING' if inscritos > capacidade else ''
+    return f'{inscritos} inscritos para {capacidade} vagas, {em_espera} na lista de espera{alerta}'
+
+
+def _preparar_checkin(app, args):
+    with app.app_context():
+        evento = db.session.scalar(select(Evento).filter_by(qr_code_link=QR_EVENTO_CHECKIN))
+        db.session.execute(
+            Inscricao.__table__.update()
+            .where(Inscricao.evento_id == evento.id)
+            .values(status_presenca=Inscricao.STATUS_AGUARDANDO, presenca_confirmada_em=None)
+        )
+        db.session.commit()
+        return evento.id, evento.sala.capacidade
+
+
+def _token_atual(evento_id):
+    # Mesmo cálculo TOTP do QR exibido pelo organizador
+    token, _ = Evento(id=evento_id, qr_code_link=QR_EVENTO_CHECKIN).gerar_token_temporal()
+    return token
+
+
+def cenario_checkin(url, medicoes, args, app, json_endpoint=False):
+    evento_id, capacidade = _preparar_checkin(app, args)
+    total = min(args.checkins, capacidade)
+    clientes = clientes_logados(url, medicoes, range(total), args.concorrencia)
+    token = _token_atual(evento_id)
+
+    if json_endpoint:
+        tarefas = [lambda c=c: c.requisitar('POST', '/aluno/checkin', rota='aluno.checkin_qr',
+                                            json_body={'evento_id': evento_id, 'totp_token': token})
+                   for c in clientes]
+    else:
+        tarefas = [lambda c=c: c.requisitar('POST', '/aluno/confirmar-presenca', rota='aluno.confirmar_presenca',
+                                            form={'evento_id': evento_id, 'totp_token': token,
+                                                  'csrf_token': c.csrf})
+                   for c in clientes]
+    disparar(tarefas, max(args.concorrencia, total))
+
+    with app.app_context():
+        presentes = Inscricao.contar_presentes(evento_id)
+    return f'{presentes}/{total} presenças confirmadas'
+
+
+NOME_CORRIDA_RESERVA = 'Corrida de reserva'
+
+
+def cenario_reserva(url, medicoes, args, app):
+    # Horário bem no futuro, fora da agenda gerada pelo seed
+    inicio = (datetime.now() + timedelta(days=730)).replace(hour=8, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        sala_id = db.session.scalar(select(Sala.id).where(Sala.ativa == True).order_by(Sala.id))
+        organizadores = db.session.scalar(select(func.count()).where(Usuario.tipo == 'organizador'))
+        Evento.query.filter_by(nome_evento=NOME_CORRIDA_RESERVA).delete()
+        db.session.commit()
+
+    # Um organizador por requisição: o QR (nome/data/sala/organizador) não colide
+    clientes = clientes_logados(url, medicoes, range(min(args.usuarios, organizadores)),
+                                args.concorrencia, cpf=cpf_organizador)
+    caminho = f'/organizador/salas/{sala_id}/reservar'
+    form = {'nome_evento': NOME_CORRIDA_RESERVA, 'data': inicio.strftime('%Y-%m-%d'),
+            'hora': inicio.strftime('%H:%M'), 'duracao': '2'}
+    disparar(
+        [lambda c=c: c.requisitar('POST', caminho, rota='organizador.reservar_sala',
+                                  form=dict(form, csrf_token=c.csrf)) for c in clientes],
+        args.concorrencia
+    )
+
+    with app.app_context():
+        criadas = Evento.query.filter_by(nome_evento=NOME_CORRIDA_RESERVA).count()
+    alerta = '' if criadas == 1 else ' ⚠️ RESERVA DUPLICADA' if criadas > 1 else ' ⚠️ NENHUMA RESERVA'
+    return f'{criadas} reserva(s) criada(s) por {len(clientes)} organizadores simultâneos{alerta}'
+
+
+CENARIOS = ('login', 'catalogo', 'inscricao', 'checkin', 'checkin_json', 'reserva')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do AGENCEI')
+    parser.add_argument('--url', help='URL de um servidor já em execução (padrão: servidor embutido)')
+    parser.add_argument('--cenarios', default='login,catalogo,inscricao,checkin',
+                        help=f'Lista separada por vírgula: {", ".join(CENARIOS)}')
+    parser.add_argument('--usuarios', type=int, default=200, help='Usuários virtuais por cenário')
+    parser.add_argument('--concorrencia', type=int, default=50, help='Requisições simultâneas')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Páginas por aluno no cenário catálogo')
+    parser.add_argument('--checkins', type=int, default=120, help='Check-ins simultâneos no auditório')
+    args = parser.parse_args()
+
+    app = create_app('benchmark')
+    servidor = None
+    url = args.url
+    if not url:
+        url, servidor = iniciar_servidor_embutido(app)
+    print(f'🎯 Alvo: {url}')
+
+    medicoes = Medicoes()
+    for nome in args.cenarios.split(','):
+        nome = nome.strip()
+        inicio = time.perf_counter()
+        if nome == 'login':
+            resumo = cenario_login(url, medicoes, args)
+        elif nome == 'catalogo':
+            resumo = cenario_catalogo(url, medicoes, args)
+        elif nome == 'inscricao':
+            resumo = cenario_inscricao(url, medicoes, args, app)
+        elif nome == 'checkin':
+            resumo = cenario_checkin(url, medicoes, args, app)
+        elif nome == 'checkin_json':
+            resumo = cenario_checkin(url, medicoes, args, app, json_endpoint=True)
+        elif nome == 'reserva':
+            resumo = cenario_reserva(url, medicoes, args, app)
+        else:
+            parser.error(f'Cenário desconhecido: {nome}')
+        print(f'  {nome:<14} {time.perf_counter() - inicio:6.1f}s  {resumo}')
+
+    print()
+    print(medicoes.relatorio())
+
+    if servidor:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Modos de worker do gunicorn: sync x gthread x gevent
+
+Para cada modo sobe um gunicorn (gunicorn.conf.py, GUNICORN_WORKER_CLASS) e:
+    limiter     rajada de requisições simultâneas em auth.verificar_cpf_organizador
+                (10 por minuto) num worker só: exatamente 10 podem passar
+    identidade  alunos logados navegando ao mesmo tempo: cada página tem de
+                mostrar o nome do próprio aluno (current_user / sessão do banco
+                isolados por thread ou greenlet)
+    checkin     cenário de check-in do loadtest (aluno.confirmar_presenca)
+
+Uso (mesmo DATABASE_URL do seed):
+    python -m benchmarks.seed_carga
+    python -m benchmarks.modos_worker --workers 2 --threads 8 --checkins 120
+"""
+import argparse
+import os
+import re
+import signal
+import subprocess
+import time
+from argparse import Namespace
+from html import unescape
+from sqlalchemy import select
+from app import create_app
+from extensions import db
+from models.user import Usuario
+from benchmarks.loadtest import Cliente, Medicoes, cenario_checkin, clientes_logados, disparar
+from benchmarks.seed_carga import cpf_aluno
+
+_RE_NOME = re.compile(r'<span class="user-name">([^<]*)</span>')
+LIMITE_VERIFICAR_CPF = 10
+
+
+def _subir(modo, args, workers, limiter):
+    ambiente = {
+        **os.environ,
+        'GUNICORN_WORKER_CLASS': modo,
+        'GUNICORN_THREADS': str(args.threads if modo == 'gthread' else 1),
+        'GUNICORN_WORKER_CONNECTIONS': str(args.conexoes),
+        'RATELIMIT_ENABLED': '1' if limiter else '0',
+        # Sessão e CSRF valem entre workers só com a mesma chave
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'modos-worker'),
+    }
+    servidor = subprocess.Popen(
+        ['gunicorn', "app:create_app('benchmark')", '-w', str(workers), '-b', f'127.0.0.1:{args.porta}'],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{args.porta}'
+    cliente = Cliente(url, Medicoes())
+    for _ in range(600):
+        if cliente.requisitar('GET', '/login')[0] == 200:
+            return servidor, url
+        time.sleep(0.05)
+    servidor.kill()
+    raise RuntimeError(f'gunicorn ({modo}) não respondeu')
+
+
+def _derrubar(servidor):
+    servidor.send_signal(signal.SIGTERM)
+    servidor.wait(timeout=30)
+
+
+def _conferir_limiter(url, rajada):
+    clientes = [Cliente(url, Medicoes()) for _ in range(rajada)]
+    status = disparar(
+        [lambda c=c: c.requisitar('POST', '/verificar-cpf-organizador', json_body={'cpf': '00000000000'})[0]
+         for c in clientes],
+        rajada
+    )
+    return sum(1 for s in status if s == 200), sum(1 for s in status if s == 429)
+
+
+def _conferir_identidade(url, app, usuarios, paginas, concorrencia):
+    with app.app_context():
+        nomes = dict(db.session.execute(
+            select(Usuario.cpf, Usuario.nome).where(Usuario.cpf.in_([cpf_aluno(i) for i in range(usuarios)]))
+        ).all())
+    medicoes = Medicoes()
+    clientes = clientes_logados(url, medicoes, range(usuarios), concorrencia)
+
+    def navegar(indice, cliente):
+        erradas = 0
+        for _ in range(paginas):
+            _, _, html = cliente.requisitar('GET', '/aluno/eventos-disponiveis')
+            encontrado = _RE_NOME.search(html.decode('utf-8', 'replace'))
+            if not encontrado or unescape(encontrado.group(1)) != nomes[cpf_aluno(indice)]:
+                erradas += 1
+        return erradas
+
+    erradas = disparar([lambda i=i, c=c: navegar(i, c) for i, c in enumerate(clientes)], concorrencia)
+    return sum(erradas), usuarios * paginas
+
+
+def _resumo_checkin(url, app, args):
+    medicoes = Medicoes()
+    resultado = cenario_checkin(url, medicoes, Namespace(checkins=args.checkins, concorrencia=args.concorrencia), app)
+    amostras = medicoes.amostras.get('aluno.confirmar_presenca', [])
+    duracoes = sorted(d * 1000 for d, _, _ in amostras)
+    erros = sum(1 for _, status, _ in amostras if status == 0 or status >= 500)
+    inicio, fim = medicoes.janelas.get('aluno.confirmar_presenca', (0, 0))
+    return {
+        'resultado': resultado,
+        'erros': erros,
+        'p50': Medicoes._percentil(duracoes, 50),
+        'p95': Medicoes._percentil(duracoes, 95),
+        'req/s': len(amostras) / (fim - inicio) if fim > inicio else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modos', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='Threads por worker no modo gthread')
+    parser.add_argument('--conexoes', type=int, default=100, help='Greenlets por worker no modo gevent')
+    parser.add_argument('--usuarios', type=int, default=20, help='Alunos na conferência de identidade')
+    parser.add_argument('--paginas', type=int, default=5)
+    parser.add_argument('--checkins', type=int, default=120)
+    parser.add_argument('--concorrencia', type=int, default=50)
+    parser.add_argument('--porta', type=int, default=8766)
+    args = parser.parse_args()
+
+    app = create_app('benchmark')
+    linhas = []
+    for modo in args.modos.split(','):
+        modo = modo.strip()
+        print(f'▶ {modo}')
+
+        servidor, url = _subir(modo, args, 1, limiter=True)
+        try:
+            liberadas, bloqueadas = _conferir_limiter(url, LIMITE_VERIFICAR_CPF * 3)
+        finally:
+            _derrubar(servidor)
+        print(f'  limiter     {liberadas} liberadas / {bloqueadas} bloqueadas (esperado: {LIMITE_VERIFICAR_CPF} liberadas)')
+
+        servidor, url = _subir(modo, args, args.workers, limiter=False)
+        try:
+            erradas, total = _conferir_identidade(url, app, args.usuarios, args.paginas, args.concorrencia)
+            print(f'  identidade  {total - erradas}/{total} páginas com o usuário certo')
+            checkin = _resumo_checkin(url, app, args)
+            print(f"  checkin     {checkin['resultado']}")
+        finally:
+            _derrubar(servidor)
+
+        ok = liberadas == LIMITE_VERIFICAR_CPF and erradas == 0
+        linhas.append((modo, ok, checkin))
+
+    print()
+    print(f"{'modo':<10}{'conferências':>14}{'erros':>8}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>9}")
+    print('-' * 61)
+    for modo, ok, checkin in linhas:
+        print(
+            f"{modo:<10}{'ok' if ok else 'FALHOU':>14}{checkin['erros']:>8}"
+            f"{checkin['p50']:>10.1f}{checkin['p95']:>10.1f}{checkin['req/s']:>9.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
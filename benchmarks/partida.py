@@ -0,0 +1,125 @@
+"""
+Tempo de subida da aplicação e dos workers do gunicorn
+
+Em processo novo (mediana de N rodadas):
+    import        `import app` (sem montar a aplicação)
+    create_app    montar a aplicação (extensões, models, blueprints)
+    1a requisição primeiro GET /login
+
+gunicorn (-w WORKERS), com e sem GUNICORN_PRELOAD:
+    primeira resposta   do início do processo até o primeiro 200 em /login
+    workers substitutos do kill -9 de todos os workers até a próxima resposta
+                        (o master recria os workers, como após um OOM)
+
+Uso:
+    python -m benchmarks.partida --rodadas 7 --workers 4
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+_MEDIR = r"""
+import json, time
+inicio = time.perf_counter()
+import app as modulo
+importado = time.perf_counter()
+aplicacao = modulo.create_app('benchmark')
+criado = time.perf_counter()
+resposta = aplicacao.test_client().get('/login')
+assert resposta.status_code == 200, resposta.status_code
+fim = time.perf_counter()
+print(json.dumps({
+    'import': (importado - inicio) * 1000,
+    'create_app': (criado - importado) * 1000,
+    '1a requisição': (fim - criado) * 1000,
+}))
+"""
+
+
+def _processo(rodadas):
+    medidas = {}
+    for _ in range(rodadas):
+        saida = subprocess.run(
+            [sys.executable, '-c', _MEDIR], capture_output=True, text=True, check=True
+        ).stdout
+        for nome, ms in json.loads(saida.strip().splitlines()[-1]).items():
+            medidas.setdefault(nome, []).append(ms)
+    return medidas
+
+
+def _esperar_200(url, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resposta:
+                if resposta.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def _pids_workers(master):
+    saida = subprocess.run(['ps', '-o', 'pid=', '--ppid', str(master)], capture_output=True, text=True).stdout
+    return {int(pid) for pid in saida.split()}
+
+
+def _gunicorn(workers, preload, porta):
+    """(ms até a primeira resposta, ms até os workers substitutos responderem)"""
+    ambiente = {**os.environ, 'GUNICORN_PRELOAD': '1' if preload else '0'}
+    url = f'http://127.0.0.1:{porta}/login'
+    inicio = time.perf_counter()
+    servidor = subprocess.Popen(
+        ['gunicorn', "app:create_app('benchmark')", '-w', str(workers), '-b', f'127.0.0.1:{porta}'],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _esperar_200(url)
+        primeira = (time.perf_counter() - inicio) * 1000
+
+        # Derruba todos os workers: quanto tempo até os substitutos voltarem a responder
+        while len(_pids_workers(servidor.pid)) < workers:
+            time.sleep(0.01)
+        inicio = time.perf_counter()
+        for pid in _pids_workers(servidor.pid):
+            os.kill(pid, signal.SIGKILL)
+        _esperar_200(url)
+        substituto = (time.perf_counter() - inicio) * 1000
+        return primeira, substituto
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rodadas', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--porta', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'processo novo':<34}{'p50 (ms)':>10}{'mín (ms)':>10}")
+    for nome, tempos in _processo(args.rodadas).items():
+        print(f"  {nome:<32}{statistics.median(tempos):>10.1f}{min(tempos):>10.1f}")
+
+    print(f"\n{f'gunicorn -w {args.workers}':<34}{'p50 (ms)':>10}{'mín (ms)':>10}")
+    for preload in (False, True):
+        primeiras, substitutos = [], []
+        for _ in range(args.rodadas):
+            primeira, substituto = _gunicorn(args.workers, preload, args.porta)
+            primeiras.append(primeira)
+            substitutos.append(substituto)
+        modo = 'preload' if preload else 'sem preload'
+        for nome, tempos in ((f'{modo}: primeira resposta', primeiras), (f'{modo}: workers substitutos', substitutos)):
+            print(f"  {nome:<32}{statistics.median(tempos):>10.1f}{min(tempos):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Seed de carga: popula o banco com volume realista para os testes de carga
+
+- Salas reais do CEI (mesma lista de init_db.py / seed.py)
+- Milhares de alunos e dezenas de organizadores (todos com a mesma senha)
+- Centenas de eventos futuros sem conflito de horário
+- Um evento acontecendo agora no Auditório, com a lotação completa inscrita
+  (cenário de check-in simultâneo)
+- Um evento futuro vazio em sala pequena (cenário de corrida por vagas)
+
+Uso:
+    DATABASE_URL=sqlite:///carga.db python -m benchmarks.seed_carga --alunos 3000 --eventos 300
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from app import create_app
+from extensions import db
+from models.user import Usuario
+from models.sala import Sala
+from models.evento import Evento
+from models.inscricao import Inscricao
+from utils.cpf import completar
+
+SENHA_CARGA = 'carga123'
+
+# Salas reais do CEI (init_db.py)
+SALAS_CEI = [
+    ("Auditório (TAMBAQUI)", 120),
+    ("Laboratório de Informática", 40),
+    ("Sala Treinamento (RIO BRANCO)", 30),
+    ("Sala Treinamento (RIO MADEIRA)", 30),
+    ("Sala Treinamento (RIO CANAÃ)", 30),
+    ("Sala de Reunião (AÇAÍ)", 6),
+    ("Sala de Reunião (JATOBÁ)", 6),
+    ("Sala de Reunião (IPÊ)", 6),
+    ("Sala de Reunião (CASTANHEIRA)", 6),
+]
+
+# Eventos com nomes/segredos fixos, usados pelos cenários do loadtest
+QR_EVENTO_CHECKIN = 'AGENCEI_CARGA_CHECKIN'
+QR_EVENTO_CORRIDA = 'AGENCEI_CARGA_CORRIDA'
+
+
+def gerar_cpf(numero):
+    """Gera um CPF válido (com dígitos verificadores) a partir de um inteiro"""
+    return f'{completar(numero % 1_000_000_000):011d}'
+
+
+def cpf_aluno(indice):
+    """CPF do i-ésimo aluno de carga (o loadtest usa a mesma regra para logar)"""
+    return gerar_cpf(100000000 + indice)
+
+
+def cpf_organizador(indice):
+    return gerar_cpf(200000000 + indice)
+
+
+def seed_carga(num_alunos=3000, num_organizadores=20, num_eventos=300, semente=42):
+    """Recria as tabelas e popula o banco de carga. Retorna um resumo em dict."""
+    rng = random.Random(semente)
+    app = create_app('benchmark')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        # Hash único: gerar milhares de hashes scrypt levaria minutos
+        senha_hash = generate_password_hash(SENHA_CARGA)
+        agora = datetime.now().replace(second=0, microsecond=0)
+
+        db.session.execute(insert(Sala), [
+            {'nome': nome, 'capacidade': capacidade, 'ativa': True}
+            for nome, capacidade in SALAS_CEI
+        ])
+        db.session.execute(insert(Usuario), [
+            {'nome': f'Organizador Carga {i}', 'cpf': cpf_organizador(i), 'senha': senha_hash,
+             'tipo': 'organizador', 'ativo': True}
+            for i in range(num_organizadores)
+        ])
+        db.session.execute(insert(Usuario), [
+            {'nome': f'Aluno Carga {i}', 'cpf': cpf_aluno(i), 'senha': senha_hash,
+             'tipo': 'aluno', 'ativo': True}
+            for i in range(num_alunos)
+        ])
+
+        salas = db.session.execute(select(Sala.id, Sala.capacidade).order_by(Sala.id)).all()
+        organizadores = db.session.scalars(select(Usuario.id).filter_by(tipo='organizador')).all()
+        alunos = db.session.scalars(select(Usuario.id).filter_by(tipo='aluno').order_by(Usuario.id)).all()
+
+        # Um evento por sala por dia, sempre às 14h: nenhum conflito de horário
+        eventos = []
+        for i in range(num_eventos):
+            sala_id, _ = salas[i % len(salas)]
+            eventos.append({
+                'nome_evento': f'Evento de Carga {i}',
+                'data_hora': (agora + timedelta(days=1 + i // len(salas))).replace(hour=14, minute=0),
+                'duracao_horas': 2,
+                'sala_id': sala_id,
+                'organizador_id': organizadores[i % len(organizadores)],
+                'qr_code_link': f'AGENCEI_CARGA_{i:05d}',
+                'status': 'agendado',
+            })
+
+        auditorio_id, auditorio_cap = salas[0]
+        sala_pequena_id, sala_pequena_cap = salas[2]
+        eventos.append({
+            'nome_evento': 'Aula Magna (check-in)',
+            'data_hora': agora - timedelta(minutes=10),
+            'duracao_horas': 2,
+            'sala_id': auditorio_id,
+            'organizador_id': organizadores[0],
+            'qr_code_link': QR_EVENTO_CHECKIN,
+            'status': 'agendado',
+        })
+        eventos.append({
+            'nome_evento': 'Oficina Concorrida (corrida)',
+            'data_hora': (agora + timedelta(days=1)).replace(hour=8, minute=0),
+            'duracao_horas': 2,
+            'sala_id': sala_pequena_id,
+            'organizador_id': organizadores[0],
+            'qr_code_link': QR_EVENTO_CORRIDA,
+            'status': 'agendado',
+        })
+        db.session.execute(insert(Evento), eventos)
+
+        ids_eventos = dict(db.session.execute(select(Evento.qr_code_link, Evento.id)).all())
+        capacidades = dict(salas)
+
+        # Inscrições: até metade da lotação de cada evento comum
+        inscricoes = []
+        for ev in eventos[:num_eventos]:
+            vagas = capacidades[ev['sala_id']] // 2
+            for aluno_id in rng.sample(alunos, rng.randint(0, min(vagas, len(alunos)))):
+                inscricoes.append({
+                    'aluno_id': aluno_id,
+                    'evento_id': ids_eventos[ev['qr_code_link']],
+                    'status_presenca': Inscricao.STATUS_AGUARDANDO,
+                })
+
+        # Auditório lotado para o cenário de check-in
+        for aluno_id in alunos[:auditorio_cap]:
+            inscricoes.append({
+                'aluno_id': aluno_id,
+                'evento_id': ids_eventos[QR_EVENTO_CHECKIN],
+                'status_presenca': Inscricao.STATUS_AGUARDANDO,
+            })
+
+        if inscricoes:
+            db.session.execute(insert(Inscricao), inscricoes)
+        db.session.commit()
+
+        return {
+            'alunos': len(alunos),
+            'organizadores': len(organizadores),
+            'salas': len(salas),
+            'eventos': len(eventos),
+            'inscricoes': len(inscricoes),
+            'evento_checkin_id': ids_eventos[QR_EVENTO_CHECKIN],
+            'evento_corrida_id': ids_eventos[QR_EVENTO_CORRIDA],
+            'capacidade_corrida': sala_pequena_cap,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Popula o banco para testes de carga')
+    parser.add_argument('--alunos', type=int, default=3000)
+    parser.add_argument('--organizadores', type=int, default=20)
+    parser.add_argument('--eventos', type=int, default=300)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    resumo = seed_carga(args.alunos, args.organizadores, args.eventos, args.semente)
+    print('✅ Banco de carga criado:')
+    for chave, valor in resumo.items():
+        print(f'   {chave}: {valor}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Partida a frio dos templates: com e sem o cache de bytecode pré-compilado
+
+Cada medição roda em um processo Python novo (como um worker do gunicorn
+recém-criado) e mede:
+    carregar   tempo para carregar todos os templates (post_worker_init)
+    login      primeira renderização de GET /login, já com o app importado
+
+Cenários:
+    sem_cache  JINJA_BYTECODE_CACHE=0: todo template é compilado do fonte
+    frio       cache ligado, mas vazio (primeira subida depois do deploy sem o passo de build)
+    compilado  cache preenchido por `flask --app app compilar-templates`
+
+Uso:
+    python -m benchmarks.templates_frio --rodadas 15
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Executado em cada processo filho
+_MEDIR = r"""
+import json, sys, time
+from app import create_app
+from utils.templates import carregar_templates
+
+app = create_app('benchmark')
+medida = sys.argv[1]
+inicio = time.perf_counter()
+if medida == 'carregar':
+    with app.app_context():
+        carregar_templates(app)
+else:
+    resposta = app.test_client().get('/login')
+    assert resposta.status_code == 200, resposta.status_code
+print(json.dumps({'ms': (time.perf_counter() - inicio) * 1000}))
+"""
+
+
+def _medir(medida, ambiente):
+    saida = subprocess.run(
+        [sys.executable, '-c', _MEDIR, medida],
+        env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])['ms']
+
+
+def _compilar(ambiente):
+    subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'compilar-templates'],
+        env=ambiente, capture_output=True, check=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rodadas', type=int, default=10)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='jinja_cache_')
+    base = {**os.environ, 'JINJA_CACHE_DIR': diretorio}
+    cenarios = {
+        'sem_cache': {**base, 'JINJA_BYTECODE_CACHE': '0'},
+        'frio': {**base, 'JINJA_BYTECODE_CACHE': '1'},
+        'compilado': {**base, 'JINJA_BYTECODE_CACHE': '1'},
+    }
+
+    try:
+        print(f"{'cenário':<12}{'medida':<10}{'p50 (ms)':>10}{'mín (ms)':>10}{'máx (ms)':>10}")
+        for nome, ambiente in cenarios.items():
+            for medida in ('carregar', 'login'):
+                tempos = []
+                for _ in range(args.rodadas):
+                    # 'frio' começa sempre do cache vazio; 'compilado' do cache do build
+                    shutil.rmtree(diretorio, ignore_errors=True)
+                    if nome == 'compilado':
+                        _compilar(ambiente)
+                    tempos.append(_medir(medida, ambiente))
+                print(
+                    f"{nome:<12}{medida:<10}{statistics.median(tempos):>10.1f}"
+                    f"{min(tempos):>10.1f}{max(tempos):>10.1f}"
+                )
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
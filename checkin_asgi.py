@@ -0,0 +1,219 @@
+"""
+AGENCEI - Serviço assíncrono de check-in (ASGI)
+
+Atende o fluxo JSON de confirmação de presença (POST /aluno/checkin) com
+driver de banco assíncrono, para que milhares de leituras de QR Code fiquem
+em andamento com poucos workers. Todas as outras rotas são repassadas para a
+aplicação Flask, então este módulo pode substituir `app:app` no servidor.
+
+Executar:
+    gunicorn checkin_asgi:asgi_app -k uvicorn.workers.UvicornWorker
+    uvicorn checkin_asgi:asgi_app --workers 2
+
+Autenticação e CSRF usam o mesmo cookie de sessão e o mesmo token do Flask
+(Flask-Login + Flask-WTF), sem tocar no contexto de requisição do Flask.
+"""
+import hmac
+import json
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app import app as flask_app
+from extensions import db
+from models.evento import Evento
+from models.inscricao import Inscricao
+from models.user import Usuario
+from utils import checkin
+from utils.db import opcoes_engine, url_assincrona
+from utils.metricas import registrar_checkin
+
+CHECKIN_PATH = '/aluno/checkin'
+
+_wsgi = WsgiToAsgi(flask_app)
+_session_factory = None
+
+
+def _sessoes():
+    """Engine assíncrono criado sob demanda, dentro do event loop do worker"""
+    global _session_factory
+    if _session_factory is None:
+        with flask_app.app_context():
+            # URL já resolvida pelo Flask-SQLAlchemy (caminho do SQLite na pasta instance)
+            url_sync = db.engine.url.render_as_string(hide_password=False)
+        engine = create_async_engine(url_assincrona(url_sync), **opcoes_engine(url_sync))
+        _session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return _session_factory
+
+
+# ================================================================
+#  Sessão e CSRF do Flask (somente leitura)
+# ================================================================
+def _ler_cookies(scope):
+    cookies = {}
+    for nome, valor in scope.get('headers', []):
+        if nome == b'cookie':
+            for parte in valor.decode('latin-1').split(';'):
+                chave, _, conteudo = parte.strip().partition('=')
+                if chave:
+                    cookies[chave] = conteudo
+    return cookies
+
+
+def _ler_header(scope, nome):
+    nome = nome.lower().encode('latin-1')
+    for chave, valor in scope.get('headers', []):
+        if chave == nome:
+            return valor.decode('latin-1')
+    return None
+
+
+def _carregar_sessao(scope):
+    """Decodifica o cookie de sessão assinado pelo Flask"""
+    cookie = _ler_cookies(scope).get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if serializer is None:
+        return {}
+
+    max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+    try:
+        return serializer.loads(cookie, max_age=max_age)
+    except BadSignature:
+        return {}
+
+
+def _csrf_valido(sessao, token):
+    """Mesma validação do Flask-WTF (token assinado x segredo guardado na sessão)"""
+    if not flask_app.config.get('WTF_CSRF_ENABLED', True):
+        return True
+
+    if not token or 'csrf_token' not in sessao:
+        return False
+
+    serializer = URLSafeTimedSerializer(
+        flask_app.config.get('WTF_CSRF_SECRET_KEY') or flask_app.secret_key,
+        salt='wtf-csrf-token'
+    )
+    try:
+        token_sessao = serializer.loads(token, max_age=flask_app.config.get('WTF_CSRF_TIME_LIMIT', 3600))
+    except BadSignature:
+        return False
+
+    return hmac.compare_digest(sessao['csrf_token'], token_sessao)
+
+
+# ================================================================
+#  Check-in
+# ================================================================
+async def _ler_corpo(receive):
+    corpo = b''
+    while True:
+        mensagem = await receive()
+        corpo += mensagem.get('body', b'')
+        if not mensagem.get('more_body'):
+            return corpo
+
+
+async def _responder(send, corpo, status):
+    payload = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(payload)).encode('latin-1')),
+            (b'cache-control', b'no-store'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def confirmar_checkin(aluno_id, evento_id, totp_token):
+    """
+    Valida o token TOTP e confirma a presença em uma única transação.
+    Caminho feliz: 2 SELECTs por chave primária + 1 UPDATE condicional.
+    Retorna (codigo, evento).
+    """
+    antes = flask_app.config.get('QR_CODE_JANELA_ANTES_MINUTOS', 30)
+    depois = flask_app.config.get('QR_CODE_JANELA_DEPOIS_MINUTOS', 30)
+
+    async with _sessoes()() as sessao:
+        async with sessao.begin():
+            tipo = await sessao.scalar(
+                select(Usuario.tipo).where(Usuario.id == aluno_id, Usuario.ativo == True)
+            )
+            if tipo != 'aluno':
+                return checkin.SEM_PERMISSAO, None
+
+            evento = await sessao.get(Evento, evento_id)
+            codigo = checkin.validar_evento(evento, totp_token, antes, depois)
+            if codigo:
+                return codigo, evento
+
+            resultado = await sessao.execute(Inscricao.sql_confirmar_presenca(aluno_id, evento_id))
+            if resultado.rowcount == 1:
+                return checkin.CONFIRMADO, evento
+
+            # Nada atualizado: descobrir se não há inscrição ou se já estava confirmada
+            existe = await sessao.scalar(
+                select(Inscricao.id).where(
+                    Inscricao.aluno_id == aluno_id,
+                    Inscricao.evento_id == evento_id
+                )
+            )
+            return (checkin.JA_CONFIRMADO if existe else checkin.NAO_INSCRITO), evento
+
+
+async def _checkin(scope, receive, send):
+    sessao_flask = _carregar_sessao(scope)
+    corpo = await _ler_corpo(receive)
+
+    try:
+        aluno_id = int(sessao_flask.get('_user_id'))
+    except (TypeError, ValueError):
+        return await _responder(send, *checkin.resposta(checkin.NAO_AUTENTICADO))
+
+    if not _csrf_valido(sessao_flask, _ler_header(scope, 'X-CSRFToken')):
+        return await _responder(send, *checkin.resposta(checkin.SEM_PERMISSAO))
+
+    try:
+        dados = json.loads(corpo or b'{}')
+    except ValueError:
+        dados = None
+
+    evento_id, totp_token = checkin.ler_payload(dados)
+    if evento_id is None:
+        return await _responder(send, *checkin.resposta(checkin.DADOS_INVALIDOS))
+
+    try:
+        codigo, evento = await confirmar_checkin(aluno_id, evento_id, totp_token)
+    except Exception:
+        flask_app.logger.exception('Erro no check-in assíncrono')
+        codigo, evento = checkin.ERRO, None
+
+    registrar_checkin('checkin_asgi', codigo)
+    await _responder(send, *checkin.resposta(codigo, evento))
+
+
+async def _lifespan(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            if _session_factory is not None:
+                await _session_factory.kw['bind'].dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def asgi_app(scope, receive, send):
+    """Roteia o check-in para o caminho assíncrono e o resto para o Flask"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] == 'http' and scope['path'] == CHECKIN_PATH and scope['method'] == 'POST':
+        return await _checkin(scope, receive, send)
+    return await _wsgi(scope, receive, send)
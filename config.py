@@ -3,6 +3,7 @@ Configurações da aplicação AGENCEI
 """
 import os
 from datetime import timedelta
+from utils.db import normalizar_database_url, opcoes_engine
 
 
 class Config:
@@ -12,8 +13,12 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(24)
     
     # Banco de dados
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///agencei.db'
+    # DATABASE_URL aceita SQLite (padrão local) ou PostgreSQL (produção)
+    SQLALCHEMY_DATABASE_URI = normalizar_database_url(os.environ.get('DATABASE_URL')) or 'sqlite:///agencei.db'
+    SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite: quanto uma requisição que grava espera pela trava de escrita
+    SQLITE_ESPERA_SEGUNDOS = float(os.environ.get('SQLITE_ESPERA_SEGUNDOS', 15))
     
     # Flask-Login
     REMEMBER_COOKIE_DURATION = timedelta(days=7)
@@ -24,12 +29,71 @@ class Config:
     # QR Code
     QR_CODE_JANELA_ANTES_MINUTOS = 30
     QR_CODE_JANELA_DEPOIS_MINUTOS = 30
+    
+    # Varredura de ausências (flask marcar-ausentes): eventos por UPDATE
+    AUSENCIAS_TAMANHO_LOTE = int(os.environ.get('AUSENCIAS_TAMANHO_LOTE', 200))
+    
+    # Fila de tarefas (flask worker): espera entre consultas com a fila vazia
+    TAREFAS_INTERVALO_SEGUNDOS = float(os.environ.get('TAREFAS_INTERVALO_SEGUNDOS', 2))
+    
+    # Cache de bytecode dos templates (flask compilar-templates); padrão: instance/jinja_cache
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', '1') == '1'
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
+    
+    # Estáticos com hash no nome (flask compilar-assets): cache imutável por 1 ano
+    ASSETS_FINGERPRINT = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 365 * 24 * 3600))
+    
+    # Compressão das respostas HTML/JSON (utils/compressao.py)
+    COMPRESSAO_ATIVA = os.environ.get('COMPRESSAO_ATIVA', '1') == '1'
+    COMPRESSAO_MINIMO_BYTES = int(os.environ.get('COMPRESSAO_MINIMO_BYTES', 500))
+    COMPRESSAO_NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', 6))
+    COMPRESSAO_NIVEL_BROTLI = int(os.environ.get('COMPRESSAO_NIVEL_BROTLI', 4))
+    
+    # ETag + 304 nas listagens marcadas com @condicional (utils/decorators.py)
+    RESPOSTAS_CONDICIONAIS = os.environ.get('RESPOSTAS_CONDICIONAIS', '1') == '1'
+    
+    # Login: threads que calculam hashes de senha por processo, quantos logins
+    # podem esperar na fila e por quanto tempo antes de responder 503
+    LOGIN_HASH_THREADS = int(os.environ.get('LOGIN_HASH_THREADS', 2))
+    LOGIN_HASH_FILA = int(os.environ.get('LOGIN_HASH_FILA', 32))
+    LOGIN_HASH_ESPERA_SEGUNDOS = float(os.environ.get('LOGIN_HASH_ESPERA_SEGUNDOS', 5))
+    
+    # CPFs pré-autorizados em memória: a versão da tabela é conferida a cada
+    # CPFS_AUTORIZADOS_VERSAO_SEGUNDOS (recarrega se outro worker mudou algo)
+    # e o conjunto é recarregado de qualquer forma a cada CPFS_AUTORIZADOS_CACHE_SEGUNDOS
+    CPFS_AUTORIZADOS_CACHE_SEGUNDOS = int(os.environ.get('CPFS_AUTORIZADOS_CACHE_SEGUNDOS', 60))
+    CPFS_AUTORIZADOS_VERSAO_SEGUNDOS = float(os.environ.get('CPFS_AUTORIZADOS_VERSAO_SEGUNDOS', 1))
+    
+    # Resumos de presença (flask atualizar-resumos): eventos recalculados por commit
+    RESUMOS_TAMANHO_LOTE = int(os.environ.get('RESUMOS_TAMANHO_LOTE', 500))
+    
+    # Horário de funcionamento das salas (grade de disponibilidade)
+    SALA_HORA_ABERTURA = 7
+    SALA_HORA_FECHAMENTO = 22
+    
+    # Profiler de SQL (utils/profiler.py)
+    SQL_PROFILER_ENABLED = True
+    SQL_PROFILER_HEADERS = False  # Server-Timing / X-Query-Count
+    SQL_SLOW_REQUEST_QUERIES = int(os.environ.get('SQL_SLOW_REQUEST_QUERIES', 30))
+    SQL_SLOW_REQUEST_MS = int(os.environ.get('SQL_SLOW_REQUEST_MS', 200))
+    SQL_SLOW_QUERY_MS = int(os.environ.get('SQL_SLOW_QUERY_MS', 50))
+    # Lazy load fora do que a consulta da listagem carregou vira erro (utils.db.carregamento)
+    SQL_RAISELOAD = os.environ.get('SQL_RAISELOAD', '0') == '1'
+    
+    # Métricas Prometheus em /metrics (utils/metricas.py)
+    METRICS_ENABLED = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # se definido, exige "Authorization: Bearer <token>"
 
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
     DEBUG = True
     TESTING = False
+    SQL_PROFILER_HEADERS = True
+    SQL_RAISELOAD = True
+    # CSS/JS editados aparecem sem refazer o build
+    ASSETS_FINGERPRINT = False
 
 
 class ProductionConfig(Config):
@@ -42,14 +106,29 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Configuração para testes"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_agencei.db'
+    SQL_PROFILER_HEADERS = True
+    SQL_RAISELOAD = True
+    # TEST_DATABASE_URL permite rodar a mesma suíte contra um PostgreSQL local
+    SQLALCHEMY_DATABASE_URI = normalizar_database_url(os.environ.get('TEST_DATABASE_URL')) or 'sqlite:///test_agencei.db'
+    SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine(SQLALCHEMY_DATABASE_URI)
     WTF_CSRF_ENABLED = False
 
 
+class BenchmarkConfig(Config):
+    """Configuração para testes de carga (benchmarks/loadtest.py)"""
+    DEBUG = False
+    TESTING = False
+    # Milhares de logins vêm do mesmo IP durante o teste (benchmarks.modos_worker liga para conferir o limiter)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '0') == '1'
+    # O relatório do loadtest lê X-Query-Count
+    SQL_PROFILER_HEADERS = True
+
+
 # Mapeamento de ambientes
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -3,9 +3,15 @@ from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from utils.profiler import ProfilerSQL
+from utils.metricas import Metricas
+from utils.compressao import Compressao
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 csrf = CSRFProtect()
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
+sql_profiler = ProfilerSQL()
+metricas = Metricas()
+compressao = Compressao()
@@ -0,0 +1,166 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir do diretório do app)
+"""
+import math
+import os
+import shutil
+
+
+def _cpus_disponiveis():
+    """
+    CPUs que o processo pode de fato usar: afinidade do processo e cota do
+    cgroup (v2: cpu.max; v1: cpu.cfs_quota_us). Em container, cpu_count()
+    devolve as CPUs da máquina inteira
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS/Windows
+        cpus = os.cpu_count() or 1
+
+    for arquivo_cota, arquivo_periodo in (
+        ('/sys/fs/cgroup/cpu.max', None),
+        ('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', '/sys/fs/cgroup/cpu/cpu.cfs_period_us'),
+    ):
+        try:
+            with open(arquivo_cota) as f:
+                campos = f.read().split()
+            if arquivo_periodo:
+                with open(arquivo_periodo) as f:
+                    campos.append(f.read().strip())
+        except OSError:
+            continue
+        if campos[0] not in ('max', '-1'):
+            cpus = min(cpus, max(1, math.ceil(int(campos[0]) / int(campos[1]))))
+        break
+
+    return cpus
+
+
+# Processos: WEB_CONCURRENCY ou 2 por CPU disponível + 1 (o hash de senha do
+# login é CPU pura), limitado a GUNICORN_MAX_WORKERS. Cada worker abre o
+# próprio pool: no PostgreSQL o total de conexões é
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW), 4 * (5 + 5) = 40 no padrão.
+# Confira contra o max_connections do plano (o worker da fila e as conexões
+# administrativas também contam) antes de subir WEB_CONCURRENCY
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    min(_cpus_disponiveis() * 2 + 1, int(os.environ.get('GUNICORN_MAX_WORKERS', 4)))
+))
+
+# sync: uma requisição por processo. Com GUNICORN_THREADS > 1 o gunicorn usa
+# gthread; o pool do SQLAlchemy acompanha (utils/db.py: opcoes_engine).
+# gevent: GUNICORN_WORKER_CONNECTIONS requisições por processo (defina
+# DB_POOL_SIZE de acordo). Em todos os modos db.session é um por requisição
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+if worker_class == 'gevent':
+    # Antes de qualquer import do app (inclusive no master, com preload):
+    # travas, sockets e o driver do PostgreSQL passam a ceder a vez
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:  # sem psycopg2 (SQLite local)
+        pass
+
+# Keep-alive com o proxy do provedor (só vale para gthread; sync fecha a conexão)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Relatórios pesados rodam na fila de tarefas: 30 s por requisição sobra
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Recicla workers aos poucos (vazamentos de memória); com preload o substituto sobe em ms
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat dos workers em memória: /tmp em disco de container pode travar o worker
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# GUNICORN_PRELOAD=1: o app é importado uma vez no master e os workers nascem
+# por fork já prontos (sobem em milissegundos, inclusive os substitutos)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+
+def on_starting(server):
+    """
+    Limpa as métricas de execuções anteriores (modo multiprocesso do Prometheus)
+    e registra no log o máximo de conexões que os workers podem abrir
+    """
+    diretorio = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if diretorio:
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.makedirs(diretorio, exist_ok=True)
+
+    from utils.db import normalizar_database_url, opcoes_engine
+
+    opcoes = opcoes_engine(normalizar_database_url(os.environ.get('DATABASE_URL')))
+    if opcoes:
+        por_worker = opcoes['pool_size'] + opcoes['max_overflow']
+        server.log.info(
+            'Conexões com o banco: até %d (%d workers x %d por pool)',
+            server.cfg.workers * por_worker, server.cfg.workers, por_worker
+        )
+
+
+def child_exit(server, worker):
+    """Descarta os gauges 'live' de um worker que terminou"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def _app_flask(carregado):
+    """
+    App Flask por trás do callable que o gunicorn carregou: o próprio app
+    (app:app, app:create_app(...)) ou, no ASGI (checkin_asgi:asgi_app, um
+    WsgiToAsgi), o `app` do módulo app, que o checkin_asgi envolve
+    """
+    if hasattr(carregado, 'config'):
+        return carregado
+    from app import app
+    return app
+
+
+def when_ready(server):
+    """Com preload, carrega templates e mapeamentos no master: os workers herdam tudo pronto"""
+    if not server.cfg.preload_app:
+        return
+    from sqlalchemy.orm import configure_mappers
+    from utils.templates import carregar_templates
+
+    app = _app_flask(server.app.wsgi())
+    configure_mappers()
+    if app.config['JINJA_BYTECODE_CACHE']:
+        with app.app_context():
+            carregar_templates(app)
+
+
+def post_fork(server, worker):
+    """
+    Com preload, o worker não pode reaproveitar conexões abertas pelo master.
+    Descarta o pool herdado já aqui; se algo escapar, a checagem de pid no
+    checkout (utils/db.py: proteger_pools_contra_fork) descarta a conexão
+    """
+    if not server.cfg.preload_app:
+        return
+    from extensions import db
+
+    with _app_flask(server.app.wsgi()).app_context():
+        for engine in db.engines.values():
+            # close=False: só esquece o pool herdado, sem fechar as conexões do master
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Carrega os templates a partir do bytecode pré-compilado antes da primeira requisição"""
+    from utils.templates import carregar_templates
+
+    app = _app_flask(worker.wsgi)
+    if app.config['JINJA_BYTECODE_CACHE']:
+        with app.app_context():
+            carregar_templates(app)
@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import re
 
 db_path = 'instance/agencei.db'
 if not os.path.exists(db_path):
@@ -22,6 +23,58 @@ except sqlite3.OperationalError as e:
         print(f"❌ Erro SQLite: {e}")
 except Exception as e:
     print(f"❌ Erro inesperado: {e}")
+
+def recriar_com_cpf_inteiro(c, tabela):
+    """
+    Recria a tabela com a coluna cpf BIGINT (criar, copiar, apagar,
+    renomear). Um UPDATE com CAST não basta: a coluna VARCHAR tem afinidade
+    TEXT e o SQLite grava o resultado como texto de novo.
+    Retorna False se a coluna já era inteira
+    """
+    tipo_cpf = next(col[2] for col in c.execute(f"PRAGMA table_info({tabela})") if col[1] == 'cpf')
+    if 'INT' in tipo_cpf.upper():
+        return False
+
+    sql_tabela = c.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+    ).fetchone()[0]
+    sql_indices = [sql for (sql,) in c.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (tabela,)
+    )]
+    colunas = [col[1] for col in c.execute(f"PRAGMA table_info({tabela})")]
+
+    sql_nova = re.sub(rf'^CREATE TABLE\s+"?{tabela}"?', f'CREATE TABLE {tabela}_novo', sql_tabela)
+    sql_nova = re.sub(r'(\bcpf\s+)VARCHAR\(11\)', r'\1BIGINT', sql_nova, count=1)
+    origem = ', '.join('CAST(cpf AS INTEGER)' if col == 'cpf' else col for col in colunas)
+
+    c.execute(sql_nova)
+    c.execute(f"INSERT INTO {tabela}_novo ({', '.join(colunas)}) SELECT {origem} FROM {tabela}")
+    c.execute(f"DROP TABLE {tabela}")
+    c.execute(f"ALTER TABLE {tabela}_novo RENAME TO {tabela}")
+    for sql in sql_indices:
+        c.execute(sql)
+    return True
+
+
+try:
+    # CPF passou a ser gravado como inteiro (utils/cpf.py): as tabelas são
+    # recriadas com a coluna BIGINT, numa transação só (chaves estrangeiras
+    # desligadas durante a troca, como manda a documentação do SQLite)
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    conn.execute("BEGIN;")
+    recriadas = [tabela for tabela in ('usuario', 'pre_authorized_user') if recriar_com_cpf_inteiro(c, tabela)]
+    problemas = c.execute("PRAGMA foreign_key_check;").fetchall()
+    if problemas:
+        raise RuntimeError(f"chaves estrangeiras inválidas após a troca: {problemas[:5]}")
+    conn.commit()
+    if recriadas:
+        print(f"✅ Coluna cpf convertida para inteiro em: {', '.join(recriadas)}")
+    else:
+        print("⚠️ As colunas cpf já eram inteiras.")
+except Exception as e:
+    if 'conn' in locals():
+        conn.rollback()
+    print(f"❌ Erro ao converter CPFs: {e}")
 finally:
     if 'conn' in locals():
         conn.close()
@@ -6,12 +6,23 @@ from models.user import Usuario
 from models.sala import Sala
 from models.evento import Evento
 from models.inscricao import Inscricao
+from models.lista_espera import ListaEspera
 from models.pre_authorized_user import PreAuthorizedUser
+from models.progresso_tarefa import ProgressoTarefa
+from models.resumo_presenca import ResumoEvento, ResumoOrganizador, ResumoSala, ResumoDia
+from models.tarefa import Tarefa
 
 __all__ = [
     'Usuario',
     'Sala',
     'Evento',
     'Inscricao',
-    'PreAuthorizedUser'
+    'ListaEspera',
+    'PreAuthorizedUser',
+    'ProgressoTarefa',
+    'ResumoEvento',
+    'ResumoOrganizador',
+    'ResumoSala',
+    'ResumoDia',
+    'Tarefa'
 ]
\ No newline at end of file
@@ -3,11 +3,16 @@ Model: Evento
 Representa os eventos/palestras/atividades agendadas
 """
 from extensions import db
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 import hashlib
 import hmac
 import time
-from sqlalchemy import or_
+from sqlalchemy import DDL, event, func, or_
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import joinedload, selectinload
+from utils.db import adicionar_horas, carregamento, trava_sala
+from utils.intervalos import sobreposicoes
 
 class Evento(db.Model):
     """
@@ -32,18 +37,44 @@ class Evento(db.Model):
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
     atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # PostgreSQL: o banco recusa dois eventos sobrepostos na mesma sala,
+    # mesmo que duas reservas concorrentes passem pela verificação da aplicação
+    __table_args__ = (
+        ExcludeConstraint(
+            (sala_id, '='),
+            (func.tsrange(data_hora, adicionar_horas(data_hora, duracao_horas)), '&&'),
+            name='evento_sala_sem_sobreposicao',
+            using='gist',
+            where='data_hora IS NOT NULL AND duracao_horas IS NOT NULL'
+        ).ddl_if(dialect='postgresql'),
+    )
+    
     # Relacionamentos
     inscricoes = db.relationship('Inscricao', backref='evento', lazy=True, cascade="all, delete-orphan")
+    lista_espera = db.relationship('ListaEspera', backref='evento', lazy=True, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f'<Evento {self.nome_evento} em {self.data_hora.strftime("%d/%m/%Y") if self.data_hora else "N/A"}>'
     
-    @property
+    @staticmethod
+    def versao_dados(evento_id=None):
+        """Muda a cada evento criado, editado ou removido (ETag das listagens); evento_id restringe a um evento"""
+        consulta = db.select(func.count(Evento.id), func.max(Evento.id), func.max(Evento.atualizado_em))
+        if evento_id is not None:
+            consulta = consulta.where(Evento.id == evento_id)
+        return tuple(db.session.execute(consulta).one())
+    
+    @hybrid_property
     def data_hora_fim(self):
         """Retorna a data/hora de término do evento"""
         if self.duracao_horas is None:
             return None
         return self.data_hora + timedelta(hours=self.duracao_horas)
+
+    @data_hora_fim.expression
+    def data_hora_fim(cls):
+        """Término do evento em SQL (portável entre SQLite e PostgreSQL)"""
+        return adicionar_horas(cls.data_hora, cls.duracao_horas)
     
     @property
     def num_inscritos(self):
@@ -136,19 +167,129 @@ class Evento(db.Model):
         qr_code = f"AGENCEI_{hash_code.upper()}"
         return qr_code
     
+    @staticmethod
+    def gerar_qr_codes(nome_evento, datas, sala_id, organizador_id):
+        """
+        Mesmos códigos de gerar_qr_code para várias datas de uma vez
+        (o prefixo comum é processado pelo SHA-256 uma única vez)
+        """
+        prefixo = hashlib.sha256(f"{nome_evento}_".encode())
+        codigos = []
+        for data_hora in datas:
+            hash_obj = prefixo.copy()
+            hash_obj.update(f"{data_hora.isoformat()}_{sala_id}_{organizador_id}".encode())
+            codigos.append(f"AGENCEI_{hash_obj.hexdigest()[:16].upper()}")
+        return codigos
+    
+    # ================================================================
+    #  Séries recorrentes
+    # ================================================================
+    @staticmethod
+    def verificar_serie(sala_id, ocorrencias, duracao_horas):
+        """
+        Confere todas as ocorrências contra as reservas da sala com uma
+        única consulta + interval join em memória.
+        Retorna [(data_hora, [{'id', 'nome'}, ...])] apenas das ocorrências em conflito
+        """
+        from models.sala import Sala
+        
+        if not ocorrencias:
+            return []
+        
+        duracao = timedelta(hours=duracao_horas)
+        intervalos = [(inicio, inicio + duracao) for inicio in ocorrencias]
+        reservas = Sala.reservas_por_sala([sala_id], intervalos[0][0], intervalos[-1][1])[sala_id]
+        
+        return [
+            (inicio, conflitantes)
+            for (inicio, _), conflitantes in zip(intervalos, sobreposicoes(intervalos, reservas))
+            if conflitantes
+        ]
+    
+    @staticmethod
+    def criar_serie(nome_evento, descricao, sala_id, organizador_id, ocorrencias, duracao_horas,
+                    pular_conflitos=False):
+        """
+        Cria as ocorrências de uma série em uma única transação.
+        Com conflitos, nada é gravado — a menos que pular_conflitos seja True,
+        caso em que apenas as ocorrências livres são criadas.
+        A verificação e o commit acontecem sob a trava da sala.
+        Retorna (eventos_criados, conflitos)
+        """
+        with trava_sala(sala_id):
+            conflitos = Evento.verificar_serie(sala_id, ocorrencias, duracao_horas)
+            if conflitos and not pular_conflitos:
+                return [], conflitos
+            
+            em_conflito = {inicio for inicio, _ in conflitos}
+            livres = [inicio for inicio in ocorrencias if inicio not in em_conflito]
+            codigos = Evento.gerar_qr_codes(nome_evento, livres, sala_id, organizador_id)
+            
+            eventos = [
+                Evento(
+                    nome_evento=nome_evento,
+                    descricao=descricao,
+                    data_hora=data_hora,
+                    duracao_horas=duracao_horas,
+                    sala_id=sala_id,
+                    organizador_id=organizador_id,
+                    qr_code_link=qr_code_link
+                )
+                for data_hora, qr_code_link in zip(livres, codigos)
+            ]
+            
+            db.session.add_all(eventos)
+            db.session.commit()
+        return eventos, conflitos
+    
     def sala_tem_capacidade(self):
         """Verifica se a sala comporta os inscritos"""
         if not self.sala:
             return True
         return self.num_inscritos <= self.sala.capacidade
     
+    # ================================================================
+    #  Listagens: relacionamentos carregados na própria consulta
+    # ================================================================
+    @staticmethod
+    def consulta_listagem():
+        """
+        Eventos com sala, organizador e inscrições (admin.eventos, dashboard,
+        eventos disponíveis): três consultas no total, não três por evento
+        """
+        return Evento.query.options(*carregamento(
+            joinedload(Evento.sala),
+            joinedload(Evento.organizador),
+            selectinload(Evento.inscricoes)
+        ))
+    
+    @staticmethod
+    def consulta_reservas():
+        """Eventos com sala e inscrições (minhas reservas do organizador)"""
+        return Evento.query.options(*carregamento(
+            joinedload(Evento.sala),
+            selectinload(Evento.inscricoes)
+        ))
+    
+    @staticmethod
+    def obter_com_participantes(evento_id):
+        """Evento com sala e inscrições já com os alunos (detalhes do evento); 404 se não existir"""
+        from models.inscricao import Inscricao
+        
+        return Evento.query.options(*carregamento(
+            joinedload(Evento.sala),
+            selectinload(Evento.inscricoes).joinedload(Inscricao.aluno)
+        )).filter(Evento.id == evento_id).first_or_404()
+    
     @staticmethod
     def listar_disponiveis(apenas_futuros=True):
         """Lista eventos disponíveis para inscrição"""
-        query = Evento.query.filter(Evento.status != 'cancelado')
+        query = Evento.consulta_listagem().filter(Evento.status != 'cancelado')
         
         if apenas_futuros:
-            agora = datetime.now(timezone.utc) 
+            # data_hora é gravada como horário local sem fuso (ver formulários
+            # de reserva), então a comparação usa o mesmo referencial
+            agora = datetime.now()
             query = query.filter(
                 or_(
                         Evento.data_hora == None,
@@ -156,4 +297,12 @@ class Evento(db.Model):
                 )
             )
         
-        return query.order_by(Evento.data_hora.asc().nullsfirst()).all()
\ No newline at end of file
+        return query.order_by(Evento.data_hora.asc().nullsfirst()).all()
+
+
+# A constraint de exclusão compara sala_id (inteiro) com "=" em um índice GiST
+event.listen(
+    Evento.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS btree_gist').execute_if(dialect='postgresql')
+)
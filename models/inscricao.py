@@ -4,6 +4,9 @@ Representa a relação entre alunos e eventos
 """
 from extensions import db
 from datetime import datetime
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import joinedload
+from utils.db import carregamento, trava_evento
 
 
 class Inscricao(db.Model):
@@ -27,6 +30,9 @@ class Inscricao(db.Model):
     # Constraint de unicidade: um aluno não pode se inscrever duas vezes no mesmo evento
     __table_args__ = (
         db.UniqueConstraint('aluno_id', 'evento_id', name='_aluno_evento_uc'),
+        # Marcas d'água da agregação dos resumos de presença
+        db.Index('ix_inscricao_inscrito_em', 'inscrito_em'),
+        db.Index('ix_inscricao_presenca_confirmada_em', 'presenca_confirmada_em'),
     )
     
     # Status possíveis
@@ -37,12 +43,100 @@ class Inscricao(db.Model):
     def __repr__(self):
         return f'<Inscricao Aluno:{self.aluno_id} Evento:{self.evento_id} Status:{self.status_presenca}>'
     
+    @staticmethod
+    def versao_dados(evento_id=None):
+        """
+        Muda a cada inscrição, cancelamento, check-in ou ausência marcada (ETag
+        das listagens). As ausências são gravadas em UPDATE em massa, sem
+        carimbo de data: entram pela contagem por status.
+        """
+        consulta = db.select(
+            func.count(Inscricao.id), func.max(Inscricao.id),
+            func.max(Inscricao.inscrito_em), func.max(Inscricao.presenca_confirmada_em),
+            func.sum(case((Inscricao.status_presenca == Inscricao.STATUS_AUSENTE, 1), else_=0))
+        )
+        if evento_id is not None:
+            consulta = consulta.where(Inscricao.evento_id == evento_id)
+        return tuple(db.session.execute(consulta).one())
+    
+    @staticmethod
+    def inscrever(aluno_id, evento):
+        """
+        Inscreve o aluno se houver vaga; com o evento lotado, coloca o aluno
+        no fim da lista de espera. Vagas livres com fila formada (capacidade
+        aumentada, inscrição removida sem passar por cancelar) vão primeiro
+        para a fila.
+        Contagem e gravação sob trava_evento: cliques simultâneos não
+        ultrapassam a capacidade da sala.
+        Retorna (inscrito: bool, posicao_na_fila ou None)
+        """
+        from models.lista_espera import ListaEspera
+        
+        with trava_evento(evento.id):
+            capacidade = evento.sala.capacidade
+            if aluno_id in ListaEspera.promover(evento.id, capacidade):
+                db.session.commit()
+                return True, None
+            
+            if Inscricao.contar_inscritos(evento.id) < capacidade:
+                db.session.add(Inscricao(
+                    aluno_id=aluno_id,
+                    evento_id=evento.id,
+                    status_presenca=Inscricao.STATUS_AGUARDANDO
+                ))
+                db.session.commit()
+                return True, None
+            
+            posicao = ListaEspera.entrar(aluno_id, evento.id)
+            db.session.commit()
+            return False, posicao
+    
+    def cancelar(self):
+        """
+        Remove a inscrição e, se o evento ainda não começou, promove o
+        primeiro da lista de espera — tudo na mesma transação.
+        Retorna os ids dos alunos promovidos
+        """
+        from models.lista_espera import ListaEspera
+        from models.resumo_presenca import ResumoEvento
+        
+        evento = self.evento
+        with trava_evento(evento.id):
+            db.session.delete(self)
+            db.session.flush()
+            ResumoEvento.marcar_desatualizado(evento.id)
+            promovidos = [] if evento.ja_iniciou() else ListaEspera.promover(evento.id, evento.sala.capacidade)
+            db.session.commit()
+        return promovidos
+    
     def confirmar_presenca(self):
         """Marca a presença como confirmada"""
         self.status_presenca = self.STATUS_PRESENTE
         self.presenca_confirmada_em = datetime.utcnow()
         db.session.commit()
     
+    @staticmethod
+    def sql_confirmar_presenca(aluno_id, evento_id):
+        """
+        UPDATE atômico de confirmação de presença (check-in em um único comando).
+        Só afeta inscrições ainda não confirmadas: rowcount 0 significa
+        inscrição inexistente ou presença já confirmada.
+        Pode ser executado tanto na sessão síncrona quanto na assíncrona.
+        """
+        return (
+            update(Inscricao)
+            .where(
+                Inscricao.aluno_id == aluno_id,
+                Inscricao.evento_id == evento_id,
+                Inscricao.status_presenca != Inscricao.STATUS_PRESENTE
+            )
+            .values(
+                status_presenca=Inscricao.STATUS_PRESENTE,
+                presenca_confirmada_em=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
     def marcar_ausente(self):
         """Marca como ausente"""
         self.status_presenca = self.STATUS_AUSENTE
@@ -74,12 +168,21 @@ class Inscricao(db.Model):
             status_presenca=Inscricao.STATUS_PRESENTE
         ).count()
     
+    @staticmethod
+    def eventos_do_aluno(aluno_id):
+        """Ids dos eventos em que o aluno está inscrito (uma consulta para a listagem toda)"""
+        return set(db.session.scalars(
+            select(Inscricao.evento_id).where(Inscricao.aluno_id == aluno_id)
+        ))
+    
     @staticmethod
     def listar_por_aluno(aluno_id, apenas_futuros=False):
-        """Lista todas as inscrições de um aluno"""
+        """Lista todas as inscrições de um aluno, já com evento e sala"""
         from models.evento import Evento
         
-        query = Inscricao.query.filter_by(aluno_id=aluno_id)
+        query = Inscricao.query.options(*carregamento(
+            joinedload(Inscricao.evento).joinedload(Evento.sala)
+        )).filter_by(aluno_id=aluno_id)
         
         if apenas_futuros:
             query = query.join(Evento).filter(Evento.data_hora >= datetime.now())
@@ -88,5 +191,15 @@ class Inscricao(db.Model):
     
     @staticmethod
     def listar_por_evento(evento_id):
-        """Lista todas as inscrições de um evento"""
-        return Inscricao.query.filter_by(evento_id=evento_id).all()
\ No newline at end of file
+        """Lista todas as inscrições de um evento, já com os alunos"""
+        return Inscricao.query.options(*carregamento(
+            joinedload(Inscricao.aluno)
+        )).filter_by(evento_id=evento_id).all()
+    
+    @staticmethod
+    def listar_recentes(limite=5):
+        """Últimas inscrições, com aluno e evento (dashboard)"""
+        return Inscricao.query.options(*carregamento(
+            joinedload(Inscricao.aluno),
+            joinedload(Inscricao.evento)
+        )).order_by(Inscricao.inscrito_em.desc()).limit(limite).all()
\ No newline at end of file
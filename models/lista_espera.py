@@ -0,0 +1,142 @@
+"""
+Model: Lista de Espera
+Fila FIFO de alunos aguardando vaga em um evento lotado
+"""
+from extensions import db
+from datetime import datetime
+from sqlalchemy import func, or_, select
+from utils.db import trava_evento
+
+
+class ListaEspera(db.Model):
+    """
+    Model para a lista de espera dos eventos
+    A ordem da fila é o próprio id (autoincremento)
+    """
+    __tablename__ = 'lista_espera'
+    
+    # Campos principais
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Relacionamentos
+    aluno_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    evento_id = db.Column(db.Integer, db.ForeignKey('evento.id'), nullable=False)
+    
+    # Metadados
+    entrou_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('aluno_id', 'evento_id', name='_espera_aluno_evento_uc'),
+        db.Index('ix_lista_espera_evento_fila', 'evento_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<ListaEspera Aluno:{self.aluno_id} Evento:{self.evento_id}>'
+    
+    @staticmethod
+    def entrar(aluno_id, evento_id):
+        """
+        Coloca o aluno no fim da fila (sem commit; chamar sob trava_evento)
+        Retorna a posição na fila
+        """
+        if ListaEspera.posicao(aluno_id, evento_id) is None:
+            db.session.add(ListaEspera(aluno_id=aluno_id, evento_id=evento_id))
+            db.session.flush()
+        return ListaEspera.posicao(aluno_id, evento_id)
+    
+    @staticmethod
+    def sair(aluno_id, evento_id):
+        """
+        Remove o aluno da fila (sem commit; chamar sob trava_evento)
+        Retorna True se ele estava na fila
+        """
+        removidos = ListaEspera.query.filter_by(aluno_id=aluno_id, evento_id=evento_id).delete()
+        return removidos > 0
+    
+    @staticmethod
+    def posicao(aluno_id, evento_id):
+        """Posição do aluno na fila (1 = próximo), ou None se não estiver nela"""
+        meu_id = db.session.scalar(
+            select(ListaEspera.id).where(
+                ListaEspera.aluno_id == aluno_id,
+                ListaEspera.evento_id == evento_id
+            )
+        )
+        if meu_id is None:
+            return None
+        
+        return db.session.scalar(
+            select(func.count()).where(
+                ListaEspera.evento_id == evento_id,
+                ListaEspera.id <= meu_id
+            )
+        )
+    
+    @staticmethod
+    def tamanho(evento_id):
+        """Quantos alunos aguardam vaga no evento"""
+        return db.session.scalar(
+            select(func.count()).where(ListaEspera.evento_id == evento_id)
+        )
+    
+    @staticmethod
+    def eventos_do_aluno(aluno_id):
+        """Ids dos eventos em cuja fila o aluno está"""
+        return set(db.session.scalars(
+            select(ListaEspera.evento_id).where(ListaEspera.aluno_id == aluno_id)
+        ))
+    
+    @staticmethod
+    def promover(evento_id, capacidade):
+        """
+        Preenche as vagas abertas com os primeiros da fila: cria as inscrições
+        e remove os promovidos da fila, na mesma transação.
+        Sem commit; chamar sob trava_evento.
+        Retorna os ids dos alunos promovidos
+        """
+        from models.inscricao import Inscricao
+        
+        vagas = capacidade - Inscricao.contar_inscritos(evento_id)
+        if vagas <= 0:
+            return []
+        
+        fila = ListaEspera.query.filter_by(evento_id=evento_id).order_by(ListaEspera.id).limit(vagas).all()
+        for item in fila:
+            db.session.add(Inscricao(
+                aluno_id=item.aluno_id,
+                evento_id=evento_id,
+                status_presenca=Inscricao.STATUS_AGUARDANDO
+            ))
+            db.session.delete(item)
+        
+        return [item.aluno_id for item in fila]
+    
+    @staticmethod
+    def preencher_vagas_da_sala(sala_id):
+        """
+        Depois de uma mudança de capacidade da sala: promove a fila de cada
+        evento ainda não iniciado da sala, um evento por vez sob trava_evento
+        (com commit). Retorna {evento_id: [ids dos alunos promovidos]}
+        """
+        from models.evento import Evento
+        from models.sala import Sala
+        
+        eventos = db.session.scalars(
+            select(ListaEspera.evento_id.distinct())
+            .join(Evento, Evento.id == ListaEspera.evento_id)
+            .where(
+                Evento.sala_id == sala_id,
+                Evento.status != 'cancelado',
+                or_(Evento.data_hora.is_(None), Evento.data_hora > datetime.now())
+            )
+        ).all()
+        
+        promovidos = {}
+        for evento_id in eventos:
+            with trava_evento(evento_id):
+                alunos = ListaEspera.promover(evento_id, db.session.get(Sala, sala_id).capacidade)
+                db.session.commit()
+            if alunos:
+                promovidos[evento_id] = alunos
+        return promovidos
+
@@ -4,6 +4,86 @@ Gerencia CPFs autorizados para cadastro de organizadores
 """
 from extensions import db
 from datetime import datetime
+from collections import defaultdict
+import threading
+import time
+from flask import current_app
+from sqlalchemy import case, func, select
+from utils.cpf import CPF
+
+
+class CacheCpfsAutorizados:
+    """
+    CPFs ativos e ainda não usados, por role, em memória (um por app/processo).
+    Acertos e erros saem do conjunto, sem consulta por CPF. Mudanças feitas
+    por outros workers são percebidas pela versão da tabela
+    (PreAuthorizedUser.versao_dados), conferida no máximo a cada
+    `intervalo_versao_segundos`; se mudou, o conjunto é recarregado. A
+    recarga completa a cada `validade_segundos` cobre o resto. As operações
+    feitas neste processo ajustam o conjunto na hora.
+    """
+    
+    def __init__(self, validade_segundos, intervalo_versao_segundos):
+        self.validade_segundos = validade_segundos
+        self.intervalo_versao_segundos = intervalo_versao_segundos
+        self._cpfs = {}
+        self._versao = None
+        self._carregado_em = None
+        self._conferido_em = None
+        self._trava = threading.Lock()
+    
+    def _vencido(self, agora):
+        return self._carregado_em is None or agora - self._carregado_em > self.validade_segundos
+    
+    def _conferir(self, agora):
+        return agora - self._conferido_em > self.intervalo_versao_segundos
+    
+    def _recarregar(self, agora):
+        # Versão lida antes das linhas: uma mudança entre as duas consultas
+        # só provoca mais uma recarga na próxima conferência
+        versao = PreAuthorizedUser.versao_dados()
+        linhas = db.session.execute(
+            select(PreAuthorizedUser.role, PreAuthorizedUser.cpf)
+            .where(PreAuthorizedUser.ativo == True, PreAuthorizedUser.usado == False)
+        ).all()
+        cpfs = defaultdict(set)
+        for role, cpf in linhas:
+            cpfs[role].add(cpf)
+        self._cpfs = cpfs
+        self._versao = versao
+        self._carregado_em = self._conferido_em = agora
+    
+    def _atualizar(self):
+        agora = time.monotonic()
+        if not self._vencido(agora) and not self._conferir(agora):
+            return
+        with self._trava:
+            if self._vencido(agora):
+                self._recarregar(agora)
+            elif self._conferir(agora):
+                if PreAuthorizedUser.versao_dados() != self._versao:
+                    self._recarregar(agora)
+                else:
+                    self._conferido_em = agora
+    
+    def contem(self, cpf, role):
+        """True se o CPF está autorizado (segundo o conjunto em memória)"""
+        self._atualizar()
+        return cpf in self._cpfs.get(role, ())
+    
+    def adicionar(self, cpf, role):
+        with self._trava:
+            if self._carregado_em is not None:
+                self._cpfs.setdefault(role, set()).add(cpf)
+    
+    def remover(self, cpf, role):
+        with self._trava:
+            self._cpfs.get(role, set()).discard(cpf)
+    
+    def invalidar(self):
+        """Força a recarga na próxima consulta"""
+        with self._trava:
+            self._carregado_em = None
 
 
 class PreAuthorizedUser(db.Model):
@@ -14,7 +94,7 @@ class PreAuthorizedUser(db.Model):
     
     # Campos principais
     id = db.Column(db.Integer, primary_key=True)
-    cpf = db.Column(db.String(11), unique=True, nullable=False, index=True)
+    cpf = db.Column(CPF, unique=True, nullable=False, index=True)
     role = db.Column(db.String(20), nullable=False, default='organizador')
     ativo = db.Column(db.Boolean, default=True)
     usado = db.Column(db.Boolean, default=False)
@@ -28,27 +108,68 @@ class PreAuthorizedUser(db.Model):
         status = "Usado" if self.usado else "Disponível"
         return f'<PreAuth CPF:{self.cpf} Role:{self.role} {status}>'
     
+    @staticmethod
+    def cache():
+        """Conjunto em memória dos CPFs autorizados deste app"""
+        extensoes = current_app.extensions
+        if 'cpfs_autorizados' not in extensoes:
+            extensoes['cpfs_autorizados'] = CacheCpfsAutorizados(
+                current_app.config.get('CPFS_AUTORIZADOS_CACHE_SEGUNDOS', 60),
+                current_app.config.get('CPFS_AUTORIZADOS_VERSAO_SEGUNDOS', 1)
+            )
+        return extensoes['cpfs_autorizados']
+    
+    @staticmethod
+    def versao_dados():
+        """
+        Muda a cada autorização criada, usada, desativada ou reativada. A soma
+        dos ids ativos pega a troca (desativar um, reativar outro) que a
+        contagem sozinha não veria; `usado` nunca volta a False
+        """
+        return tuple(db.session.execute(
+            select(
+                func.count(PreAuthorizedUser.id), func.max(PreAuthorizedUser.id),
+                func.sum(case((PreAuthorizedUser.ativo == True, PreAuthorizedUser.id), else_=0)),
+                func.sum(case((PreAuthorizedUser.usado == True, 1), else_=0))
+            )
+        ).one())
+    
     def marcar_como_usado(self):
         """Marca o CPF como já utilizado"""
         self.usado = True
         self.usado_em = datetime.utcnow()
         db.session.commit()
+        PreAuthorizedUser.cache().remover(self.cpf, self.role)
     
     def desativar(self):
         """Desativa o CPF autorizado"""
         self.ativo = False
         db.session.commit()
+        PreAuthorizedUser.cache().remover(self.cpf, self.role)
     
     def reativar(self):
         """Reativa o CPF autorizado"""
         self.ativo = True
         db.session.commit()
+        if not self.usado:
+            PreAuthorizedUser.cache().adicionar(self.cpf, self.role)
+    
+    @staticmethod
+    def esta_autorizado(cpf, role='organizador'):
+        """
+        Verificação rápida (ex.: validação do formulário via AJAX), pelo
+        conjunto em memória. Uma mudança feita por outro processo aparece
+        aqui em até CPFS_AUTORIZADOS_VERSAO_SEGUNDOS; o cadastro confere no
+        banco (cpf_autorizado)
+        """
+        return PreAuthorizedUser.cache().contem(cpf, role)
     
     @staticmethod
     def cpf_autorizado(cpf, role='organizador'):
         """
         Verifica se um CPF está autorizado para cadastro
         Retorna o objeto PreAuthorizedUser se válido, None caso contrário
+        (sempre pelo banco, no índice de cpf)
         """
         pre_auth = PreAuthorizedUser.query.filter_by(
             cpf=cpf,
@@ -57,6 +178,8 @@ class PreAuthorizedUser(db.Model):
             usado=False
         ).first()
         
+        if pre_auth is not None:
+            PreAuthorizedUser.cache().adicionar(cpf, role)
         return pre_auth
     
     @staticmethod
@@ -88,6 +211,7 @@ class PreAuthorizedUser(db.Model):
         
         db.session.add(pre_auth)
         db.session.commit()
+        PreAuthorizedUser.cache().adicionar(cpf, role)
         
         return pre_auth, "Autorização criada com sucesso"
     
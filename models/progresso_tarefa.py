@@ -0,0 +1,40 @@
+"""
+Model: Progresso de Tarefa
+Marca d'água das tarefas em lote, para retomarem de onde pararam
+"""
+from extensions import db
+from datetime import datetime
+
+
+class ProgressoTarefa(db.Model):
+    """
+    Último ponto processado por uma tarefa periódica (uma linha por tarefa)
+    """
+    __tablename__ = 'progresso_tarefa'
+    
+    # Campos principais
+    nome = db.Column(db.String(50), primary_key=True)
+    marca_data = db.Column(db.DateTime, nullable=True)
+    marca_id = db.Column(db.Integer, nullable=True)
+    processados = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Metadados
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ProgressoTarefa {self.nome} até {self.marca_data} #{self.marca_id}>'
+    
+    @staticmethod
+    def obter(nome):
+        """Retorna o progresso da tarefa, criando a linha na primeira execução (sem commit)"""
+        progresso = db.session.get(ProgressoTarefa, nome)
+        if progresso is None:
+            progresso = ProgressoTarefa(nome=nome, processados=0)
+            db.session.add(progresso)
+        return progresso
+    
+    def avancar(self, marca_data, marca_id, quantidade):
+        """Move a marca d'água (sem commit: grava junto com o lote processado)"""
+        self.marca_data = marca_data
+        self.marca_id = marca_id
+        self.processados = (self.processados or 0) + quantidade
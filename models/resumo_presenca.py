@@ -0,0 +1,100 @@
+"""
+Model: Resumos de Presença
+Totais pré-agregados de inscrições, presenças e ausências (por evento,
+organizador, sala e dia), mantidos por utils/resumos.py.
+Os relatórios do admin leem só estas tabelas.
+"""
+from extensions import db
+from datetime import datetime
+from sqlalchemy import update
+
+
+class TotaisPresenca:
+    """
+    Colunas comuns a todos os resumos
+    Ausências só contam em eventos encerrados (inscritos que não fizeram check-in)
+    """
+    eventos = db.Column(db.Integer, default=0, nullable=False)
+    inscricoes = db.Column(db.Integer, default=0, nullable=False)
+    presencas = db.Column(db.Integer, default=0, nullable=False)
+    ausencias = db.Column(db.Integer, default=0, nullable=False)
+
+    CAMPOS = ('eventos', 'inscricoes', 'presencas', 'ausencias')
+
+    @property
+    def taxa_ausencia(self):
+        """Percentual de ausências entre os inscritos que já tiveram evento"""
+        base = self.presencas + self.ausencias
+        return round(100 * self.ausencias / base, 1) if base else None
+
+    def somar(self, delta):
+        """Aplica a variação {campo: valor} aos totais"""
+        for campo in self.CAMPOS:
+            setattr(self, campo, (getattr(self, campo) or 0) + delta.get(campo, 0))
+
+
+class ResumoEvento(TotaisPresenca, db.Model):
+    """
+    Totais de um evento, com as chaves (organizador, sala, dia) usadas na
+    última agregação: é por elas que a variação é repassada aos demais resumos
+    """
+    __tablename__ = 'resumo_presenca_evento'
+
+    # Campos principais
+    evento_id = db.Column(db.Integer, primary_key=True)
+    organizador_id = db.Column(db.Integer, nullable=False)
+    sala_id = db.Column(db.Integer, nullable=False)
+    dia = db.Column(db.Date, nullable=True)
+
+    # Controle da agregação
+    encerrado = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    desatualizado = db.Column(db.Boolean, default=False, nullable=False, index=True)
+
+    # Metadados
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumoEvento {self.evento_id}: {self.presencas}/{self.inscricoes}>'
+
+    @staticmethod
+    def marcar_desatualizado(evento_id):
+        """
+        Pede o recálculo do evento na próxima agregação (sem commit).
+        Usado quando uma inscrição é apagada e não sobra data para a marca d'água
+        """
+        db.session.execute(
+            update(ResumoEvento)
+            .where(ResumoEvento.evento_id == evento_id)
+            .values(desatualizado=True)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class ResumoOrganizador(TotaisPresenca, db.Model):
+    """Totais por organizador"""
+    __tablename__ = 'resumo_presenca_organizador'
+
+    organizador_id = db.Column(db.Integer, primary_key=True)
+
+    def __repr__(self):
+        return f'<ResumoOrganizador {self.organizador_id}: {self.presencas}/{self.inscricoes}>'
+
+
+class ResumoSala(TotaisPresenca, db.Model):
+    """Totais por sala"""
+    __tablename__ = 'resumo_presenca_sala'
+
+    sala_id = db.Column(db.Integer, primary_key=True)
+
+    def __repr__(self):
+        return f'<ResumoSala {self.sala_id}: {self.presencas}/{self.inscricoes}>'
+
+
+class ResumoDia(TotaisPresenca, db.Model):
+    """Totais por dia do evento"""
+    __tablename__ = 'resumo_presenca_dia'
+
+    dia = db.Column(db.Date, primary_key=True)
+
+    def __repr__(self):
+        return f'<ResumoDia {self.dia}: {self.presencas}/{self.inscricoes}>'
@@ -3,7 +3,12 @@ Model: Sala
 Representa as salas/locais disponíveis para eventos
 """
 from extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import defaultdict
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from utils.db import carregamento, segundos_epoch
+from utils.intervalos import mesclar, janelas_diarias, distribuir
 
 
 class Sala(db.Model):
@@ -29,46 +34,238 @@ class Sala(db.Model):
     def __repr__(self):
         return f'<Sala {self.nome} (Cap: {self.capacidade})>'
     
+    @staticmethod
+    def versao_dados():
+        """Muda a cada sala criada, editada ou removida (ETag das listagens)"""
+        return tuple(db.session.execute(
+            select(func.count(Sala.id), func.max(Sala.id), func.max(Sala.atualizado_em))
+        ).one())
+    
+    @staticmethod
+    def consulta_com_eventos():
+        """Salas com os eventos carregados em uma consulta só (contagem de reservas nas listagens)"""
+        return Sala.query.options(*carregamento(selectinload(Sala.eventos)))
+    
     def tem_capacidade_para(self, num_pessoas):
         """Verifica se a sala comporta o número de pessoas"""
         return self.capacidade >= num_pessoas
     
-    def esta_disponivel_em(self, data_hora, duracao_horas):
+    def esta_disponivel_em(self, data_hora, duracao_horas, ignorar_evento_id=None):
         """
         Verifica se a sala está disponível no horário solicitado
+        (ignorar_evento_id: o próprio evento, ao remarcar)
+        Para reservar sem corrida, chame dentro de utils.db.trava_sala
         Retorna: (disponivel: bool, evento_conflitante: Evento ou None)
         """
         from models.evento import Evento
-        from datetime import timedelta
         
         fim_solicitado = data_hora + timedelta(hours=duracao_horas)
         
-        # Buscar eventos da sala que possam conflitar
-        eventos = Evento.query.filter_by(sala_id=self.id).all()
+        # Sobreposição: novo_inicio < evento_fim AND evento_inicio < novo_fim
+        query = Evento.query.filter(
+            Evento.sala_id == self.id,
+            Evento.data_hora.isnot(None),
+            Evento.duracao_horas.isnot(None),
+            Evento.data_hora < fim_solicitado,
+            Evento.data_hora_fim > data_hora
+        )
+        if ignorar_evento_id:
+            query = query.filter(Evento.id != ignorar_evento_id)
+        
+        evento = query.order_by(Evento.data_hora).first()
         
-        for evento in eventos:
-            evento_fim = evento.data_hora + timedelta(hours=evento.duracao_horas)
-            
-            # Verifica sobreposição: novo_inicio < evento_fim AND evento_inicio < novo_fim
-            if data_hora < evento_fim and evento.data_hora < fim_solicitado:
-                return False, evento
+        if evento:
+            return False, evento
         
         return True, None
     
+    @staticmethod
+    def reservas_por_sala(sala_ids, inicio, fim):
+        """
+        Índice de intervalos: todas as reservas que tocam [inicio, fim)
+        nas salas informadas, em uma única consulta.
+        Retorna {sala_id: [(inicio, fim, {'id', 'nome'}), ...]} ordenado por início.
+        """
+        from models.evento import Evento
+        
+        reservas = db.session.execute(
+            select(Evento.sala_id, Evento.id, Evento.nome_evento, Evento.data_hora, Evento.duracao_horas)
+            .where(
+                Evento.sala_id.in_(sala_ids),
+                Evento.data_hora.isnot(None),
+                Evento.duracao_horas.isnot(None),
+                Evento.data_hora < fim,
+                Evento.data_hora_fim > inicio
+            )
+            .order_by(Evento.sala_id, Evento.data_hora)
+        ).all()
+        
+        por_sala = defaultdict(list)
+        for sala_id, evento_id, nome_evento, data_hora, duracao_horas in reservas:
+            por_sala[sala_id].append((
+                data_hora,
+                data_hora + timedelta(hours=duracao_horas),
+                {'id': evento_id, 'nome': nome_evento}
+            ))
+        return por_sala
+    
     @staticmethod
     def listar_disponiveis(data_hora, duracao_horas, capacidade_minima=0):
         """
         Lista todas as salas disponíveis para um horário específico
+        (2 consultas no total, independente do número de salas)
+        """
+        salas = Sala.query.filter(
+            Sala.ativa == True,
+            Sala.capacidade >= capacidade_minima
+        ).order_by(Sala.capacidade, Sala.nome).all()
+        
+        fim = data_hora + timedelta(hours=duracao_horas)
+        ocupadas = Sala.reservas_por_sala([sala.id for sala in salas], data_hora, fim)
+        
+        return [sala for sala in salas if not ocupadas.get(sala.id)]
+    
+    @staticmethod
+    def grade_disponibilidade(data_inicio, data_fim, hora_abertura=7, hora_fechamento=22):
+        """
+        Grade livre/ocupado de todas as salas ativas, dia a dia, entre
+        data_inicio e data_fim (exclusivo), dentro do horário de funcionamento.
+        Uma única consulta por intervalo traz as reservas; a mesclagem é feita
+        por sweep-line em memória (utils/intervalos.py).
+        Retorna [{'sala': Sala, 'dias': [...]}, ...] na ordem de capacidade.
+        """
+        salas = Sala.query.filter_by(ativa=True).order_by(Sala.capacidade.desc(), Sala.nome).all()
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.min.time())
+        
+        por_sala = Sala.reservas_por_sala([sala.id for sala in salas], inicio, fim)
+        janelas = janelas_diarias(data_inicio, data_fim, hora_abertura, hora_fechamento)
+        
+        return [
+            {'sala': sala, 'dias': distribuir(mesclar(por_sala[sala.id]), janelas)}
+            for sala in salas
+        ]
+    
+    @staticmethod
+    def buscar_horarios_livres(capacidade_minima, duracao_horas, data_inicio, data_fim,
+                               hora_abertura=7, hora_fechamento=22, passo_minutos=30, limite=20):
+        """
+        Busca salas com capacidade >= capacidade_minima livres por duracao_horas
+        entre data_inicio e data_fim (exclusivo), dentro do horário de funcionamento.
+        Uma consulta para as salas, uma para as reservas; o resto é feito sobre
+        o índice de intervalos em memória.
+        Resultado ordenado pelo horário mais cedo e, em empate, pela menor sala que comporta.
+        Retorna [{'sala': Sala, 'inicio': datetime, 'fim': datetime}, ...]
         """
         salas = Sala.query.filter(
             Sala.ativa == True,
             Sala.capacidade >= capacidade_minima
         ).all()
         
-        salas_disponiveis = []
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.min.time())
+        agora = datetime.now()
+        duracao = timedelta(hours=duracao_horas)
+        passo = timedelta(minutes=passo_minutos)
+        
+        por_sala = Sala.reservas_por_sala([sala.id for sala in salas], inicio, fim)
+        janelas = janelas_diarias(data_inicio, data_fim, hora_abertura, hora_fechamento)
+        
+        candidatos = []
         for sala in salas:
-            disponivel, _ = sala.esta_disponivel_em(data_hora, duracao_horas)
-            if disponivel:
-                salas_disponiveis.append(sala)
+            for dia in distribuir(mesclar(por_sala[sala.id]), janelas):
+                for livre_ini, livre_fim in dia['livre']:
+                    # Primeiro horário "redondo" da lacuna, nunca no passado
+                    ini = max(livre_ini, agora)
+                    resto = (ini - datetime.min) % passo
+                    if resto:
+                        ini += passo - resto
+                    if ini + duracao <= livre_fim:
+                        candidatos.append((ini, sala.capacidade, sala.nome, sala))
+        
+        candidatos.sort(key=lambda c: c[:3])
+        return [
+            {'sala': sala, 'inicio': ini, 'fim': ini + duracao}
+            for ini, _, _, sala in candidatos[:limite]
+        ]
+    
+    @staticmethod
+    def relatorio_ocupacao(data_inicio, data_fim, hora_abertura=7, hora_fechamento=22):
+        """
+        Utilização de cada sala entre data_inicio e data_fim (exclusivo):
+        horas reservadas x horas disponíveis (horário de funcionamento),
+        pico de ocupação e preenchimento médio em relação à capacidade.
+        Uma consulta traz os eventos com as datas já em segundos; as contas
+        são vetorizadas (utils/ocupacao.py), sem laço Python por evento.
+        Retorna [{'sala', 'eventos', 'horas_reservadas', 'horas_disponiveis',
+                  'utilizacao', 'pico_ocupacao', 'pico_percentual', 'preenchimento'}, ...]
+        """
+        import numpy as np
+        from models.evento import Evento
+        from models.inscricao import Inscricao
+        from utils import ocupacao
+        
+        salas = Sala.query.order_by(Sala.id).all()
+        if not salas:
+            return []
+        
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.min.time())
+        
+        # Inscritos por evento em uma passada agrupada (e não uma subconsulta por evento)
+        inscritos = (
+            select(Inscricao.evento_id, func.count().label('total'))
+            .group_by(Inscricao.evento_id)
+            .subquery()
+        )
+        inicio_segundos = segundos_epoch(Evento.data_hora)
+        linhas = db.session.execute(
+            select(
+                Evento.sala_id,
+                inicio_segundos,
+                inicio_segundos + Evento.duracao_horas * 3600,
+                func.coalesce(inscritos.c.total, 0)
+            )
+            .outerjoin(inscritos, inscritos.c.evento_id == Evento.id)
+            .where(
+                Evento.status != 'cancelado',
+                Evento.data_hora.isnot(None),
+                Evento.duracao_horas.isnot(None),
+                Evento.data_hora < fim,
+                Evento.data_hora_fim > inicio
+            )
+        ).all()
+        colunas = np.array([tuple(linha) for linha in linhas], dtype=np.float64).reshape(-1, 4).T
+        
+        ids = np.array([sala.id for sala in salas])
+        capacidades = np.array([sala.capacidade for sala in salas], dtype=np.float64)
+        indices = np.searchsorted(ids, colunas[0].astype(np.int64))
+        inicios, fins, validos = ocupacao.recortar(
+            colunas[1].astype(np.int64),
+            colunas[2].astype(np.int64),
+            ocupacao.para_segundos([inicio])[0],
+            ocupacao.para_segundos([fim])[0]
+        )
+        indices, inicios, fins = indices[validos], inicios[validos], fins[validos]
+        pessoas = colunas[3][validos]
+        
+        n = len(salas)
+        eventos = np.bincount(indices, minlength=n)
+        horas_reservadas = ocupacao.tempo_ocupado(indices, inicios, fins, n) / 3600
+        pico = ocupacao.pico_simultaneo(indices, inicios, fins, pessoas, n)
+        preenchimento = ocupacao.preenchimento_medio(indices, inicios, fins, pessoas, capacidades, n)
+        horas_disponiveis = (data_fim - data_inicio).days * (hora_fechamento - hora_abertura)
         
-        return salas_disponiveis
\ No newline at end of file
+        return [
+            {
+                'sala': sala,
+                'eventos': int(eventos[i]),
+                'horas_reservadas': round(float(horas_reservadas[i]), 1),
+                'horas_disponiveis': horas_disponiveis,
+                'utilizacao': round(100 * float(horas_reservadas[i]) / horas_disponiveis, 1) if horas_disponiveis else None,
+                'pico_ocupacao': int(pico[i]),
+                'pico_percentual': round(100 * float(pico[i]) / sala.capacidade, 1) if sala.capacidade else None,
+                'preenchimento': round(100 * float(preenchimento[i]), 1) if eventos[i] else None
+            }
+            for i, sala in enumerate(salas)
+        ]
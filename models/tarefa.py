@@ -0,0 +1,277 @@
+"""
+Model: Tarefa
+Fila de tarefas em segundo plano, usando o próprio banco como broker
+"""
+from extensions import db
+from datetime import datetime, timedelta
+import json
+from sqlalchemy import and_, func, or_, select, update
+from utils.db import transacao_escrita, trava_tipo_tarefa
+
+
+class Tarefa(db.Model):
+    """
+    Model para tarefas assíncronas executadas pelo worker (flask worker)
+    """
+    __tablename__ = 'tarefa'
+    
+    # Campos principais
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='pendente', nullable=False)
+    
+    # Controle de execução
+    tentativas = db.Column(db.Integer, default=0, nullable=False)
+    max_tentativas = db.Column(db.Integer, default=3, nullable=False)
+    disponivel_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    reservada_ate = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    
+    # Resultado
+    resultado = db.Column(db.Text, nullable=True)
+    erro = db.Column(db.Text, nullable=True)
+    
+    # Relacionamentos
+    criado_por_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)
+    
+    # Metadados
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciada_em = db.Column(db.DateTime, nullable=True)
+    concluida_em = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_tarefa_fila', 'status', 'disponivel_em'),
+        db.Index('ix_tarefa_tipo_status', 'tipo', 'status'),
+    )
+    
+    # Status possíveis
+    STATUS_PENDENTE = 'pendente'
+    STATUS_EXECUTANDO = 'executando'
+    STATUS_CONCLUIDA = 'concluida'
+    STATUS_FALHOU = 'falhou'
+    
+    def __repr__(self):
+        return f'<Tarefa #{self.id} {self.tipo} ({self.status})>'
+    
+    @property
+    def dados(self):
+        """Payload decodificado"""
+        return json.loads(self.payload) if self.payload else {}
+    
+    def to_dict(self):
+        """Situação da tarefa para a API de status"""
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'max_tentativas': self.max_tentativas,
+            'resultado': json.loads(self.resultado) if self.resultado else None,
+            'erro': self.erro,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'iniciada_em': self.iniciada_em.isoformat() if self.iniciada_em else None,
+            'concluida_em': self.concluida_em.isoformat() if self.concluida_em else None
+        }
+    
+    @staticmethod
+    def enfileirar(tipo, dados=None, max_tentativas=3, atraso_segundos=0, criado_por_id=None):
+        """Cria uma tarefa pendente e retorna a instância (com commit)"""
+        tarefa = Tarefa(
+            tipo=tipo,
+            payload=json.dumps(dados or {}),
+            max_tentativas=max_tentativas,
+            disponivel_em=datetime.utcnow() + timedelta(seconds=atraso_segundos),
+            criado_por_id=criado_por_id
+        )
+        with transacao_escrita():
+            db.session.add(tarefa)
+            db.session.commit()
+        return tarefa
+    
+    @staticmethod
+    def _disponivel(agora):
+        """
+        Pendente e liberada, ou em execução com a reserva (visibility timeout)
+        vencida e tentativas sobrando
+        """
+        return or_(
+            and_(Tarefa.status == Tarefa.STATUS_PENDENTE, Tarefa.disponivel_em <= agora),
+            and_(
+                Tarefa.status == Tarefa.STATUS_EXECUTANDO,
+                Tarefa.reservada_ate < agora,
+                Tarefa.tentativas < Tarefa.max_tentativas
+            )
+        )
+    
+    @staticmethod
+    def _reserva_esgotada(agora):
+        """Em execução com a reserva vencida e sem tentativas sobrando"""
+        return and_(
+            Tarefa.status == Tarefa.STATUS_EXECUTANDO,
+            Tarefa.reservada_ate < agora,
+            Tarefa.tentativas >= Tarefa.max_tentativas
+        )
+    
+    @staticmethod
+    def encerrar_esgotadas(tipos, agora=None):
+        """
+        Marca como falhou as tarefas dos tipos informados cuja última tentativa
+        perdeu a reserva (o worker morreu ou estourou o timeout).
+        Retorna quantas foram encerradas
+        """
+        agora = agora or datetime.utcnow()
+        
+        # Consulta antes de gravar: no caso comum não há nenhuma e a trava
+        # de escrita não é pedida a cada volta do worker
+        existe = db.session.execute(
+            select(Tarefa.id).where(Tarefa.tipo.in_(tipos), Tarefa._reserva_esgotada(agora)).limit(1)
+        ).first()
+        if existe is None:
+            return 0
+        
+        with transacao_escrita():
+            resultado = db.session.execute(
+                update(Tarefa)
+                .where(Tarefa.tipo.in_(tipos), Tarefa._reserva_esgotada(agora))
+                .values(
+                    status=Tarefa.STATUS_FALHOU,
+                    erro='Reserva expirada na última tentativa',
+                    reservada_ate=None,
+                    concluida_em=agora
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        return resultado.rowcount
+    
+    @staticmethod
+    def reservar(tipos, worker):
+        """
+        Reserva a próxima tarefa disponível de um dos tipos informados
+        ({tipo: (máximo de execuções simultâneas, timeout em segundos)}).
+        A reserva é um UPDATE condicional, sob a trava do tipo
+        (utils.db.trava_tipo_tarefa): se outro worker pegar a mesma
+        tarefa antes (ou o tipo atingir o limite), rowcount é 0 e
+        tenta-se a próxima candidata.
+        A tarefa retornada guarda a reserva (worker, tentativa), conferida
+        por concluir/registrar_falha.
+        Retorna a Tarefa reservada ou None
+        """
+        agora = datetime.utcnow()
+        Tarefa.encerrar_esgotadas(list(tipos), agora)
+        
+        em_execucao = dict(db.session.execute(
+            select(Tarefa.tipo, func.count())
+            .where(
+                Tarefa.tipo.in_(tipos),
+                Tarefa.status == Tarefa.STATUS_EXECUTANDO,
+                Tarefa.reservada_ate >= agora
+            )
+            .group_by(Tarefa.tipo)
+        ).all())
+        com_vaga = [tipo for tipo, (limite, _) in tipos.items() if em_execucao.get(tipo, 0) < limite]
+        if not com_vaga:
+            return None
+        
+        candidatas = db.session.execute(
+            select(Tarefa.id, Tarefa.tipo)
+            .where(Tarefa.tipo.in_(com_vaga), Tarefa._disponivel(agora))
+            .order_by(Tarefa.disponivel_em, Tarefa.id)
+            .limit(5)
+        ).all()
+        
+        for tarefa_id, tipo in candidatas:
+            limite, timeout_segundos = tipos[tipo]
+            # A contagem acima é só um filtro. O limite vale pela contagem
+            # dentro do UPDATE, feita com a trava do tipo: sem ela, no READ
+            # COMMITTED do PostgreSQL dois workers reservando tarefas
+            # diferentes do mesmo tipo contariam antes de qualquer commit
+            em_execucao_agora = (
+                select(func.count())
+                .where(
+                    Tarefa.tipo == tipo,
+                    Tarefa.status == Tarefa.STATUS_EXECUTANDO,
+                    Tarefa.reservada_ate >= agora
+                )
+                .scalar_subquery()
+            )
+            with trava_tipo_tarefa(tipo):
+                resultado = db.session.execute(
+                    update(Tarefa)
+                    .where(Tarefa.id == tarefa_id, Tarefa._disponivel(agora), em_execucao_agora < limite)
+                    .values(
+                        status=Tarefa.STATUS_EXECUTANDO,
+                        tentativas=Tarefa.tentativas + 1,
+                        reservada_ate=agora + timedelta(seconds=timeout_segundos),
+                        worker=worker,
+                        iniciada_em=agora
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+            if resultado.rowcount:
+                tarefa = db.session.get(Tarefa, tarefa_id)
+                tarefa._reserva = (worker, tarefa.tentativas)
+                return tarefa
+        
+        return None
+    
+    def _atualizar_reserva(self, **valores):
+        """
+        UPDATE só se a reserva ainda for deste worker e desta tentativa:
+        se ela venceu e outro worker assumiu a tarefa, nada é gravado.
+        Retorna True se gravou (com commit)
+        """
+        worker, tentativa = self._reserva
+        resultado = db.session.execute(
+            update(Tarefa)
+            .where(
+                Tarefa.id == self.id,
+                Tarefa.status == Tarefa.STATUS_EXECUTANDO,
+                Tarefa.worker == worker,
+                Tarefa.tentativas == tentativa
+            )
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return resultado.rowcount == 1
+    
+    @transacao_escrita()
+    def concluir(self, resultado=None):
+        """
+        Marca a tarefa como concluída (com commit).
+        Retorna False se a reserva foi perdida
+        """
+        return self._atualizar_reserva(
+            status=self.STATUS_CONCLUIDA,
+            resultado=json.dumps(resultado) if resultado is not None else None,
+            erro=None,
+            reservada_ate=None,
+            concluida_em=datetime.utcnow()
+        )
+    
+    @transacao_escrita()
+    def registrar_falha(self, erro, espera_base_segundos=30):
+        """
+        Registra o erro; volta para a fila com backoff exponencial
+        ou falha de vez ao esgotar as tentativas (com commit).
+        Retorna False se a reserva foi perdida
+        """
+        _, tentativa = self._reserva
+        if tentativa >= self.max_tentativas:
+            return self._atualizar_reserva(
+                status=self.STATUS_FALHOU,
+                erro=erro,
+                reservada_ate=None,
+                concluida_em=datetime.utcnow()
+            )
+        return self._atualizar_reserva(
+            status=self.STATUS_PENDENTE,
+            erro=erro,
+            reservada_ate=None,
+            disponivel_em=datetime.utcnow() + timedelta(
+                seconds=espera_base_segundos * 2 ** (tentativa - 1)
+            )
+        )
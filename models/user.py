@@ -6,6 +6,9 @@ from extensions import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from sqlalchemy import func
+from utils import cpf as cpf_util
+from utils.cpf import CPF
 
 
 class Usuario(UserMixin, db.Model):
@@ -18,7 +21,7 @@ class Usuario(UserMixin, db.Model):
     # Campos principais
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
-    cpf = db.Column(db.String(11), unique=True, nullable=False, index=True)
+    cpf = db.Column(CPF, nullable=False)
     senha = db.Column(db.String(200), nullable=False)
     tipo = db.Column(db.String(20), nullable=False, default='aluno')
     
@@ -27,6 +30,12 @@ class Usuario(UserMixin, db.Model):
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
     atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Índice único do CPF; no PostgreSQL ele também cobre a consulta do login
+    # (utils/autenticacao.py), que lê id, hash, ativo e tipo sem ir à tabela
+    __table_args__ = (
+        db.Index('ix_usuario_cpf', 'cpf', unique=True, postgresql_include=['id', 'ativo', 'tipo', 'senha']),
+    )
+    
     # Relacionamentos
     eventos_criados = db.relationship('Evento', backref='organizador', lazy=True, foreign_keys='Evento.organizador_id')
     inscricoes = db.relationship('Inscricao', backref='aluno', lazy=True, cascade="all, delete-orphan")
@@ -34,6 +43,13 @@ class Usuario(UserMixin, db.Model):
     def __repr__(self):
         return f'<Usuario {self.nome} ({self.tipo})>'
     
+    @staticmethod
+    def versao_dados():
+        """Muda a cada usuário criado, editado ou removido (ETag das listagens)"""
+        return tuple(db.session.execute(
+            db.select(func.count(Usuario.id), func.max(Usuario.id), func.max(Usuario.atualizado_em))
+        ).one())
+    
     # Métodos para senha
     def set_password(self, senha):
         """Gera hash da senha"""
@@ -80,28 +96,7 @@ class Usuario(UserMixin, db.Model):
     @staticmethod
     def validar_cpf(cpf):
         """
-        Valida formato de CPF (apenas dígitos)
+        Valida formato de CPF (com ou sem máscara)
         Retorna True se válido
         """
-        cpf = ''.join(filter(str.isdigit, cpf))
-        
-        if len(cpf) != 11:
-            return False
-        
-        # Verifica se todos os dígitos são iguais
-        if cpf == cpf[0] * 11:
-            return False
-        
-        # Validação dos dígitos verificadores
-        def calcular_digito(cpf_parcial, pesos):
-            soma = sum(int(cpf_parcial[i]) * pesos[i] for i in range(len(pesos)))
-            resto = soma % 11
-            return 0 if resto < 2 else 11 - resto
-        
-        pesos_primeiro = list(range(10, 1, -1))
-        pesos_segundo = list(range(11, 1, -1))
-        
-        digito1 = calcular_digito(cpf[:9], pesos_primeiro)
-        digito2 = calcular_digito(cpf[:10], pesos_segundo)
-        
-        return cpf[-2:] == f'{digito1}{digito2}'
\ No newline at end of file
+        return cpf_util.validar(cpf)
\ No newline at end of file
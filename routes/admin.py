@@ -2,16 +2,23 @@
 Blueprint: Admin
 Dashboard e gerenciamento do sistema
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from datetime import date, datetime, timedelta
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import current_user
-from sqlalchemy import nullslast # <-- Importação movida para o topo!
+from sqlalchemy import func, nullslast, select # <-- Importação movida para o topo!
 from extensions import db
 from models.user import Usuario
 from models.sala import Sala
 from models.evento import Evento
 from models.inscricao import Inscricao
+from models.lista_espera import ListaEspera
 from models.pre_authorized_user import PreAuthorizedUser
-from utils.decorators import role_required, login_required_custom, anonymous_required
+from models.progresso_tarefa import ProgressoTarefa
+from models.resumo_presenca import ResumoDia, ResumoEvento, ResumoOrganizador, ResumoSala
+from models.tarefa import Tarefa
+from utils.db import cpf_texto
+from utils.decorators import role_required, login_required_custom, anonymous_required, condicional, escrita
+from utils.fila import enfileirar
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -37,10 +44,10 @@ def dashboard():
     cpfs_autorizados_total = PreAuthorizedUser.query.count()
     
     # Eventos recentes
-    eventos_recentes = Evento.query.order_by(Evento.criado_em.desc()).limit(5).all()
+    eventos_recentes = Evento.consulta_listagem().order_by(Evento.criado_em.desc()).limit(5).all()
     
     # Inscrições recentes
-    inscricoes_recentes = Inscricao.query.order_by(Inscricao.inscrito_em.desc()).limit(5).all()
+    inscricoes_recentes = Inscricao.listar_recentes(5)
     
     return render_template(
         'admin/dashboard.html',
@@ -60,6 +67,7 @@ def dashboard():
 
 @admin_bp.route('/usuarios')
 @role_required('admin')
+@condicional(lambda: Usuario.versao_dados())
 def usuarios():
     """
     Listar todos os usuários
@@ -79,7 +87,7 @@ def usuarios():
         query = query.filter(
             db.or_(
                 Usuario.nome.ilike(f'%{busca}%'),
-                Usuario.cpf.ilike(f'%{busca}%')
+                cpf_texto(Usuario.cpf).like(f"%{''.join(filter(str.isdigit, busca)) or busca}%")
             )
         )
     
@@ -95,6 +103,7 @@ def usuarios():
 
 @admin_bp.route('/usuarios/<int:user_id>/alternar-status', methods=['POST'])
 @role_required('admin')
+@escrita
 def alternar_status_usuario(user_id):
     """
     Ativar/desativar usuário
@@ -149,6 +158,7 @@ def cpfs_autorizados():
 
 @admin_bp.route('/cpfs-autorizados/adicionar', methods=['GET', 'POST'])
 @role_required('admin')
+@escrita
 def adicionar_cpf_autorizado():
     """
     Adicionar novo CPF autorizado
@@ -178,6 +188,7 @@ def adicionar_cpf_autorizado():
 
 @admin_bp.route('/cpfs-autorizados/<int:cpf_id>/desativar', methods=['POST'])
 @role_required('admin')
+@escrita
 def desativar_cpf_autorizado(cpf_id):
     """
     Desativar CPF autorizado
@@ -195,6 +206,7 @@ def desativar_cpf_autorizado(cpf_id):
 
 @admin_bp.route('/cpfs-autorizados/<int:cpf_id>/reativar', methods=['POST'])
 @role_required('admin')
+@escrita
 def reativar_cpf_autorizado(cpf_id):
     """
     Reativar CPF autorizado
@@ -216,12 +228,43 @@ def salas():
     """
     Gerenciar salas
     """
-    salas = Sala.query.order_by(Sala.capacidade.desc()).all()
+    salas = Sala.consulta_com_eventos().order_by(Sala.capacidade.desc()).all()
     return render_template('admin/salas.html', salas=salas)
 
 
+@admin_bp.route('/salas/ocupacao')
+@role_required('admin')
+def ocupacao_salas():
+    """
+    Relatório de utilização das salas em um período (padrão: últimos 30 dias)
+    """
+    try:
+        data_inicio = datetime.strptime(request.args.get('inicio', ''), '%Y-%m-%d').date()
+        data_fim = datetime.strptime(request.args.get('fim', ''), '%Y-%m-%d').date()
+    except ValueError:
+        data_fim = date.today() + timedelta(days=1)
+        data_inicio = data_fim - timedelta(days=30)
+    if data_fim <= data_inicio:
+        data_fim = data_inicio + timedelta(days=1)
+    
+    relatorio = Sala.relatorio_ocupacao(
+        data_inicio,
+        data_fim,
+        current_app.config['SALA_HORA_ABERTURA'],
+        current_app.config['SALA_HORA_FECHAMENTO']
+    )
+    
+    return render_template(
+        'admin/ocupacao_salas.html',
+        relatorio=relatorio,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+
+
 @admin_bp.route('/salas/adicionar', methods=['GET', 'POST'])
 @role_required('admin')
+@escrita
 def adicionar_sala():
     """
     Adicionar nova sala
@@ -266,6 +309,7 @@ def adicionar_sala():
 
 @admin_bp.route('/salas/<int:sala_id>/editar', methods=['GET', 'POST'])
 @role_required('admin')
+@escrita
 def editar_sala(sala_id):
     """
     Editar sala existente
@@ -297,23 +341,33 @@ def editar_sala(sala_id):
             flash('❌ Já existe outra sala com este nome.', 'error')
             return render_template('admin/editar_sala.html', sala=sala)
         
+        capacidade_anterior = sala.capacidade
         sala.nome = nome
         sala.capacidade = capacidade
         sala.descricao = descricao if descricao else None
         
         try:
             db.session.commit()
-            flash('✅ Sala atualizada com sucesso!', 'success')
-            return redirect(url_for('admin.salas'))
         except Exception:
             db.session.rollback()
             flash('❌ Erro ao atualizar sala.', 'error')
+            return render_template('admin/editar_sala.html', sala=sala)
+        
+        flash('✅ Sala atualizada com sucesso!', 'success')
+        # Vagas novas vão para quem está na lista de espera dos eventos da sala
+        if capacidade > capacidade_anterior:
+            promovidos = ListaEspera.preencher_vagas_da_sala(sala_id)
+            total = sum(len(alunos) for alunos in promovidos.values())
+            if total:
+                flash(f'✅ {total} aluno(s) da lista de espera inscrito(s).', 'success')
+        return redirect(url_for('admin.salas'))
     
     return render_template('admin/editar_sala.html', sala=sala)
 
 
 @admin_bp.route('/salas/<int:sala_id>/alternar-status', methods=['POST'])
 @role_required('admin')
+@escrita
 def alternar_status_sala(sala_id):
     """
     Ativar/desativar sala
@@ -334,6 +388,7 @@ def alternar_status_sala(sala_id):
 
 @admin_bp.route('/eventos')
 @role_required('admin')
+@condicional(lambda: (Evento.versao_dados(), Sala.versao_dados(), Usuario.versao_dados(), Inscricao.versao_dados()))
 def eventos():
     """
     Listar todos os eventos (visão geral)
@@ -343,7 +398,7 @@ def eventos():
     status = request.args.get('status', '')
     organizador_id = request.args.get('organizador', '')
 
-    query = Evento.query
+    query = Evento.consulta_listagem()
 
     if busca:
         query = query.filter(Evento.nome_evento.ilike(f'%{busca}%'))
@@ -385,6 +440,7 @@ def detalhes_evento(evento_id):
 
 @admin_bp.route('/eventos/<int:evento_id>/cancelar', methods=['POST'])
 @role_required('admin')
+@escrita
 def cancelar_evento(evento_id):
     """
     Cancelar/Encerrar um evento (POST only — protegido contra CSRF)
@@ -399,4 +455,112 @@ def cancelar_evento(evento_id):
         db.session.rollback()
         flash('❌ Erro ao cancelar evento.', 'error')
         
-    return redirect(url_for('admin.eventos'))
\ No newline at end of file
+    return redirect(url_for('admin.eventos'))
+
+# ================================================================
+#  TAREFAS EM SEGUNDO PLANO (fila executada pelo `flask worker`)
+# ================================================================
+
+@admin_bp.route('/tarefas')
+@role_required('admin')
+def tarefas():
+    """
+    Últimas tarefas da fila e seus status
+    """
+    status = request.args.get('status', '')
+
+    query = Tarefa.query
+    if status:
+        query = query.filter(Tarefa.status == status)
+
+    tarefas = query.order_by(Tarefa.id.desc()).limit(100).all()
+
+    return render_template('admin/tarefas.html', tarefas=tarefas, status_filtro=status)
+
+
+@admin_bp.route('/tarefas/marcar-ausentes', methods=['POST'])
+@role_required('admin')
+@escrita
+def enfileirar_marcar_ausentes():
+    """
+    Agenda a varredura de ausências para o worker
+    """
+    tarefa = enfileirar(
+        'marcar_ausentes',
+        {'desde_o_inicio': request.form.get('desde_o_inicio') == '1'},
+        criado_por_id=current_user.id
+    )
+    flash(f'✅ Varredura de ausências agendada (tarefa #{tarefa.id}).', 'success')
+    return redirect(url_for('admin.tarefas'))
+
+
+@admin_bp.route('/tarefas/<int:tarefa_id>')
+@role_required('admin')
+def status_tarefa(tarefa_id):
+    """
+    Status de uma tarefa em JSON (para acompanhar operações demoradas)
+    """
+    tarefa = db.get_or_404(Tarefa, tarefa_id)
+    return jsonify(tarefa.to_dict())
+
+
+# ================================================================
+#  RELATÓRIOS DE PRESENÇA (só leem as tabelas resumo_presenca_*)
+# ================================================================
+
+LIMITE_RELATORIO = 50
+
+# por -> (model do resumo, coluna do rótulo, junção, ordenação)
+RELATORIOS_PRESENCA = {
+    'organizador': (ResumoOrganizador, Usuario.nome, Usuario.id == ResumoOrganizador.organizador_id, ResumoOrganizador.inscricoes.desc()),
+    'sala': (ResumoSala, Sala.nome, Sala.id == ResumoSala.sala_id, ResumoSala.inscricoes.desc()),
+    'dia': (ResumoDia, None, None, ResumoDia.dia.desc()),
+    'evento': (ResumoEvento, Evento.nome_evento, Evento.id == ResumoEvento.evento_id, ResumoEvento.evento_id.desc()),
+}
+
+
+@admin_bp.route('/relatorios/presenca')
+@role_required('admin')
+def relatorio_presenca():
+    """
+    Inscrições, presenças e taxa de ausência por organizador, sala, dia ou evento
+    """
+    por = request.args.get('por', 'organizador')
+    if por not in RELATORIOS_PRESENCA:
+        por = 'organizador'
+
+    modelo, rotulo, juncao, ordem = RELATORIOS_PRESENCA[por]
+    if rotulo is None:
+        consulta = select(modelo, ResumoDia.dia)
+    else:
+        consulta = select(modelo, rotulo).outerjoin(rotulo.class_, juncao)
+    linhas = db.session.execute(consulta.order_by(ordem).limit(LIMITE_RELATORIO)).all()
+
+    # Total geral somado do resumo por sala (uma linha por sala)
+    totais = db.session.execute(select(
+        func.coalesce(func.sum(ResumoSala.eventos), 0),
+        func.coalesce(func.sum(ResumoSala.inscricoes), 0),
+        func.coalesce(func.sum(ResumoSala.presencas), 0),
+        func.coalesce(func.sum(ResumoSala.ausencias), 0)
+    )).one()
+    geral = ResumoSala(**dict(zip(ResumoSala.CAMPOS, totais)))
+
+    return render_template(
+        'admin/relatorio_presenca.html',
+        por=por,
+        linhas=linhas,
+        geral=geral,
+        progresso=db.session.get(ProgressoTarefa, 'resumo_presenca')
+    )
+
+
+@admin_bp.route('/relatorios/presenca/atualizar', methods=['POST'])
+@role_required('admin')
+@escrita
+def enfileirar_atualizar_resumos():
+    """
+    Agenda a atualização dos resumos de presença para o worker
+    """
+    tarefa = enfileirar('atualizar_resumos', criado_por_id=current_user.id)
+    flash(f'✅ Atualização dos relatórios agendada (tarefa #{tarefa.id}).', 'success')
+    return redirect(url_for('admin.relatorio_presenca', por=request.form.get('por', 'organizador')))
@@ -2,13 +2,18 @@
 Blueprint: Aluno
 Inscrições, eventos e confirmação de presença
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from flask_login import current_user
-from extensions import db
+from extensions import db, limiter
 from models.evento import Evento
 from models.inscricao import Inscricao
+from models.lista_espera import ListaEspera
 from models.sala import Sala
+from sqlalchemy import select
+from utils import checkin
+from utils.db import transacao_escrita, trava_evento
 from utils.decorators import role_required
+from utils.metricas import registrar_checkin
 from datetime import datetime
 
 aluno_bp = Blueprint('aluno', __name__)
@@ -21,12 +26,15 @@ def eventos_disponiveis():
     Listar eventos disponíveis para inscrição
     """
     eventos = Evento.listar_disponiveis(apenas_futuros=True)
+    em_espera = ListaEspera.eventos_do_aluno(current_user.id)
+    inscrito_em = Inscricao.eventos_do_aluno(current_user.id)
 
     eventos_data = []
 
     for evento in eventos:
-        inscrito = Inscricao.aluno_ja_inscrito(current_user.id, evento.id)
+        inscrito = evento.id in inscrito_em
         tem_vagas = evento.sala.capacidade > evento.num_inscritos if evento.sala else True
+        na_fila = evento.id in em_espera
 
         eventos_data.append({
             'evento': evento,
@@ -36,7 +44,9 @@ def eventos_disponiveis():
             'capacidade': evento.sala.capacidade if evento.sala else 0,
             'tem_vagas': tem_vagas,
             'inscrito': inscrito,
-            'pode_inscrever': not inscrito and tem_vagas and not evento.ja_iniciou()
+            'na_fila': na_fila,
+            'pode_inscrever': not inscrito and tem_vagas and not evento.ja_iniciou(),
+            'pode_entrar_fila': not inscrito and not na_fila and not tem_vagas and not evento.ja_iniciou()
         })
 
     return render_template('aluno/eventos_disponiveis.html', eventos_data=eventos_data)
@@ -60,6 +70,8 @@ def detalhes_evento(evento_id):
     if capacidade > 0:
         percentual = int((total_inscritos / capacidade) * 100)
 
+    posicao_fila = None if inscricao else ListaEspera.posicao(current_user.id, evento.id)
+
     return render_template(
         'aluno/detalhes_evento.html',
         evento=evento,
@@ -67,7 +79,8 @@ def detalhes_evento(evento_id):
         capacidade=capacidade,
         total_inscritos=total_inscritos,
         vagas_disponiveis=vagas_disponiveis,
-        percentual=percentual
+        percentual=percentual,
+        posicao_fila=posicao_fila
     )
 
 
@@ -85,32 +98,71 @@ def confirmar_inscricao(evento_id):
         flash('⚠️ Você já está inscrito neste evento.', 'warning')
         return redirect(url_for('aluno.meus_eventos'))
 
-    if evento.sala and evento.num_inscritos >= evento.sala.capacidade:
-        flash('❌ Não há vagas disponíveis neste evento.', 'error')
-        return redirect(url_for('aluno.eventos_disponiveis'))
-
-    nova_inscricao = Inscricao(
-        aluno_id=current_user.id,
-        evento_id=evento_id,
-        status_presenca=Inscricao.STATUS_AGUARDANDO
-    )
-
     try:
-        db.session.add(nova_inscricao)
-        db.session.commit()
-        flash(f'✅ Inscrição realizada com sucesso no evento "{evento.nome_evento}"!', 'success')
-        return redirect(url_for('aluno.meus_eventos'))
+        inscrito, posicao = Inscricao.inscrever(current_user.id, evento)
     except Exception:
         db.session.rollback()
         flash('❌ Erro ao realizar inscrição.', 'error')
         return redirect(url_for('aluno.eventos_disponiveis'))
 
+    if not inscrito:
+        flash(
+            f'⏳ Evento lotado. Você está na lista de espera (posição {posicao}) '
+            f'e será inscrito automaticamente quando abrir uma vaga.',
+            'info'
+        )
+        return redirect(url_for('aluno.detalhes_evento', evento_id=evento_id))
+
+    flash(f'✅ Inscrição realizada com sucesso no evento "{evento.nome_evento}"!', 'success')
+    return redirect(url_for('aluno.meus_eventos'))
+
+
+@aluno_bp.route('/eventos/<int:evento_id>/lista-espera/sair', methods=['POST'])
+@role_required('aluno')
+def sair_lista_espera(evento_id):
+    """
+    Sair da lista de espera de um evento
+    Sob trava_evento, como a promoção da fila: quem sai não é promovido
+    depois de sair e a promoção não perde a linha no meio do caminho
+    """
+    with trava_evento(evento_id):
+        saiu = ListaEspera.sair(current_user.id, evento_id)
+        db.session.commit()
+    if saiu:
+        flash('✅ Você saiu da lista de espera.', 'success')
+    else:
+        flash('⚠️ Você não está na lista de espera deste evento.', 'warning')
+    return redirect(url_for('aluno.detalhes_evento', evento_id=evento_id))
+
+
+@aluno_bp.route('/eventos/<int:evento_id>/lista-espera')
+@role_required('aluno')
+@limiter.limit('120 per hour')
+def status_lista_espera(evento_id):
+    """
+    Situação do aluno no evento, para polling leve da página de detalhes:
+    só consultas escalares, sem carregar evento/inscrições
+    """
+    capacidade = db.session.scalar(
+        select(Sala.capacidade).join(Evento, Evento.sala_id == Sala.id).where(Evento.id == evento_id)
+    )
+    if capacidade is None:
+        return jsonify({'erro': 'Evento não encontrado'}), 404
+
+    inscrito = Inscricao.aluno_ja_inscrito(current_user.id, evento_id)
+
+    return jsonify({
+        'inscrito': inscrito,
+        'posicao': None if inscrito else ListaEspera.posicao(current_user.id, evento_id),
+        'vagas': max(capacidade - Inscricao.contar_inscritos(evento_id), 0)
+    })
+
 
 @aluno_bp.route('/meus-eventos')
 @role_required('aluno')
 def meus_eventos():
     filtro = request.args.get('filtro', 'todos')
-    inscricoes = Inscricao.query.filter_by(aluno_id=current_user.id).all()
+    inscricoes = Inscricao.listar_por_aluno(current_user.id)
     eventos_data = []
 
     for inscricao in inscricoes:
@@ -156,8 +208,7 @@ def cancelar_inscricao(evento_id):
     nome_evento = evento.nome_evento
 
     try:
-        db.session.delete(inscricao)
-        db.session.commit()
+        inscricao.cancelar()
         flash(f'✅ Inscrição cancelada no evento "{nome_evento}".', 'success')
     except Exception:
         db.session.rollback()
@@ -172,6 +223,40 @@ def escanear_qr():
     return render_template('aluno/escanear_qr.html')
 
 
+def _registrar_checkin(evento_id, totp_token):
+    """
+    Valida o token TOTP e confirma a presença do aluno logado em uma única transação.
+    Caminho feliz: 1 SELECT do evento + 1 UPDATE condicional (sem recarregar a inscrição).
+    Retorna (codigo, evento) — códigos definidos em utils/checkin.py.
+    """
+    evento = db.session.get(Evento, evento_id)
+
+    codigo = checkin.validar_evento(
+        evento,
+        totp_token,
+        current_app.config['QR_CODE_JANELA_ANTES_MINUTOS'],
+        current_app.config['QR_CODE_JANELA_DEPOIS_MINUTOS']
+    )
+    if codigo:
+        return codigo, evento
+
+    try:
+        with transacao_escrita():
+            resultado = db.session.execute(Inscricao.sql_confirmar_presenca(current_user.id, evento_id))
+            if resultado.rowcount == 1:
+                db.session.commit()
+                return checkin.CONFIRMADO, evento
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        return checkin.ERRO, evento
+
+    # Nada atualizado: inscrição inexistente ou presença já confirmada
+    if Inscricao.aluno_ja_inscrito(current_user.id, evento.id):
+        return checkin.JA_CONFIRMADO, evento
+    return checkin.NAO_INSCRITO, evento
+
+
 @aluno_bp.route('/confirmar-presenca', methods=['POST'])
 @role_required('aluno')
 def confirmar_presenca():
@@ -179,54 +264,64 @@ def confirmar_presenca():
     Confirma presença via QR Code dinâmico (TOTP).
     Espera receber: evento_id + totp_token
     """
-    evento_id = request.form.get('evento_id', '').strip()
-    totp_token = request.form.get('totp_token', '').strip()
+    evento_id, totp_token = checkin.ler_payload(request.form)
 
-    if not evento_id or not totp_token:
+    if evento_id is None:
         flash('❌ Dados de presença inválidos.', 'error')
         return redirect(url_for('aluno.escanear_qr'))
 
-    try:
-        evento_id = int(evento_id)
-    except ValueError:
-        flash('❌ Evento inválido.', 'error')
-        return redirect(url_for('aluno.escanear_qr'))
-
-    evento = Evento.query.get(evento_id)
+    codigo, evento = _registrar_checkin(evento_id, totp_token)
+    registrar_checkin('confirmar_presenca', codigo)
 
-    if not evento:
+    if codigo == checkin.CONFIRMADO:
+        flash(f'✅ Presença confirmada com sucesso no evento "{evento.nome_evento}"!', 'success')
+    elif codigo == checkin.EVENTO_NAO_ENCONTRADO:
         flash('❌ Evento não encontrado.', 'error')
         return redirect(url_for('aluno.escanear_qr'))
-
-    # Validar o token temporal (anti-replay)
-    if not evento.validar_token_temporal(totp_token):
+    elif codigo == checkin.TOKEN_INVALIDO:
         flash('❌ Código QR expirado ou inválido. Escaneie novamente o QR Code atualizado.', 'error')
         return redirect(url_for('aluno.escanear_qr'))
-
-    inscricao = Inscricao.query.filter_by(aluno_id=current_user.id, evento_id=evento.id).first()
-
-    if not inscricao:
+    elif codigo == checkin.NAO_INSCRITO:
         flash(f'❌ Você não está inscrito no evento "{evento.nome_evento}". Inscreva-se primeiro.', 'error')
         return redirect(url_for('aluno.eventos_disponiveis'))
-
-    if inscricao.esta_presente:
+    elif codigo == checkin.JA_CONFIRMADO:
         flash('⚠️ Presença já confirmada anteriormente.', 'warning')
-        return redirect(url_for('aluno.meus_eventos'))
-
-    if not evento.pode_confirmar_presenca():
+    elif codigo == checkin.FORA_DA_JANELA:
         flash('❌ Fora da janela de confirmação (30 min antes até 30 min depois).', 'error')
-        return redirect(url_for('aluno.meus_eventos'))
-
-    try:
-        inscricao.confirmar_presenca()
-        flash(f'✅ Presença confirmada com sucesso no evento "{evento.nome_evento}"!', 'success')
-    except Exception:
-        db.session.rollback()
+    else:
         flash('❌ Erro ao confirmar presença.', 'error')
 
     return redirect(url_for('aluno.meus_eventos'))
 
 
+@aluno_bp.route('/checkin', methods=['POST'])
+def checkin_qr():
+    """
+    Endpoint AJAX: valida o QR Code TOTP e confirma a presença na mesma requisição.
+    Recebe JSON: { "evento_id": int, "totp_token": str }
+    Responde com `codigo` estável (utils/checkin.py) e status HTTP correspondente.
+    Mesmo contrato do serviço assíncrono em checkin_asgi.py.
+    """
+    if not current_user.is_authenticated:
+        corpo, status = checkin.resposta(checkin.NAO_AUTENTICADO)
+        return jsonify(corpo), status
+
+    if not current_user.is_aluno():
+        corpo, status = checkin.resposta(checkin.SEM_PERMISSAO)
+        return jsonify(corpo), status
+
+    evento_id, totp_token = checkin.ler_payload(request.get_json(silent=True))
+    if evento_id is None:
+        corpo, status = checkin.resposta(checkin.DADOS_INVALIDOS)
+        return jsonify(corpo), status
+
+    codigo, evento = _registrar_checkin(evento_id, totp_token)
+    registrar_checkin('checkin', codigo)
+
+    corpo, status = checkin.resposta(codigo, evento)
+    return jsonify(corpo), status
+
+
 @aluno_bp.route('/validar-qr', methods=['POST'])
 @role_required('aluno')
 def validar_qr():
@@ -239,32 +334,40 @@ def validar_qr():
     totp_token = data.get('totp_token', '').strip()
 
     if not evento_id or not totp_token:
+        registrar_checkin('validar_qr', checkin.DADOS_INVALIDOS)
         return jsonify({'valido': False, 'mensagem': 'Dados inválidos'})
 
     try:
         evento_id = int(evento_id)
     except (ValueError, TypeError):
+        registrar_checkin('validar_qr', checkin.DADOS_INVALIDOS)
         return jsonify({'valido': False, 'mensagem': 'Evento inválido'})
 
     evento = Evento.query.get(evento_id)
 
     if not evento:
+        registrar_checkin('validar_qr', checkin.EVENTO_NAO_ENCONTRADO)
         return jsonify({'valido': False, 'mensagem': 'Evento não encontrado'})
 
     if not evento.validar_token_temporal(totp_token):
+        registrar_checkin('validar_qr', checkin.TOKEN_INVALIDO)
         return jsonify({'valido': False, 'mensagem': 'Código QR expirado. Peça para o organizador atualizar.'})
 
     inscricao = Inscricao.query.filter_by(aluno_id=current_user.id, evento_id=evento.id).first()
 
     if not inscricao:
+        registrar_checkin('validar_qr', checkin.NAO_INSCRITO)
         return jsonify({'valido': False, 'mensagem': f'Você não está inscrito no evento "{evento.nome_evento}"'})
 
     if inscricao.esta_presente:
+        registrar_checkin('validar_qr', checkin.JA_CONFIRMADO)
         return jsonify({'valido': False, 'mensagem': 'Presença já confirmada anteriormente'})
 
     if not evento.pode_confirmar_presenca():
+        registrar_checkin('validar_qr', checkin.FORA_DA_JANELA)
         return jsonify({'valido': False, 'mensagem': 'Fora da janela de confirmação (30 min antes até 30 min depois)'})
 
+    registrar_checkin('validar_qr', checkin.VALIDADO)
     return jsonify({
         'valido': True,
         'evento_id': evento.id,
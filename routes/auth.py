@@ -7,6 +7,9 @@ from flask_login import login_user, logout_user, current_user
 from extensions import db, limiter, csrf
 from models.user import Usuario
 from models.pre_authorized_user import PreAuthorizedUser
+from utils import autenticacao
+from utils.autenticacao import autenticar
+from utils.db import transacao_escrita
 from utils.decorators import role_required, login_required_custom, anonymous_required
 
 auth_bp = Blueprint('auth', __name__)
@@ -30,20 +33,21 @@ def login():
             return render_template('auth/login.html')
         
         cpf = ''.join(filter(str.isdigit, cpf))
-        usuario = Usuario.query.filter_by(cpf=cpf).first()
+        resultado, usuario_id, _ = autenticar(cpf, senha)
         
-        if not usuario:
-            flash('❌ CPF não encontrado.', 'error')
-            return render_template('auth/login.html')
+        if resultado == autenticacao.OCUPADO:
+            flash('❌ Muitos acessos no momento. Tente novamente em instantes.', 'error')
+            return render_template('auth/login.html'), 503
         
-        if not usuario.check_password(senha):
-            flash('❌ Senha incorreta.', 'error')
+        if resultado == autenticacao.INVALIDO:
+            flash('❌ CPF ou senha incorretos.', 'error')
             return render_template('auth/login.html')
         
-        if not usuario.ativo:
+        if resultado == autenticacao.DESATIVADO:
             flash('❌ Usuário desativado. Contate o administrador.', 'error')
             return render_template('auth/login.html')
         
+        usuario = db.session.get(Usuario, usuario_id)
         login_user(usuario, remember=lembrar)
         flash(f'✅ Bem-vindo(a), {usuario.nome}!', 'success')
         
@@ -120,15 +124,17 @@ def cadastro():
         )
         novo_usuario.set_password(senha)
         
-        try:
-            db.session.add(novo_usuario)
-            db.session.commit()
-            flash('✅ Cadastro realizado com sucesso! Faça login.', 'success')
-            return redirect(url_for('auth.login'))
-        except Exception:
-            db.session.rollback()
-            flash('❌ Erro ao criar conta. Tente novamente.', 'error')
-            return render_template('auth/cadastro.html')
+        # Só a gravação trava o banco (o hash acima fica de fora)
+        with transacao_escrita():
+            try:
+                db.session.add(novo_usuario)
+                db.session.commit()
+                flash('✅ Cadastro realizado com sucesso! Faça login.', 'success')
+                return redirect(url_for('auth.login'))
+            except Exception:
+                db.session.rollback()
+                flash('❌ Erro ao criar conta. Tente novamente.', 'error')
+                return render_template('auth/cadastro.html')
     
     return render_template('auth/cadastro.html')
 
@@ -179,16 +185,18 @@ def cadastro_organizador():
         )
         novo_usuario.set_password(senha)
         
-        try:
-            db.session.add(novo_usuario)
-            pre_auth.marcar_como_usado()
-            db.session.commit()
-            flash('✅ Cadastro de organizador realizado com sucesso! Faça login.', 'success')
-            return redirect(url_for('auth.login'))
-        except Exception:
-            db.session.rollback()
-            flash('❌ Erro ao criar conta. Tente novamente.', 'error')
-            return render_template('auth/cadastro_organizador.html')
+        # Só a gravação trava o banco (o hash acima fica de fora)
+        with transacao_escrita():
+            try:
+                db.session.add(novo_usuario)
+                pre_auth.marcar_como_usado()
+                db.session.commit()
+                flash('✅ Cadastro de organizador realizado com sucesso! Faça login.', 'success')
+                return redirect(url_for('auth.login'))
+            except Exception:
+                db.session.rollback()
+                flash('❌ Erro ao criar conta. Tente novamente.', 'error')
+                return render_template('auth/cadastro_organizador.html')
     
     return render_template('auth/cadastro_organizador.html')
 
@@ -206,9 +214,7 @@ def verificar_cpf_organizador():
     if not Usuario.validar_cpf(cpf):
         return {'valido': False, 'mensagem': 'CPF inválido'}
     
-    pre_auth = PreAuthorizedUser.cpf_autorizado(cpf, role='organizador')
-    
-    if pre_auth:
+    if PreAuthorizedUser.esta_autorizado(cpf, role='organizador'):
         return {'valido': True, 'mensagem': 'CPF autorizado para cadastro!'}
     else:
         return {'valido': False, 'mensagem': 'CPF não autorizado. Contate o administrador.'}
@@ -2,15 +2,18 @@
 Blueprint: Organizador
 Gerenciamento de eventos e salas por organizadores
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
 from extensions import db, csrf
 from models.sala import Sala
 from models.evento import Evento
 from models.inscricao import Inscricao
 from models.user import Usuario
-from utils.decorators import role_required
-from datetime import datetime, timedelta
+from utils.decorators import role_required, condicional, escrita
+from utils import recorrencia
+from utils.db import trava_sala
+from datetime import datetime, timedelta, date
 
 organizador_bp = Blueprint('organizador', __name__)
 
@@ -22,7 +25,7 @@ def salas():
     Visualizar todas as salas disponíveis
     """
     # Buscar apenas salas ativas
-    salas = Sala.query.filter_by(ativa=True).order_by(Sala.capacidade.desc()).all()
+    salas = Sala.consulta_com_eventos().filter_by(ativa=True).order_by(Sala.capacidade.desc()).all()
     
     return render_template('organizador/salas.html', salas=salas)
 
@@ -48,6 +51,177 @@ def detalhes_sala(sala_id):
     )
 
 
+def _periodo_grade():
+    """
+    Lê o período da grade na query string: ?inicio=AAAA-MM-DD&dias=N
+    Padrão: a partir de hoje, 7 dias (máximo 31)
+    """
+    try:
+        data_inicio = datetime.strptime(request.args.get('inicio', ''), '%Y-%m-%d').date()
+    except ValueError:
+        data_inicio = date.today()
+    
+    try:
+        dias = int(request.args.get('dias', 7))
+    except ValueError:
+        dias = 7
+    dias = min(max(dias, 1), 31)
+    
+    return data_inicio, data_inicio + timedelta(days=dias)
+
+
+def _grade_disponibilidade(data_inicio, data_fim):
+    return Sala.grade_disponibilidade(
+        data_inicio,
+        data_fim,
+        current_app.config['SALA_HORA_ABERTURA'],
+        current_app.config['SALA_HORA_FECHAMENTO']
+    )
+
+
+@organizador_bp.route('/salas/disponibilidade')
+@role_required('organizador')
+def disponibilidade_salas():
+    """
+    Grade de horários livres/ocupados de todas as salas ativas
+    """
+    data_inicio, data_fim = _periodo_grade()
+    grade = _grade_disponibilidade(data_inicio, data_fim)
+    
+    return render_template(
+        'organizador/disponibilidade.html',
+        grade=grade,
+        data_inicio=data_inicio,
+        dias=(data_fim - data_inicio).days,
+        periodo_anterior=data_inicio - (data_fim - data_inicio),
+        proximo_periodo=data_fim
+    )
+
+
+@organizador_bp.route('/api/disponibilidade')
+@role_required('organizador')
+def api_disponibilidade():
+    """
+    Grade de disponibilidade em JSON (mesmos parâmetros da página)
+    """
+    data_inicio, data_fim = _periodo_grade()
+    grade = _grade_disponibilidade(data_inicio, data_fim)
+    
+    return jsonify({
+        'inicio': data_inicio.isoformat(),
+        'fim': data_fim.isoformat(),
+        'salas': [
+            {
+                'id': linha['sala'].id,
+                'nome': linha['sala'].nome,
+                'capacidade': linha['sala'].capacidade,
+                'dias': [
+                    {
+                        'data': dia['inicio'].date().isoformat(),
+                        'ocupado': [
+                            {'inicio': ini.isoformat(), 'fim': fim.isoformat(), 'eventos': eventos}
+                            for ini, fim, eventos in dia['ocupado']
+                        ],
+                        'livre': [
+                            {'inicio': ini.isoformat(), 'fim': fim.isoformat()}
+                            for ini, fim in dia['livre']
+                        ]
+                    }
+                    for dia in linha['dias']
+                ]
+            }
+            for linha in grade
+        ]
+    })
+
+
+def _parametros_busca():
+    """
+    Lê os parâmetros da busca de horário livre:
+    ?capacidade=N&duracao=H&inicio=AAAA-MM-DD&dias=N
+    Retorna (capacidade, duracao, data_inicio, data_fim) ou None se inválidos
+    """
+    try:
+        capacidade = int(request.args.get('capacidade', 1))
+        duracao = float(request.args.get('duracao', 1))
+    except ValueError:
+        return None
+    
+    if capacidade < 1 or duracao <= 0 or duracao > 12:
+        return None
+    
+    data_inicio, data_fim = _periodo_grade()
+    return capacidade, duracao, data_inicio, data_fim
+
+
+def _buscar_horarios(capacidade, duracao, data_inicio, data_fim):
+    return Sala.buscar_horarios_livres(
+        capacidade,
+        duracao,
+        data_inicio,
+        data_fim,
+        current_app.config['SALA_HORA_ABERTURA'],
+        current_app.config['SALA_HORA_FECHAMENTO']
+    )
+
+
+@organizador_bp.route('/salas/buscar-horario')
+@role_required('organizador')
+def buscar_horario():
+    """
+    Encontra salas com capacidade suficiente livres pela duração pedida
+    (horário mais cedo primeiro; em empate, a menor sala que comporta)
+    """
+    resultados = None
+    parametros = None
+    
+    if 'capacidade' in request.args:
+        parametros = _parametros_busca()
+        if parametros is None:
+            flash('❌ Informe capacidade (≥ 1) e duração entre 0.5 e 12 horas.', 'error')
+        else:
+            resultados = _buscar_horarios(*parametros)
+    
+    return render_template(
+        'organizador/buscar_horario.html',
+        resultados=resultados,
+        hoje=date.today().isoformat()
+    )
+
+
+@organizador_bp.route('/api/horarios-livres')
+@role_required('organizador')
+def api_horarios_livres():
+    """
+    Busca de horários livres em JSON (mesmos parâmetros da página)
+    """
+    parametros = _parametros_busca()
+    if parametros is None:
+        return jsonify({'erro': 'Parâmetros inválidos'}), 400
+    
+    capacidade, duracao, data_inicio, data_fim = parametros
+    resultados = _buscar_horarios(capacidade, duracao, data_inicio, data_fim)
+    
+    return jsonify({
+        'capacidade': capacidade,
+        'duracao_horas': duracao,
+        'inicio': data_inicio.isoformat(),
+        'fim': data_fim.isoformat(),
+        'horarios': [
+            {
+                'sala': {
+                    'id': r['sala'].id,
+                    'nome': r['sala'].nome,
+                    'capacidade': r['sala'].capacidade
+                },
+                'inicio': r['inicio'].isoformat(),
+                'fim': r['fim'].isoformat()
+            }
+            for r in resultados
+        ]
+    })
+
+
 @organizador_bp.route('/salas/<int:sala_id>/reservar', methods=['GET', 'POST'])
 @role_required('organizador')
 def reservar_sala(sala_id):
@@ -95,17 +269,6 @@ def reservar_sala(sala_id):
             flash('❌ Não é possível criar eventos no passado.', 'error')
             return render_template('organizador/reservar_sala.html', sala=sala)
         
-        # Verificar disponibilidade da sala
-        disponivel, evento_conflitante = sala.esta_disponivel_em(data_hora, duracao)
-        
-        if not disponivel:
-            flash(
-                f'❌ Conflito de horário! A sala já está reservada para o evento '
-                f'"{evento_conflitante.nome_evento}" em {evento_conflitante.data_hora.strftime("%d/%m/%Y às %H:%M")}.',
-                'error'
-            )
-            return render_template('organizador/reservar_sala.html', sala=sala)
-        
         # Gerar QR Code único
         qr_code_link = Evento.gerar_qr_code(
             nome_evento=nome_evento,
@@ -114,33 +277,165 @@ def reservar_sala(sala_id):
             organizador_id=current_user.id
         )
         
-        # Criar evento
-        novo_evento = Evento(
-            nome_evento=nome_evento,
-            descricao=descricao if descricao else None,
-            data_hora=data_hora,
-            duracao_horas=duracao,
-            sala_id=sala_id,
-            organizador_id=current_user.id,
-            qr_code_link=qr_code_link
-        )
-        
-        try:
-            db.session.add(novo_evento)
-            db.session.commit()
+        # Verificação e gravação sob a trava da sala: duas reservas
+        # simultâneas para o mesmo horário não passam juntas
+        with trava_sala(sala_id):
+            disponivel, evento_conflitante = sala.esta_disponivel_em(data_hora, duracao)
+            
+            if not disponivel:
+                flash(
+                    f'❌ Conflito de horário! A sala já está reservada para o evento '
+                    f'"{evento_conflitante.nome_evento}" em {evento_conflitante.data_hora.strftime("%d/%m/%Y às %H:%M")}.',
+                    'error'
+                )
+                return render_template('organizador/reservar_sala.html', sala=sala)
             
-            flash(f'✅ Evento "{nome_evento}" criado com sucesso!', 'success')
-            return redirect(url_for('organizador.minhas_reservas'))
+            # Criar evento
+            novo_evento = Evento(
+                nome_evento=nome_evento,
+                descricao=descricao if descricao else None,
+                data_hora=data_hora,
+                duracao_horas=duracao,
+                sala_id=sala_id,
+                organizador_id=current_user.id,
+                qr_code_link=qr_code_link
+            )
             
-        except Exception:
-            db.session.rollback()
-            flash('❌ Erro ao criar evento.', 'error')
-            return render_template('organizador/reservar_sala.html', sala=sala)
+            try:
+                db.session.add(novo_evento)
+                db.session.commit()
+                
+                flash(f'✅ Evento "{nome_evento}" criado com sucesso!', 'success')
+                return redirect(url_for('organizador.minhas_reservas'))
+            
+            except IntegrityError:
+                db.session.rollback()
+                flash('❌ Conflito de horário! A sala acabou de ser reservada neste horário.', 'error')
+                return render_template('organizador/reservar_sala.html', sala=sala)
+                
+            except Exception:
+                db.session.rollback()
+                flash('❌ Erro ao criar evento.', 'error')
+                return render_template('organizador/reservar_sala.html', sala=sala)
     
     # GET - mostrar formulário
     return render_template('organizador/reservar_sala.html', sala=sala)
 
 
+def _ocorrencias_do_formulario(form, inicio):
+    """
+    Monta as datas da série a partir do formulário de recorrência.
+    Lança ValueError com a mensagem a exibir se algo estiver inválido.
+    """
+    frequencia = form.get('frequencia', 'WEEKLY')
+    
+    if frequencia == 'RRULE':
+        regra = recorrencia.interpretar_rrule(form.get('regra', ''))
+    else:
+        regra = {
+            'freq': frequencia,
+            'intervalo': int(form.get('intervalo') or 1),
+            'byday': [recorrencia.DIAS_SEMANA[dia] for dia in form.getlist('dias') if dia in recorrencia.DIAS_SEMANA] or None,
+            'count': None,
+            'until': None
+        }
+        if form.get('termino') == 'data':
+            regra['until'] = datetime.strptime(form.get('data_fim', ''), '%Y-%m-%d').replace(hour=23, minute=59)
+        else:
+            regra['count'] = int(form.get('ocorrencias') or 0)
+    
+    return recorrencia.gerar_ocorrencias(
+        inicio,
+        freq=regra['freq'],
+        intervalo=regra['intervalo'],
+        count=regra['count'],
+        until=regra['until'],
+        byday=regra['byday']
+    )
+
+
+@organizador_bp.route('/salas/<int:sala_id>/reservar-serie', methods=['GET', 'POST'])
+@role_required('organizador')
+def reservar_serie(sala_id):
+    """
+    Criar uma série de eventos recorrentes (diária, semanal ou RRULE)
+    Todas as ocorrências são conferidas de uma vez e gravadas em uma única transação
+    """
+    sala = Sala.query.get_or_404(sala_id)
+    
+    if not sala.ativa:
+        flash('❌ Esta sala está desativada.', 'error')
+        return redirect(url_for('organizador.salas'))
+    
+    if request.method == 'POST':
+        nome_evento = request.form.get('nome_evento', '').strip()
+        descricao = request.form.get('descricao', '').strip()
+        data_str = request.form.get('data', '').strip()
+        hora_str = request.form.get('hora', '').strip()
+        duracao_str = request.form.get('duracao', '').strip()
+        pular_conflitos = request.form.get('pular_conflitos') == '1'
+        
+        if not all([nome_evento, data_str, hora_str, duracao_str]):
+            flash('❌ Preencha todos os campos obrigatórios.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        try:
+            duracao = float(duracao_str)
+            inicio = datetime.strptime(f"{data_str} {hora_str}", '%Y-%m-%d %H:%M')
+        except ValueError:
+            flash('❌ Data, hora ou duração inválida.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        if duracao <= 0 or duracao > 12:
+            flash('❌ Duração deve ser entre 0.5 e 12 horas.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        if inicio < datetime.now():
+            flash('❌ Não é possível criar eventos no passado.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        try:
+            ocorrencias = _ocorrencias_do_formulario(request.form, inicio)
+        except ValueError as e:
+            flash(f'❌ Recorrência inválida: {e}', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        if not ocorrencias:
+            flash('❌ A recorrência não gerou nenhuma ocorrência.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        try:
+            criados, conflitos = Evento.criar_serie(
+                nome_evento=nome_evento,
+                descricao=descricao if descricao else None,
+                sala_id=sala_id,
+                organizador_id=current_user.id,
+                ocorrencias=ocorrencias,
+                duracao_horas=duracao,
+                pular_conflitos=pular_conflitos
+            )
+        except IntegrityError:
+            db.session.rollback()
+            flash('❌ Conflito de horário! A sala acabou de ser reservada em uma das datas.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        except Exception:
+            db.session.rollback()
+            flash('❌ Erro ao criar a série de eventos.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala)
+        
+        if not criados:
+            flash(f'❌ {len(conflitos)} de {len(ocorrencias)} ocorrência(s) em conflito. Nenhum evento foi criado.', 'error')
+            return render_template('organizador/reservar_serie.html', sala=sala, conflitos=conflitos, duracao=duracao)
+        
+        flash(f'✅ Série "{nome_evento}" criada com {len(criados)} evento(s)!', 'success')
+        if conflitos:
+            flash(f'⚠️ {len(conflitos)} ocorrência(s) ignorada(s) por conflito de horário.', 'warning')
+            return render_template('organizador/reservar_serie.html', sala=sala, conflitos=conflitos, duracao=duracao)
+        return redirect(url_for('organizador.minhas_reservas'))
+    
+    return render_template('organizador/reservar_serie.html', sala=sala)
+
+
 @organizador_bp.route('/reservas')
 @role_required('organizador')
 def minhas_reservas():
@@ -150,7 +445,7 @@ def minhas_reservas():
     # Filtros
     filtro = request.args.get('filtro', 'todos')
     
-    query = Evento.query.filter_by(organizador_id=current_user.id)
+    query = Evento.consulta_reservas().filter_by(organizador_id=current_user.id)
     
     if filtro == 'futuros':
         query = query.filter(Evento.data_hora >= datetime.now())
@@ -161,7 +456,7 @@ def minhas_reservas():
         agora = datetime.now()
         query = query.filter(
             Evento.data_hora <= agora,
-            Evento.data_hora + db.func.julianday(Evento.duracao_horas / 24.0) >= agora
+            Evento.data_hora_fim >= agora
         )
     
     eventos = query.order_by(Evento.data_hora.desc()).all()
@@ -192,19 +487,16 @@ def detalhes_evento(evento_id):
     """
     Ver detalhes de um evento específico
     """
-    evento = Evento.query.get_or_404(evento_id)
+    evento = Evento.obter_com_participantes(evento_id)
     
     # Verificar se o evento pertence ao organizador atual
     if evento.organizador_id != current_user.id:
         flash('❌ Você não tem permissão para ver este evento.', 'error')
         return redirect(url_for('organizador.minhas_reservas'))
     
-    # Buscar inscrições
-    inscricoes = Inscricao.query.filter_by(evento_id=evento_id).all()
-    
-    # Preparar dados dos participantes
+    # Preparar dados dos participantes (inscrições e alunos já carregados)
     participantes_data = []
-    for inscricao in inscricoes:
+    for inscricao in evento.inscricoes:
         participantes_data.append({
             'aluno': inscricao.aluno,
             'status': inscricao.status_presenca,
@@ -222,6 +514,9 @@ def detalhes_evento(evento_id):
 
 @organizador_bp.route('/reservas/<int:evento_id>/participantes')
 @role_required('organizador')
+@condicional(lambda evento_id: (
+    Evento.versao_dados(evento_id), Inscricao.versao_dados(evento_id), Usuario.versao_dados()
+))
 def lista_participantes(evento_id):
     """
     Listar participantes de um evento com QR Code
@@ -233,8 +528,8 @@ def lista_participantes(evento_id):
         flash('❌ Você não tem permissão para acessar este evento.', 'error')
         return redirect(url_for('organizador.minhas_reservas'))
     
-    # Buscar inscrições
-    inscricoes = Inscricao.query.filter_by(evento_id=evento_id).all()
+    # Buscar inscrições (com os alunos)
+    inscricoes = Inscricao.listar_por_evento(evento_id)
     
     # Preparar dados
     participantes_data = []
@@ -329,17 +624,11 @@ def editar_evento(evento_id):
                 salas=salas
             )
 
-        # Verificar conflito
-        eventos_sala = Evento.query.filter(
-            Evento.sala_id == evento.sala_id,
-            Evento.id != evento.id
-        ).all()
-
-        data_fim = data_hora + timedelta(hours=duracao)
+        with trava_sala(evento.sala_id):
+            # Verificar conflito
+            disponivel, ev = evento.sala.esta_disponivel_em(data_hora, duracao, ignorar_evento_id=evento.id)
 
-        for ev in eventos_sala:
-            ev_fim = ev.data_hora + timedelta(hours=ev.duracao_horas)
-            if (data_hora < ev_fim) and (ev.data_hora < data_fim):
+            if not disponivel:
                 flash(
                     f'❌ Conflito com o evento "{ev.nome_evento}" '
                     f'em {ev.data_hora.strftime("%d/%m/%Y às %H:%M")}.',
@@ -351,21 +640,24 @@ def editar_evento(evento_id):
                     salas=salas
                 )
 
-        # Atualizar evento
-        evento.nome_evento = nome_evento
-        evento.descricao = descricao if descricao else None
-        evento.data_hora = data_hora
-        evento.duracao_horas = duracao
-
-        try:
-            db.session.commit()
-            flash('✅ Evento atualizado com sucesso!', 'success')
-            return redirect(
-                url_for('organizador.detalhes_evento', evento_id=evento.id)
-            )
-        except Exception:
-            db.session.rollback()
-            flash('❌ Erro ao atualizar evento.', 'error')
+            # Atualizar evento
+            evento.nome_evento = nome_evento
+            evento.descricao = descricao if descricao else None
+            evento.data_hora = data_hora
+            evento.duracao_horas = duracao
+
+            try:
+                db.session.commit()
+                flash('✅ Evento atualizado com sucesso!', 'success')
+                return redirect(
+                    url_for('organizador.detalhes_evento', evento_id=evento.id)
+                )
+            except IntegrityError:
+                db.session.rollback()
+                flash('❌ Conflito de horário! A sala acabou de ser reservada neste horário.', 'error')
+            except Exception:
+                db.session.rollback()
+                flash('❌ Erro ao atualizar evento.', 'error')
 
     # GET
     return render_template(
@@ -378,6 +670,7 @@ def editar_evento(evento_id):
 
 @organizador_bp.route('/reservas/<int:evento_id>/excluir', methods=['POST'])
 @role_required('organizador')
+@escrita
 def excluir_evento(evento_id):
     """
     Soft-delete: marca evento como cancelado em vez de apagar
@@ -429,6 +722,7 @@ def gerar_link_inscricao(evento_id):
 
 @organizador_bp.route('/reservas/<int:evento_id>/cancelar', methods=['POST'])
 @role_required('organizador')
+@escrita
 def cancelar_evento(evento_id):
     """
     Soft-delete: marca evento como cancelado (POST only)
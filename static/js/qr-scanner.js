@@ -70,8 +70,9 @@ function onScanFailure(error) {
 // ==========================================
 
 function processarQRCode(qrCode) {
-    // Verificar formato esperado: AGENCEI_XXXXXXXXXXXXXXXX
-    if (!qrCode.startsWith('AGENCEI_')) {
+    // O QR Code dinâmico codifica "evento_id:totp_token"
+    const partes = qrCode.split(':');
+    if (partes.length !== 2) {
         mostrarErro('QR Code inválido. Use apenas QR Codes do sistema AGENCEI.');
         setTimeout(() => {
             initQRScanner();
@@ -80,29 +81,32 @@ function processarQRCode(qrCode) {
     }
     
     // Exibir loading
-    mostrarLoading('Verificando presença...');
+    mostrarLoading('Confirmando presença...');
     
-    // Enviar para o servidor
-    fetch('/aluno/confirmar-presenca-qr', {
+    const csrfInput = document.querySelector('input[name="csrf_token"]');
+    
+    // Validação + confirmação em uma única requisição
+    fetch('/aluno/checkin', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
+            'X-CSRFToken': csrfInput ? csrfInput.value : ''
         },
-        body: JSON.stringify({ qr_code: qrCode })
+        body: JSON.stringify({ evento_id: parseInt(partes[0]), totp_token: partes[1] })
     })
     .then(response => response.json())
     .then(data => {
         esconderLoading();
         
-        if (data.success) {
-            mostrarSucesso(data.message);
+        if (data.confirmado) {
+            mostrarSucesso(data.mensagem);
             
             // Redirecionar após 2 segundos
             setTimeout(() => {
                 window.location.href = '/aluno/meus-eventos';
             }, 2000);
         } else {
-            mostrarErro(data.message);
+            mostrarErro(data.mensagem);
             
             // Reiniciar scanner após 3 segundos
             setTimeout(() => {
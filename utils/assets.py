@@ -0,0 +1,149 @@
+"""
+Arquivos estáticos com hash no nome (cache imutável no navegador)
+
+Build (`flask --app app compilar-assets`):
+- CSS/JS minificados (rcssmin/rjsmin)
+- cada arquivo copiado para static/dist com o hash do conteúdo no nome
+  (css/style.css -> dist/css/style.<hash>.css)
+- variantes .br e .gz pré-geradas para os formatos de texto
+- static/dist/manifest.json com o nome original -> nome com hash
+
+Execução: com o manifesto presente, `url_for('static', filename='css/style.css')`
+passa a gerar a URL com hash, e esses arquivos saem com
+`Cache-Control: public, max-age=31536000, immutable` e na melhor codificação
+aceita pelo navegador. Mudou o conteúdo, muda a URL: visitas seguintes não
+fazem nenhuma requisição de estático. Sem manifesto (desenvolvimento), nada muda.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import shutil
+from flask import request, send_from_directory
+
+DIRETORIO = 'dist'
+MANIFESTO = 'manifest.json'
+
+# Cópias antigas de código dentro de static/ que não são assets
+_IGNORAR = {DIRETORIO, 'models', 'routes', '__pycache__'}
+_EXTENSOES = {'.css', '.js', '.png', '.ico', '.svg', '.jpg', '.jpeg', '.gif', '.webp', '.woff2'}
+_COMPRIMIR = {'.css', '.js', '.svg', '.ico'}
+
+# Ordem de preferência: (codificação, extensão do arquivo)
+_CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _minificar(extensao, conteudo):
+    """Minifica CSS/JS; demais arquivos saem como estão"""
+    if extensao == '.css':
+        import rcssmin
+        return rcssmin.cssmin(conteudo.decode('utf-8')).encode('utf-8')
+    if extensao == '.js':
+        import rjsmin
+        return rjsmin.jsmin(conteudo.decode('utf-8')).encode('utf-8')
+    return conteudo
+
+
+def _variantes(conteudo):
+    """{codificação: bytes} das variantes comprimidas que ficam menores que o original"""
+    import brotli
+
+    variantes = {
+        'br': brotli.compress(conteudo, quality=11),
+        'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0),
+    }
+    return {codificacao: dados for codificacao, dados in variantes.items() if len(dados) < len(conteudo)}
+
+
+def compilar_assets(pasta_static):
+    """
+    Gera static/dist e o manifesto a partir dos arquivos de static/.
+    Retorna o manifesto: {original: {'arquivo', 'codificacoes', 'bytes'}}
+    """
+    destino = os.path.join(pasta_static, DIRETORIO)
+    shutil.rmtree(destino, ignore_errors=True)
+    os.makedirs(destino)
+
+    manifesto = {}
+    for raiz, pastas, arquivos in os.walk(pasta_static):
+        if raiz == pasta_static:
+            pastas[:] = [pasta for pasta in pastas if pasta not in _IGNORAR]
+        for nome in sorted(arquivos):
+            base, extensao = os.path.splitext(nome)
+            if extensao.lower() not in _EXTENSOES:
+                continue
+            caminho = os.path.join(raiz, nome)
+            original = os.path.relpath(caminho, pasta_static).replace(os.sep, '/')
+
+            with open(caminho, 'rb') as arquivo:
+                conteudo = _minificar(extensao.lower(), arquivo.read())
+            resumo = hashlib.sha256(conteudo).hexdigest()[:12]
+            com_hash = posixpath.join(DIRETORIO, posixpath.dirname(original), f'{base}.{resumo}{extensao}')
+
+            saida = os.path.join(pasta_static, *com_hash.split('/'))
+            os.makedirs(os.path.dirname(saida), exist_ok=True)
+            with open(saida, 'wb') as arquivo:
+                arquivo.write(conteudo)
+
+            variantes = _variantes(conteudo) if extensao.lower() in _COMPRIMIR else {}
+            for codificacao, sufixo in _CODIFICACOES:
+                if codificacao in variantes:
+                    with open(saida + sufixo, 'wb') as arquivo:
+                        arquivo.write(variantes[codificacao])
+
+            manifesto[original] = {
+                'arquivo': com_hash,
+                'codificacoes': [codificacao for codificacao, _ in _CODIFICACOES if codificacao in variantes],
+                'bytes': {'original': os.path.getsize(caminho), 'minificado': len(conteudo),
+                          **{codificacao: len(dados) for codificacao, dados in variantes.items()}},
+            }
+
+    with open(os.path.join(destino, MANIFESTO), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, sort_keys=True)
+    return manifesto
+
+
+def configurar_assets(app):
+    """Liga as URLs com hash e o envio com cache imutável, se houver manifesto"""
+    if not app.config['ASSETS_FINGERPRINT']:
+        return
+    caminho = os.path.join(app.static_folder, DIRETORIO, MANIFESTO)
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, encoding='utf-8') as arquivo:
+        manifesto = json.load(arquivo)
+
+    com_hash = {dados['arquivo']: dados['codificacoes'] for dados in manifesto.values()}
+    nomes = {original: dados['arquivo'] for original, dados in manifesto.items()}
+    max_age = app.config['ASSETS_MAX_AGE']
+    app.extensions['assets'] = nomes
+
+    @app.url_defaults
+    def url_com_hash(endpoint, valores):
+        if endpoint == 'static' and valores.get('filename') in nomes:
+            valores['filename'] = nomes[valores['filename']]
+
+    def servir_static(filename):
+        codificacoes = com_hash.get(filename)
+        if codificacoes is None:
+            return app.send_static_file(filename)
+
+        aceitas = request.accept_encodings
+        codificacao = next((c for c in codificacoes if aceitas[c]), None)
+        sufixo = dict(_CODIFICACOES).get(codificacao, '')
+        resposta = send_from_directory(
+            app.static_folder, filename + sufixo,
+            mimetype=mimetypes.guess_type(filename)[0],  # tipo do original, não do .br/.gz
+            max_age=max_age, conditional=True
+        )
+        if codificacao:
+            resposta.headers['Content-Encoding'] = codificacao
+        if codificacoes:
+            resposta.vary.add('Accept-Encoding')
+        resposta.cache_control.public = True
+        resposta.cache_control.immutable = True
+        return resposta
+
+    app.view_functions['static'] = servir_static
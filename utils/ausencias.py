@@ -0,0 +1,84 @@
+"""
+Varredura de ausências
+Depois que um evento termina e a janela de check-in fecha, as inscrições
+que continuam 'Aguardando' viram 'Ausente'.
+
+- Um UPDATE por lote de eventos (nada de carregar inscrições na memória)
+- Idempotente: só altera linhas ainda 'Aguardando'
+- Retomável: a marca d'água (fim do evento, id) fica em progresso_tarefa
+  e é gravada no mesmo commit de cada lote
+
+Execução: `flask --app app marcar-ausentes` (cron, ou pela fila de tarefas)
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select, update
+from extensions import db
+from models.evento import Evento
+from models.inscricao import Inscricao
+from models.progresso_tarefa import ProgressoTarefa
+from utils.db import transacao_escrita
+
+TAREFA = 'marcar_ausentes'
+
+
+@transacao_escrita()
+def marcar_ausentes(janela_minutos, tamanho_lote=200, agora=None, desde_o_inicio=False):
+    """
+    Marca como ausentes as inscrições pendentes dos eventos cuja janela de
+    check-in (fim + janela_minutos) já fechou.
+    desde_o_inicio=True ignora a marca d'água e revisita todos os eventos.
+    Retorna {'lotes', 'eventos', 'inscricoes'}
+    """
+    limite = (agora or datetime.now()) - timedelta(minutes=janela_minutos)
+    fim = Evento.data_hora_fim
+
+    progresso = ProgressoTarefa.obter(TAREFA)
+    if desde_o_inicio:
+        progresso.marca_data = progresso.marca_id = None
+
+    resumo = {'lotes': 0, 'eventos': 0, 'inscricoes': 0}
+    while True:
+        consulta = (
+            select(Evento.id, fim.label('fim'))
+            .where(
+                Evento.data_hora.isnot(None),
+                Evento.duracao_horas.isnot(None),
+                Evento.status != 'cancelado',
+                fim <= limite
+            )
+            .order_by(fim, Evento.id)
+            .limit(tamanho_lote)
+        )
+        if progresso.marca_data is not None:
+            consulta = consulta.where(or_(
+                fim > progresso.marca_data,
+                and_(fim == progresso.marca_data, Evento.id > progresso.marca_id)
+            ))
+
+        lote = db.session.execute(consulta).all()
+        if not lote:
+            break
+
+        resultado = db.session.execute(
+            update(Inscricao)
+            .where(
+                Inscricao.evento_id.in_([evento_id for evento_id, _ in lote]),
+                Inscricao.status_presenca == Inscricao.STATUS_AGUARDANDO
+            )
+            .values(status_presenca=Inscricao.STATUS_AUSENTE)
+            .execution_options(synchronize_session=False)
+        )
+
+        ultimo_id, ultimo_fim = lote[-1]
+        progresso.avancar(ultimo_fim, ultimo_id, resultado.rowcount)
+        db.session.commit()
+
+        resumo['lotes'] += 1
+        resumo['eventos'] += len(lote)
+        resumo['inscricoes'] += resultado.rowcount
+
+        if len(lote) < tamanho_lote:
+            break
+
+    db.session.commit()
+    return resumo
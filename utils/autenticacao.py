@@ -0,0 +1,90 @@
+"""
+Verificação de login (auth.login)
+
+- Uma consulta só, pelas colunas necessárias (id, hash, ativo, tipo); no
+  PostgreSQL o índice ix_usuario_cpf as inclui (index-only scan)
+- Custo constante: CPF inexistente também calcula um hash (contra um hash
+  falso), então a resposta não revela se o CPF existe
+- O hash roda em um executor limitado por processo: muitos logins ao mesmo
+  tempo esperam na fila em vez de ocupar todas as threads com CPU. No worker
+  gevent o executor usa threads nativas (threadpool do gevent): o hash não
+  para os demais greenlets
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import select
+from werkzeug.security import check_password_hash, generate_password_hash
+from extensions import db
+from utils.db import cooperativo
+from models.user import Usuario
+
+# Resultados de autenticar()
+OK = 'ok'
+INVALIDO = 'invalido'      # CPF inexistente ou senha errada (indistinguíveis)
+DESATIVADO = 'desativado'  # senha certa, usuário desativado
+OCUPADO = 'ocupado'        # fila de verificação cheia
+
+
+class _Verificador:
+    """Executor de hashes com fila limitada (criado no primeiro uso, já no processo do worker)"""
+
+    def __init__(self, threads, fila):
+        if cooperativo():
+            from gevent.threadpool import ThreadPoolExecutor as Executor
+            self.executor = Executor(max_workers=threads)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='login')
+        self.vagas = threading.BoundedSemaphore(threads + fila)
+        self.hash_falso = generate_password_hash('hash-falso-para-cpf-inexistente')
+
+    def verificar(self, hash_senha, senha, espera_segundos):
+        """check_password_hash no executor; None se a fila estiver cheia"""
+        if not self.vagas.acquire(timeout=espera_segundos):
+            return None
+        try:
+            return self.executor.submit(check_password_hash, hash_senha or self.hash_falso, senha).result()
+        finally:
+            self.vagas.release()
+
+
+_verificador = None
+_verificador_guarda = threading.Lock()
+
+
+def _obter_verificador():
+    global _verificador
+    if _verificador is None:
+        with _verificador_guarda:
+            if _verificador is None:
+                _verificador = _Verificador(
+                    current_app.config['LOGIN_HASH_THREADS'],
+                    current_app.config['LOGIN_HASH_FILA']
+                )
+    return _verificador
+
+
+def autenticar(cpf, senha):
+    """
+    Confere CPF e senha
+    Retorna (resultado, usuario_id, tipo); usuario_id/tipo só quando OK
+    """
+    linha = db.session.execute(
+        select(Usuario.id, Usuario.senha, Usuario.ativo, Usuario.tipo)
+        .where(Usuario.cpf == cpf)
+    ).first()
+    # O hash é lento de propósito: não fica com a transação de leitura aberta
+    db.session.rollback()
+
+    senha_confere = _obter_verificador().verificar(
+        linha.senha if linha else None,
+        senha,
+        current_app.config['LOGIN_HASH_ESPERA_SEGUNDOS']
+    )
+    if senha_confere is None:
+        return OCUPADO, None, None
+    if linha is None or not senha_confere:
+        return INVALIDO, None, None
+    if not linha.ativo:
+        return DESATIVADO, None, None
+    return OK, linha.id, linha.tipo
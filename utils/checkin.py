@@ -0,0 +1,104 @@
+"""
+Regras de check-in (confirmação de presença via QR Code TOTP)
+Compartilhadas entre as views Flask e o serviço assíncrono (checkin_asgi.py),
+para que os dois caminhos devolvam exatamente o mesmo contrato JSON.
+"""
+
+# Códigos de resultado (estáveis — o frontend decide pelo código, não pela mensagem)
+CONFIRMADO = 'confirmado'
+VALIDADO = 'validado'  # QR válido, presença ainda não confirmada (aluno.validar_qr)
+DADOS_INVALIDOS = 'dados_invalidos'
+NAO_AUTENTICADO = 'nao_autenticado'
+SEM_PERMISSAO = 'sem_permissao'
+EVENTO_NAO_ENCONTRADO = 'evento_nao_encontrado'
+TOKEN_INVALIDO = 'token_invalido'
+NAO_INSCRITO = 'nao_inscrito'
+JA_CONFIRMADO = 'ja_confirmado'
+FORA_DA_JANELA = 'fora_da_janela'
+ERRO = 'erro'
+
+_HTTP_STATUS = {
+    CONFIRMADO: 200,
+    VALIDADO: 200,
+    DADOS_INVALIDOS: 400,
+    NAO_AUTENTICADO: 401,
+    SEM_PERMISSAO: 403,
+    EVENTO_NAO_ENCONTRADO: 404,
+    TOKEN_INVALIDO: 422,
+    NAO_INSCRITO: 422,
+    JA_CONFIRMADO: 409,
+    FORA_DA_JANELA: 422,
+    ERRO: 500,
+}
+
+_MENSAGENS = {
+    CONFIRMADO: 'Presença confirmada com sucesso!',
+    VALIDADO: 'QR Code válido',
+    DADOS_INVALIDOS: 'Dados inválidos',
+    NAO_AUTENTICADO: 'Você precisa estar logado.',
+    SEM_PERMISSAO: 'Você não tem permissão para confirmar presença.',
+    EVENTO_NAO_ENCONTRADO: 'Evento não encontrado',
+    TOKEN_INVALIDO: 'Código QR expirado. Peça para o organizador atualizar.',
+    NAO_INSCRITO: 'Você não está inscrito neste evento',
+    JA_CONFIRMADO: 'Presença já confirmada anteriormente',
+    FORA_DA_JANELA: 'Fora da janela de confirmação',
+    ERRO: 'Erro ao confirmar presença.',
+}
+
+
+def ler_payload(data):
+    """
+    Extrai (evento_id, totp_token) do JSON recebido.
+    Retorna (None, None) se os dados forem inválidos.
+    """
+    if not isinstance(data, dict):
+        return None, None
+
+    totp_token = str(data.get('totp_token') or '').strip()
+    try:
+        evento_id = int(data.get('evento_id'))
+    except (ValueError, TypeError):
+        return None, None
+
+    if not totp_token:
+        return None, None
+
+    return evento_id, totp_token
+
+
+def validar_evento(evento, totp_token, minutos_antes=30, minutos_depois=30):
+    """
+    Verificações que não dependem da inscrição (sem I/O).
+    Retorna o código de erro ou None se o check-in pode prosseguir.
+    """
+    if evento is None:
+        return EVENTO_NAO_ENCONTRADO
+
+    if not evento.validar_token_temporal(totp_token):
+        return TOKEN_INVALIDO
+
+    if not evento.pode_confirmar_presenca(minutos_antes, minutos_depois):
+        return FORA_DA_JANELA
+
+    return None
+
+
+def resposta(codigo, evento=None):
+    """
+    Monta o corpo JSON e o status HTTP de um resultado de check-in.
+    Retorna (dict, status_http).
+    """
+    corpo = {
+        'confirmado': codigo == CONFIRMADO,
+        'codigo': codigo,
+        'mensagem': _MENSAGENS[codigo],
+    }
+
+    if evento is not None and codigo != EVENTO_NAO_ENCONTRADO:
+        corpo['evento_id'] = evento.id
+        corpo['evento'] = {
+            'nome': evento.nome_evento,
+            'data_hora': evento.data_hora.strftime('%d/%m/%Y às %H:%M') if evento.data_hora else 'N/A',
+        }
+
+    return corpo, _HTTP_STATUS[codigo]
@@ -0,0 +1,86 @@
+"""
+Comandos de linha de comando (flask --app app <comando>)
+"""
+import click
+from flask import current_app
+
+
+def registrar_comandos(app):
+    """Registra os comandos no app (chamado pelo create_app)"""
+
+    @app.cli.command('marcar-ausentes')
+    @click.option('--lote', default=None, type=int, help='Eventos por UPDATE')
+    @click.option('--desde-o-inicio', is_flag=True, help="Ignora a marca d'água e revisita todos os eventos")
+    def marcar_ausentes_comando(lote, desde_o_inicio):
+        """Marca como ausentes as inscrições pendentes de eventos encerrados"""
+        from utils.ausencias import marcar_ausentes
+
+        resumo = marcar_ausentes(
+            current_app.config['QR_CODE_JANELA_DEPOIS_MINUTOS'],
+            tamanho_lote=lote or current_app.config['AUSENCIAS_TAMANHO_LOTE'],
+            desde_o_inicio=desde_o_inicio
+        )
+        click.echo(
+            f"✅ {resumo['inscricoes']} inscrição(ões) marcada(s) como ausente "
+            f"em {resumo['eventos']} evento(s) ({resumo['lotes']} lote(s))"
+        )
+
+    @app.cli.command('atualizar-resumos')
+    @click.option('--desde-o-inicio', is_flag=True, help='Apaga os resumos e recalcula todos os eventos')
+    def atualizar_resumos_comando(desde_o_inicio):
+        """Atualiza os resumos de presença dos relatórios do admin"""
+        from utils.resumos import atualizar_resumos
+
+        resumo = atualizar_resumos(
+            tamanho_lote=current_app.config['RESUMOS_TAMANHO_LOTE'],
+            desde_o_inicio=desde_o_inicio
+        )
+        click.echo(
+            f"✅ {resumo['eventos_alterados']} de {resumo['eventos_verificados']} "
+            f"evento(s) verificado(s) tiveram o resumo atualizado"
+        )
+
+    @app.cli.command('compilar-assets')
+    def compilar_assets_comando():
+        """Minifica e grava os estáticos com hash no nome em static/dist (passo de build)"""
+        from utils.assets import compilar_assets
+
+        manifesto = compilar_assets(current_app.static_folder)
+        for original, dados in sorted(manifesto.items()):
+            tamanhos = ', '.join(f'{chave} {valor}' for chave, valor in dados['bytes'].items())
+            click.echo(f"  {original} -> {dados['arquivo']} ({tamanhos} bytes)")
+        click.echo(f"✅ {len(manifesto)} arquivo(s) em static/dist")
+
+    @app.cli.command('compilar-templates')
+    def compilar_templates_comando():
+        """Pré-compila os templates no cache de bytecode (passo de build)"""
+        from utils.templates import carregar_templates
+
+        if not current_app.config['JINJA_BYTECODE_CACHE']:
+            raise click.ClickException('JINJA_BYTECODE_CACHE está desligado')
+        total = carregar_templates(current_app)
+        click.echo(f"✅ {total} template(s) compilado(s) em {current_app.jinja_env.bytecode_cache.directory}")
+
+    @app.cli.command('worker')
+    @click.option('--tipos', default=None, help='Tipos de tarefa atendidos, separados por vírgula (padrão: todos)')
+    @click.option('--threads', default=1, type=int, help='Tarefas executadas em paralelo neste processo')
+    @click.option('--intervalo', default=None, type=float, help='Segundos entre consultas com a fila vazia')
+    @click.option('--uma-vez', is_flag=True, help='Processa o que estiver na fila e sai')
+    def worker_comando(tipos, threads, intervalo, uma_vez):
+        """Executa as tarefas em segundo plano da fila (tabela tarefa)"""
+        from utils.fila import rodar_worker, tipos_registrados
+
+        registrados = tipos_registrados()
+        selecionados = [t.strip() for t in tipos.split(',')] if tipos else list(registrados)
+        desconhecidos = set(selecionados) - set(registrados)
+        if desconhecidos:
+            raise click.BadParameter(f"tipos desconhecidos: {', '.join(sorted(desconhecidos))}", param_hint='--tipos')
+
+        click.echo(f"👷 Worker atendendo: {', '.join(selecionados)}")
+        rodar_worker(
+            current_app._get_current_object(),
+            tipos=selecionados,
+            intervalo=intervalo or current_app.config['TAREFAS_INTERVALO_SEGUNDOS'],
+            threads=threads,
+            uma_vez=uma_vez
+        )
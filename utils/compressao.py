@@ -0,0 +1,113 @@
+"""
+Compressão das respostas HTML/JSON (gzip ou brotli, conforme Accept-Encoding)
+
+- Respostas comuns são comprimidas de uma vez; respostas em streaming
+  (is_streamed) são comprimidas pedaço a pedaço, com flush a cada pedaço,
+  para o navegador continuar recebendo o conteúdo aos poucos
+- Arquivos enviados com send_file (direct_passthrough) e respostas que já
+  têm Content-Encoding (estáticos pré-comprimidos, utils/assets.py) passam direto
+- Corpos menores que COMPRESSAO_MINIMO_BYTES não compensam o custo
+"""
+import gzip
+import zlib
+import brotli
+from flask import request
+
+_SEM_CORPO = {204, 304}
+
+
+def _gzip(nivel):
+    # wbits 16 + MAX_WBITS: cabeçalho e rodapé gzip
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        lambda dados: compressor.compress(dados) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        lambda: compressor.flush(zlib.Z_FINISH),
+    )
+
+
+def _brotli(nivel):
+    compressor = brotli.Compressor(quality=nivel)
+    return (
+        lambda dados: compressor.process(dados) + compressor.flush(),
+        compressor.finish,
+    )
+
+
+class Compressao:
+    """Extensão Flask no mesmo padrão das demais (instância em extensions.py)"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESSAO_ATIVA', True)
+        app.config.setdefault('COMPRESSAO_TIPOS', ('text/html', 'application/json'))
+        app.config.setdefault('COMPRESSAO_MINIMO_BYTES', 500)
+        app.config.setdefault('COMPRESSAO_NIVEL_GZIP', 6)
+        app.config.setdefault('COMPRESSAO_NIVEL_BROTLI', 4)
+
+        if not app.config['COMPRESSAO_ATIVA']:
+            return
+
+        self.tipos = frozenset(app.config['COMPRESSAO_TIPOS'])
+        self.minimo = app.config['COMPRESSAO_MINIMO_BYTES']
+        nivel_brotli = app.config['COMPRESSAO_NIVEL_BROTLI']
+        nivel_gzip = app.config['COMPRESSAO_NIVEL_GZIP']
+        # codificação -> (compressão de uma vez, compressor incremental)
+        self.compressores = {
+            'br': (lambda dados: brotli.compress(dados, quality=nivel_brotli), lambda: _brotli(nivel_brotli)),
+            'gzip': (lambda dados: gzip.compress(dados, nivel_gzip), lambda: _gzip(nivel_gzip)),
+        }
+        app.after_request(self._comprimir)
+
+    def _codificacao(self):
+        """Melhor codificação aceita pelo cliente (brotli antes de gzip), ou None"""
+        aceitas = request.accept_encodings
+        return next((nome for nome in self.compressores if aceitas[nome]), None)
+
+    def _comprimir(self, response):
+        if (
+            response.mimetype not in self.tipos
+            or response.status_code in _SEM_CORPO
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        codificacao = self._codificacao()
+        if codificacao is None or request.method == 'HEAD':
+            return response
+
+        if response.is_streamed:
+            pedacos = response.response
+            comprimir, finalizar = self.compressores[codificacao][1]()
+
+            def corpo():
+                try:
+                    for pedaco in pedacos:
+                        if isinstance(pedaco, str):
+                            pedaco = pedaco.encode('utf-8')
+                        if pedaco:
+                            yield comprimir(pedaco)
+                    yield finalizar()
+                finally:
+                    # stream_with_context encerra o contexto no close() do iterável original
+                    if hasattr(pedacos, 'close'):
+                        pedacos.close()
+
+            response.response = corpo()
+            response.headers.pop('Content-Length', None)
+        else:
+            dados = response.get_data()
+            if len(dados) < self.minimo:
+                return response
+            response.set_data(self.compressores[codificacao][0](dados))
+
+        response.headers['Content-Encoding'] = codificacao
+        # O mesmo recurso comprimido não é byte a byte igual: só ETags fracos continuam valendo
+        etag, fraco = response.get_etag()
+        if etag and not fraco:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,116 @@
+"""
+CPF: validação, formatação e armazenamento como inteiro
+
+No banco o CPF é um BIGINT (índice menor e comparação mais rápida que
+VARCHAR(11)); para o resto da aplicação continua sendo a string de 11
+dígitos com zeros à esquerda (tipo `CPF`, abaixo).
+
+A validação trabalha sobre o inteiro: os dígitos saem por divmod e o
+dígito verificador vem de uma tabela, sem montar listas ou strings.
+"""
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+MAIOR_CPF = 99_999_999_999
+
+# Resto da soma ponderada (mod 11) -> dígito verificador
+_DIGITO_VERIFICADOR = tuple(0 if resto < 2 else 11 - resto for resto in range(11))
+
+# 000.000.000-00, 111.111.111-11, ...: passam no cálculo mas são inválidos
+_REPETIDOS = frozenset(digito * 11_111_111_111 for digito in range(10))
+
+# Caracteres de máscara removidos antes da conversão
+_SEM_MASCARA = str.maketrans('', '', '.- /')
+
+
+def para_inteiro(cpf):
+    """
+    CPF (int, ou str com ou sem máscara) -> int; None se o texto não tiver
+    exatamente 11 dígitos ou o número estiver fora da faixa
+    """
+    if isinstance(cpf, int):
+        return cpf if 0 <= cpf <= MAIOR_CPF else None
+    texto = cpf.translate(_SEM_MASCARA)
+    if len(texto) != 11 or not texto.isdigit():
+        texto = ''.join(filter(str.isdigit, texto))
+        if len(texto) != 11:
+            return None
+    return int(texto)
+
+
+def digitos_verificadores(base):
+    """Os dois dígitos verificadores (como inteiro de 0 a 99) dos 9 primeiros dígitos"""
+    soma1 = soma2 = 0
+    # Da direita para a esquerda: pesos 2..10 no primeiro dígito, 3..11 no segundo
+    for peso in range(2, 11):
+        base, digito = divmod(base, 10)
+        soma1 += digito * peso
+        soma2 += digito * (peso + 1)
+    primeiro = _DIGITO_VERIFICADOR[soma1 % 11]
+    return primeiro * 10 + _DIGITO_VERIFICADOR[(soma2 + primeiro * 2) % 11]
+
+
+def completar(base):
+    """CPF completo (int) a partir dos 9 primeiros dígitos"""
+    return base * 100 + digitos_verificadores(base)
+
+
+def numero_valido(numero):
+    """Confere os dígitos verificadores de um CPF já convertido para int"""
+    if numero in _REPETIDOS or not 0 <= numero <= MAIOR_CPF:
+        return False
+    base, verificadores = divmod(numero, 100)
+    return verificadores == digitos_verificadores(base)
+
+
+def validar(cpf):
+    """True se o CPF (int ou str, com ou sem máscara) for válido"""
+    numero = para_inteiro(cpf)
+    return numero is not None and numero_valido(numero)
+
+
+def validar_lote(cpfs):
+    """
+    Validação em massa (importações): converte e confere cada CPF uma vez.
+    Retorna (validos: [int], invalidos: [valor original]); repetidos contam uma vez
+    """
+    validos = {}
+    invalidos = []
+    for cpf in cpfs:
+        numero = para_inteiro(cpf)
+        if numero is not None and numero_valido(numero):
+            validos.setdefault(numero, None)
+        else:
+            invalidos.append(cpf)
+    return list(validos), invalidos
+
+
+def formatar(cpf):
+    """000.000.000-00"""
+    texto = f'{para_inteiro(cpf) or 0:011d}'
+    return f'{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}'
+
+
+class CPF(TypeDecorator):
+    """
+    Coluna CPF: BIGINT no banco, str de 11 dígitos no Python.
+    Parâmetros podem ser str (com ou sem máscara) ou int; um valor que
+    não é CPF vira NULL e simplesmente não encontra nada.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return para_inteiro(value)
+
+    def process_literal_param(self, value, dialect):
+        numero = self.process_bind_param(value, dialect)
+        return 'NULL' if numero is None else str(numero)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # int(): bancos SQLite antigos ainda devolvem a coluna como texto
+        return f'{int(value):011d}'
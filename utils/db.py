@@ -0,0 +1,424 @@
+"""
+Utilitários de banco de dados
+Normalização de URL, pool de conexões, aritmética de datas portável
+e travas por sala/evento (SQLite em desenvolvimento, PostgreSQL em produção)
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app
+from sqlalchemy import DateTime, Float, String, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import raiseload
+from sqlalchemy.pool import Pool
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Primeira chave dos advisory locks (a segunda é o id da sala/evento)
+CHAVE_TRAVA_RESERVA = 5301
+CHAVE_TRAVA_INSCRICAO = 5302
+CHAVE_TRAVA_TAREFA = 5303
+
+
+def normalizar_database_url(url):
+    """
+    Ajusta a URL recebida do provedor para o formato do SQLAlchemy.
+    Render/Heroku entregam `postgres://`, que o SQLAlchemy 2.x não aceita.
+    """
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def opcoes_engine(url):
+    """
+    Opções do engine de acordo com o backend.
+    No PostgreSQL o pool é dimensionado por worker do gunicorn:
+    total de conexões = workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    O padrão acompanha GUNICORN_THREADS: cada thread do worker segura uma conexão.
+    """
+    if not url or url.startswith('sqlite'):
+        return {}
+
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', max(5, int(os.environ.get('GUNICORN_THREADS', 1))))),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
+_pools_protegidos = False
+
+
+def proteger_pools_contra_fork():
+    """
+    Uma conexão nunca é usada fora do processo que a abriu (workers do
+    gunicorn com preload, multiprocessing): cada conexão guarda o pid de
+    origem e, se sair do pool em outro processo, é descartada sem ser
+    fechada (o socket continua sendo do processo pai) e o pool abre outra.
+    Listener na classe Pool: vale para todos os engines do processo.
+    """
+    global _pools_protegidos
+    if _pools_protegidos:
+        return
+    event.listen(Pool, 'connect', _registrar_pid)
+    event.listen(Pool, 'checkout', _conferir_pid)
+    _pools_protegidos = True
+
+
+def _registrar_pid(conexao_dbapi, registro):
+    registro.info['pid'] = os.getpid()
+
+
+def _conferir_pid(conexao_dbapi, registro, proxy):
+    pid = os.getpid()
+    origem = registro.info.get('pid')
+    if origem is not None and origem != pid:
+        # Sem a conexão no registro, o pool não a fecha (não é deste processo)
+        registro.dbapi_connection = proxy.dbapi_connection = None
+        raise exc.DisconnectionError(f'Conexão aberta pelo processo {origem}, usada pelo processo {pid}')
+
+
+def cooperativo():
+    """
+    True dentro de um worker gevent (biblioteca padrão com monkey patch):
+    esperas precisam ceder a vez aos outros greenlets em vez de bloquear em C
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def _esperar(tentar, espera_segundos):
+    """Repete `tentar()` com pausas crescentes (cooperativas no gevent) até conseguir ou estourar o prazo"""
+    prazo = time.monotonic() + espera_segundos
+    pausa = 0.001
+    while not tentar():
+        if time.monotonic() > prazo:
+            return False
+        time.sleep(pausa)
+        pausa = min(pausa * 2, 0.05)
+    return True
+
+
+# Dentro de transacao_escrita(): o próximo BEGIN no SQLite é IMMEDIATE
+_escrita = ContextVar('transacao_escrita', default=False)
+
+
+def configurar_sqlite(engine, espera_segundos):
+    """
+    SQLite com várias threads/greenlets por worker (gthread, gevent):
+    - WAL: leituras não esperam a escrita em andamento, nem o contrário
+    - transações abrem com BEGIN comum (só leitura, sem trava); dentro de
+      transacao_escrita() abrem com BEGIN IMMEDIATE, pegando a trava de
+      escrita logo no início: com o BEGIN comum, uma transação que lê e depois
+      grava recebe "database is locked" na hora (sem esperar) se outra gravou no meio
+    - a espera pela trava vai até `espera_segundos`; no gevent é feita em
+      Python, cedendo a vez (o busy_timeout do SQLite dorme em C e pararia o worker)
+    Sem efeito nos demais bancos.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _conectar(conexao_dbapi, registro):
+        # O driver não abre transações por conta própria: o BEGIN vem de _iniciar
+        conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={0 if cooperativo() else int(espera_segundos * 1000)}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _iniciar(conexao):
+        if not _escrita.get():
+            conexao.exec_driver_sql('BEGIN')
+            return
+        if not cooperativo():
+            conexao.exec_driver_sql('BEGIN IMMEDIATE')
+            return
+
+        erros = []
+
+        def tentar():
+            try:
+                conexao.exec_driver_sql('BEGIN IMMEDIATE')
+                return True
+            except exc.OperationalError as erro:
+                if 'locked' not in str(erro):
+                    raise
+                erros[:] = [erro]
+                return False
+
+        if not _esperar(tentar, espera_segundos):
+            raise erros[0]
+
+
+@contextmanager
+def transacao_escrita():
+    """
+    Unidade de trabalho que grava (o commit acontece dentro do bloco):
+
+        with transacao_escrita():
+            sala = db.session.get(Sala, sala_id)
+            sala.ativa = False
+            db.session.commit()
+
+    SQLite: a transação de leitura já aberta na sessão é encerrada e a
+    próxima abre com BEGIN IMMEDIATE, então o que o bloco lê não muda até o
+    commit. Entre antes de alterar objetos e deixe trabalho lento (hash de
+    senha) fora do bloco: a trava de escrita vale para todos os workers.
+    Blocos aninhados fazem parte da unidade externa. Nos demais bancos só
+    marca o trecho.
+    """
+    from extensions import db
+
+    if _escrita.get():
+        yield
+        return
+    if db.engine.dialect.name == 'sqlite':
+        db.session.commit()
+    marca = _escrita.set(True)
+    try:
+        yield
+    finally:
+        _escrita.reset(marca)
+
+
+def url_assincrona(url):
+    """
+    Converte a URL síncrona do SQLAlchemy para o driver assíncrono equivalente
+    (aiosqlite no SQLite, asyncpg no PostgreSQL).
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend == 'sqlite':
+        return url.set(drivername='sqlite+aiosqlite')
+    if backend == 'postgresql':
+        return url.set(drivername='postgresql+asyncpg')
+
+    raise ValueError(f'Backend sem driver assíncrono configurado: {backend}')
+
+
+def carregamento(*estrategias):
+    """
+    Opções de carregamento das consultas de listagem: as estratégias
+    informadas (joinedload/selectinload) e, com SQL_RAISELOAD (desenvolvimento
+    e testes), raiseload em todos os outros relacionamentos — também nos
+    objetos trazidos pelas próprias estratégias. Um relacionamento que o
+    template usa sem a consulta ter carregado vira erro em vez de N+1.
+    sql_only: many-to-one já presente na sessão continua liberado
+
+    Exemplo:
+        Evento.query.options(*carregamento(joinedload(Evento.sala)))
+    """
+    if not current_app.config.get('SQL_RAISELOAD'):
+        return estrategias
+    return (
+        *(estrategia.raiseload('*', sql_only=True) for estrategia in estrategias),
+        raiseload('*', sql_only=True),
+    )
+
+
+class adicionar_horas(FunctionElement):
+    """
+    Expressão SQL: `data_hora + horas` (horas pode ser coluna Float).
+    Compilada de forma específica para cada dialeto.
+
+    Exemplo:
+        Evento.query.filter(adicionar_horas(Evento.data_hora, Evento.duracao_horas) >= agora)
+    """
+    type = DateTime()
+    name = 'adicionar_horas'
+    inherit_cache = True
+
+
+@compiles(adicionar_horas)
+def _adicionar_horas_padrao(element, compiler, **kw):
+    data_hora, horas = list(element.clauses)
+    return "(%s + %s * INTERVAL '1 hour')" % (
+        compiler.process(data_hora, **kw),
+        compiler.process(horas, **kw),
+    )
+
+
+@compiles(adicionar_horas, 'sqlite')
+def _adicionar_horas_sqlite(element, compiler, **kw):
+    # Mesmo formato de texto que o SQLAlchemy grava para DateTime no SQLite,
+    # para que comparações com parâmetros continuem corretas
+    data_hora, horas = list(element.clauses)
+    return "strftime('%%Y-%%m-%%d %%H:%%M:%%f000', %s, '+' || (%s * 3600) || ' seconds')" % (
+        compiler.process(data_hora, **kw),
+        compiler.process(horas, **kw),
+    )
+
+
+class segundos_epoch(FunctionElement):
+    """
+    Expressão SQL: data/hora (sem fuso) em segundos desde 1970-01-01.
+    Para trazer datas do banco já como números (ex.: arrays NumPy),
+    sem converter um datetime Python por linha.
+    """
+    type = Float()
+    name = 'segundos_epoch'
+    inherit_cache = True
+
+
+@compiles(segundos_epoch)
+def _segundos_epoch_padrao(element, compiler, **kw):
+    data_hora, = list(element.clauses)
+    return "EXTRACT(EPOCH FROM %s)" % compiler.process(data_hora, **kw)
+
+
+@compiles(segundos_epoch, 'sqlite')
+def _segundos_epoch_sqlite(element, compiler, **kw):
+    data_hora, = list(element.clauses)
+    return "CAST(strftime('%%s', %s) AS INTEGER)" % compiler.process(data_hora, **kw)
+
+
+class cpf_texto(FunctionElement):
+    """
+    Expressão SQL: coluna CPF (BIGINT) como texto de 11 dígitos, com zeros
+    à esquerda (busca por trecho do CPF com LIKE).
+    """
+    type = String()
+    name = 'cpf_texto'
+    inherit_cache = True
+
+
+@compiles(cpf_texto)
+def _cpf_texto_padrao(element, compiler, **kw):
+    cpf, = list(element.clauses)
+    return "LPAD(CAST(%s AS TEXT), 11, '0')" % compiler.process(cpf, **kw)
+
+
+@compiles(cpf_texto, 'sqlite')
+def _cpf_texto_sqlite(element, compiler, **kw):
+    cpf, = list(element.clauses)
+    return "printf('%%011d', %s)" % compiler.process(cpf, **kw)
+
+
+# ================================================================
+#  Travas por sala / por evento
+# ================================================================
+_travas_processo = {}
+_travas_guarda = threading.Lock()
+
+
+def trava_sala(sala_id):
+    """
+    Serializa "verificar conflito + gravar" das reservas de uma mesma sala.
+    Salas diferentes nunca esperam umas pelas outras.
+    O commit deve acontecer dentro do bloco:
+
+        with trava_sala(sala.id):
+            disponivel, _ = sala.esta_disponivel_em(inicio, duracao)
+            ...
+            db.session.commit()
+
+    PostgreSQL: pg_advisory_xact_lock, liberado no commit/rollback da transação
+    (a constraint de exclusão em evento continua sendo a garantia final).
+    SQLite: flock em instance/travas/sala-<id>.lock, que vale entre os workers
+    do gunicorn; sem fcntl (Windows), a trava vale apenas dentro do processo.
+    A transação em andamento é encerrada (commit) antes da espera; o bloco
+    em si é uma transacao_escrita().
+    """
+    return _trava(CHAVE_TRAVA_RESERVA, 'sala', sala_id)
+
+
+def trava_evento(evento_id):
+    """
+    Serializa as alterações de vagas de um evento (inscrição, cancelamento
+    e promoção da lista de espera). Mesma mecânica de trava_sala.
+    """
+    return _trava(CHAVE_TRAVA_INSCRICAO, 'evento', evento_id)
+
+
+@contextmanager
+def trava_tipo_tarefa(tipo):
+    """
+    Serializa as reservas de tarefas de um mesmo tipo, para que a contagem
+    das que estão em execução e o UPDATE da reserva valham juntos.
+    O commit deve acontecer dentro do bloco.
+
+    PostgreSQL: pg_advisory_xact_lock pelo hash do nome do tipo, liberado no
+    commit/rollback; sem ela, no READ COMMITTED dois workers contam antes de
+    qualquer um gravar e os dois reservam.
+    SQLite: o BEGIN IMMEDIATE da transacao_escrita() já serializa quem grava.
+    """
+    from extensions import db
+
+    with transacao_escrita():
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(
+                text('SELECT pg_advisory_xact_lock(:chave, hashtext(:tipo))'),
+                {'chave': CHAVE_TRAVA_TAREFA, 'tipo': tipo}
+            )
+        yield
+
+
+@contextmanager
+def _trava(chave, tipo, registro_id):
+    from extensions import db
+
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(
+            text('SELECT pg_advisory_xact_lock(:chave, :registro_id)'),
+            {'chave': chave, 'registro_id': registro_id}
+        )
+        yield
+        return
+
+    nome = f'{tipo}-{registro_id}'
+
+    # Quem espera a trava não pode segurar a trava de escrita do SQLite
+    # (quem está com a trava precisa dela para gravar): encerra a transação
+    # antes e só abre a de escrita depois de entrar
+    db.session.commit()
+
+    if fcntl is None:
+        with _trava_processo(nome), transacao_escrita():
+            yield
+        return
+
+    pasta = os.path.join(current_app.instance_path, 'travas')
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, f'{nome}.lock'), 'a') as arquivo:
+        _travar_arquivo(arquivo)
+        try:
+            with transacao_escrita():
+                yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _travar_arquivo(arquivo):
+    if not cooperativo():
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        return
+
+    # gevent: o flock bloqueante pararia o worker inteiro, inclusive o
+    # greenlet que segura a trava; tenta sem bloquear e cede a vez
+    def tentar():
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    _esperar(tentar, float('inf'))
+
+
+def _trava_processo(nome):
+    with _travas_guarda:
+        return _travas_processo.setdefault(nome, threading.Lock())
@@ -1,9 +1,14 @@
 """
-Decorators customizados para controle de acesso
+Decorators customizados para controle de acesso, transações de escrita
+e respostas condicionais
 """
+import hashlib
+import os
+import time
 from functools import wraps
-from flask import redirect, url_for, flash
+from flask import current_app, flash, redirect, request, session, url_for
 from flask_login import current_user
+from utils.db import transacao_escrita
 
 
 def login_required_custom(f):
@@ -68,3 +73,88 @@ def anonymous_required(redirect_map=None):
             return f(*args, **kwargs)
         return decorated
     return decorator
+
+
+def escrita(f):
+    """
+    Rota que grava sem passar por trava_sala/trava_evento: o POST roda em
+    transacao_escrita() (no SQLite, BEGIN IMMEDIATE depois do controle de
+    acesso); GET/HEAD/OPTIONS continuam só lendo.
+    Use abaixo de @role_required e não em rotas com trabalho lento.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return f(*args, **kwargs)
+        with transacao_escrita():
+            return f(*args, **kwargs)
+    return decorated
+
+
+def condicional(versao):
+    """
+    Respostas condicionais (ETag fraco + 304) para páginas de listagem.
+    `versao(**view_args)` devolve valores baratos que mudam quando os dados
+    da página mudam (ex.: Usuario.versao_dados()); se o If-None-Match do
+    navegador bate, responde 304 sem executar a view nem renderizar o template.
+    
+    Exemplo:
+        @role_required('admin')
+        @condicional(lambda: Usuario.versao_dados())
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            # Mensagens flash pendentes só aparecem renderizando de novo
+            if (
+                request.method not in ('GET', 'HEAD')
+                or not current_app.config['RESPOSTAS_CONDICIONAIS']
+                or '_flashes' in session
+            ):
+                return f(*args, **kwargs)
+
+            etag = _etag(versao(**kwargs))
+            if request.if_none_match.contains_weak(etag):
+                resposta = current_app.response_class(status=304)
+            else:
+                resposta = current_app.make_response(f(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag, weak=True)
+            # Sempre revalida; o navegador guarda a página só para o próprio usuário
+            resposta.cache_control.private = True
+            resposta.cache_control.no_cache = True
+            return resposta
+        return decorated
+    return decorator
+
+
+def _etag(dados):
+    """
+    ETag da página: versão dos dados + o que mais entra no HTML (usuário e
+    seus dados na navbar, token CSRF da sessão, templates e estáticos do deploy).
+    O token CSRF assinado expira (WTF_CSRF_TIME_LIMIT): o ETag muda a cada
+    meio período para a página em cache nunca carregar um token vencido.
+    """
+    limite = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    periodo = int(time.time() // (limite / 2)) if limite else 0
+    usuario = (current_user.id, current_user.atualizado_em) if current_user.is_authenticated else None
+    partes = (_versao_app(), usuario, session.get('csrf_token'), periodo, dados)
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def _versao_app():
+    """Hash dos templates e do manifesto de estáticos (muda a cada deploy que altera o HTML)"""
+    versao = current_app.extensions.get('versao_app')
+    if versao is None:
+        resumo = hashlib.sha1()
+        pastas = [current_app.template_folder, os.path.join(current_app.static_folder, 'dist')]
+        for pasta in pastas:
+            pasta = os.path.join(current_app.root_path, pasta)
+            for raiz, _, arquivos in sorted(os.walk(pasta)):
+                for nome in sorted(arquivos):
+                    if nome.endswith(('.html', '.json')):
+                        with open(os.path.join(raiz, nome), 'rb') as arquivo:
+                            resumo.update(arquivo.read())
+        versao = current_app.extensions['versao_app'] = resumo.hexdigest()
+    return versao
@@ -0,0 +1,142 @@
+"""
+Fila de tarefas em segundo plano
+O banco da aplicação é o broker (tabela tarefa); o worker roda em um
+processo separado (linha `worker:` do Procfile):
+
+    flask --app app worker
+
+Definição de uma tarefa (ver utils/tarefas.py):
+
+    @tarefa('marcar_ausentes', concorrencia=1, timeout=600)
+    def marcar_ausentes_tarefa(dados):
+        ...
+        return {'resumo': ...}  # gravado em tarefa.resultado (JSON)
+
+- Reserva com visibility timeout: se o worker morrer, a tarefa volta a ficar
+  disponível quando `timeout` vencer (ou falha, se era a última tentativa);
+  o worker que perdeu a reserva não grava mais o resultado
+- Retentativas com backoff exponencial até `max_tentativas`
+- `concorrencia`: máximo de execuções simultâneas do tipo, somando todos os workers
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TipoTarefa:
+    nome: str
+    funcao: Callable
+    concorrencia: int = 1
+    timeout: int = 300
+    max_tentativas: int = 3
+
+
+_tipos = {}
+
+
+def tarefa(nome, concorrencia=1, timeout=300, max_tentativas=3):
+    """Registra a função como executora do tipo de tarefa `nome`"""
+    def decorador(funcao):
+        _tipos[nome] = TipoTarefa(nome, funcao, concorrencia, timeout, max_tentativas)
+        return funcao
+    return decorador
+
+
+def tipos_registrados():
+    """Tipos conhecidos (importa as definições na primeira chamada)"""
+    import utils.tarefas  # noqa: F401 (registra os tipos)
+    return _tipos
+
+
+def enfileirar(nome, dados=None, atraso_segundos=0, criado_por_id=None):
+    """Coloca uma tarefa na fila. Retorna a Tarefa criada"""
+    from models.tarefa import Tarefa
+
+    tipo = tipos_registrados().get(nome)
+    if tipo is None:
+        raise ValueError(f'Tipo de tarefa desconhecido: {nome}')
+
+    return Tarefa.enfileirar(
+        nome,
+        dados,
+        max_tentativas=tipo.max_tentativas,
+        atraso_segundos=atraso_segundos,
+        criado_por_id=criado_por_id
+    )
+
+
+def executar_proxima(worker, tipos=None):
+    """
+    Reserva e executa uma tarefa. Retorna a Tarefa processada ou None se a
+    fila estiver vazia (ou todos os tipos no limite de concorrência)
+    """
+    from models.tarefa import Tarefa
+
+    registrados = tipos_registrados()
+    selecionados = {nome: registrados[nome] for nome in (tipos or registrados)}
+
+    tarefa_atual = Tarefa.reservar(
+        {nome: (tipo.concorrencia, tipo.timeout) for nome, tipo in selecionados.items()},
+        worker
+    )
+    if tarefa_atual is None:
+        return None
+
+    tipo = selecionados[tarefa_atual.tipo]
+    logger.info('Executando %r (tentativa %d)', tarefa_atual, tarefa_atual.tentativas)
+    try:
+        resultado = tipo.funcao(tarefa_atual.dados)
+    except Exception:
+        db.session.rollback()
+        logger.exception('Falha em %r', tarefa_atual)
+        gravou = tarefa_atual.registrar_falha(traceback.format_exc(limit=5))
+    else:
+        gravou = tarefa_atual.concluir(resultado)
+    if not gravou:
+        logger.warning('Reserva de %r perdida (timeout vencido); resultado descartado', tarefa_atual)
+
+    return tarefa_atual
+
+
+def rodar_worker(app, tipos=None, intervalo=2.0, threads=1, uma_vez=False):
+    """
+    Laço do worker: cada thread busca e executa tarefas até o processo
+    terminar. Com `uma_vez`, processa o que estiver disponível e sai.
+    """
+    base = f'{socket.gethostname()}:{os.getpid()}'
+
+    def laco(indice):
+        worker = f'{base}:{indice}'
+        while True:
+            try:
+                with app.app_context():
+                    processada = executar_proxima(worker, tipos)
+            except Exception:
+                # Erro fora da tarefa (banco fora do ar, reserva, gravação do
+                # resultado): a thread continua e tenta de novo depois do intervalo
+                logger.exception('Erro no worker %s', worker)
+                processada = None
+            if processada is None:
+                if uma_vez:
+                    return
+                time.sleep(intervalo)
+
+    if threads == 1:
+        laco(0)
+        return
+
+    trabalhadores = [threading.Thread(target=laco, args=(i,), daemon=True) for i in range(threads)]
+    for t in trabalhadores:
+        t.start()
+    for t in trabalhadores:
+        t.join()
+
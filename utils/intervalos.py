@@ -0,0 +1,91 @@
+"""
+Aritmética de intervalos de tempo (reservas de salas)
+Funções puras, sem acesso ao banco: recebem listas já ordenadas por início.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+
+
+def mesclar(intervalos):
+    """
+    Sweep-line: junta intervalos sobrepostos ou encostados.
+    Recebe [(inicio, fim, item), ...] ordenado por início.
+    Retorna [[inicio, fim, [itens]], ...] — blocos ocupados disjuntos e ordenados.
+    """
+    blocos = []
+    for inicio, fim, item in intervalos:
+        if blocos and inicio <= blocos[-1][1]:
+            ultimo = blocos[-1]
+            if fim > ultimo[1]:
+                ultimo[1] = fim
+            ultimo[2].append(item)
+        else:
+            blocos.append([inicio, fim, [item]])
+    return blocos
+
+
+def janelas_diarias(data_inicio, data_fim, hora_abertura, hora_fechamento):
+    """Uma janela de funcionamento [abertura, fechamento) por dia, de data_inicio até data_fim (exclusivo)"""
+    janelas = []
+    dia = data_inicio
+    while dia < data_fim:
+        janelas.append((
+            datetime.combine(dia, time(hora_abertura)),
+            datetime.combine(dia, time(hora_fechamento)) if hora_fechamento < 24
+            else datetime.combine(dia + timedelta(days=1), time(0)),
+        ))
+        dia += timedelta(days=1)
+    return janelas
+
+
+def distribuir(blocos, janelas):
+    """
+    Recorta os blocos ocupados em cada janela e calcula as lacunas livres.
+    Blocos e janelas ordenados: duas varreduras lineares, sem comparar todos com todos.
+    Retorna [{'inicio', 'fim', 'ocupado': [(ini, fim, itens)], 'livre': [(ini, fim)]}, ...]
+    """
+    resultado = []
+    j = 0
+    for janela_ini, janela_fim in janelas:
+        # Blocos que terminaram antes desta janela nunca mais interessam
+        while j < len(blocos) and blocos[j][1] <= janela_ini:
+            j += 1
+
+        ocupado = []
+        livre = []
+        cursor = janela_ini
+        k = j
+        while k < len(blocos) and blocos[k][0] < janela_fim:
+            ini = max(blocos[k][0], janela_ini)
+            fim = min(blocos[k][1], janela_fim)
+            if ini > cursor:
+                livre.append((cursor, ini))
+            ocupado.append((ini, fim, blocos[k][2]))
+            cursor = max(cursor, fim)
+            k += 1
+        if cursor < janela_fim:
+            livre.append((cursor, janela_fim))
+
+        resultado.append({'inicio': janela_ini, 'fim': janela_fim, 'ocupado': ocupado, 'livre': livre})
+    return resultado
+
+
+def sobreposicoes(ocorrencias, reservas):
+    """
+    Interval join: para cada ocorrência, as reservas que a sobrepõem.
+    Recebe ocorrências [(inicio, fim)] disjuntas e reservas [(inicio, fim, item)],
+    ambas ordenadas por início. Uma varredura com heap das reservas em aberto.
+    Retorna [[itens], ...] alinhado com `ocorrencias`.
+    """
+    resultado = []
+    abertas = []
+    j = 0
+    for inicio, fim in ocorrencias:
+        while j < len(reservas) and reservas[j][0] < fim:
+            heapq.heappush(abertas, (reservas[j][1], j))
+            j += 1
+        # Reservas encerradas antes desta ocorrência não alcançam as seguintes
+        while abertas and abertas[0][0] <= inicio:
+            heapq.heappop(abertas)
+        resultado.append([reservas[k][2] for _, k in sorted(abertas, key=lambda a: a[1])])
+    return resultado
@@ -0,0 +1,136 @@
+"""
+Métricas no formato Prometheus (GET /metrics)
+
+- Latência por endpoint de blueprint (histograma)
+- Queries por requisição (lidas do profiler de SQL) e uso do pool de conexões
+- Rejeições do rate limiter (extensions.limiter)
+- Funil de check-in: QR validado, token TOTP rejeitado, fora da janela, confirmado
+
+Com vários workers do gunicorn, defina PROMETHEUS_MULTIPROC_DIR (diretório
+vazio e gravável): cada processo grava seus valores em arquivos mmap e o
+/metrics agrega todos. O gunicorn.conf.py limpa o diretório na subida e
+descarta os arquivos de workers que morreram.
+"""
+import os
+import time
+from flask import Response, current_app, g, request, abort
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+LATENCIA = Histogram(
+    'agencei_http_request_duration_seconds',
+    'Latência das requisições por endpoint',
+    ['endpoint', 'metodo', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERIES = Counter(
+    'agencei_db_queries_total',
+    'Comandos SQL executados por endpoint',
+    ['endpoint'],
+)
+TEMPO_BANCO = Counter(
+    'agencei_db_seconds_total',
+    'Tempo gasto no banco por endpoint',
+    ['endpoint'],
+)
+POOL_EM_USO = Gauge(
+    'agencei_db_pool_checked_out',
+    'Conexões do pool em uso (soma dos workers)',
+    multiprocess_mode='livesum',
+)
+POOL_TAMANHO = Gauge(
+    'agencei_db_pool_size',
+    'Tamanho configurado do pool (soma dos workers)',
+    multiprocess_mode='livesum',
+)
+RATE_LIMIT = Counter(
+    'agencei_rate_limit_rejections_total',
+    'Requisições rejeitadas pelo rate limiter',
+    ['endpoint'],
+)
+CHECKIN = Counter(
+    'agencei_checkin_total',
+    'Resultados do funil de check-in (códigos de utils/checkin.py)',
+    ['origem', 'codigo'],
+)
+
+
+def registrar_checkin(origem, codigo):
+    """Incrementa o funil de check-in (origem = view/serviço que tratou a leitura)"""
+    CHECKIN.labels(origem=origem, codigo=codigo).inc()
+
+
+class Metricas:
+    """Extensão Flask no mesmo padrão das demais (instância em extensions.py)"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_TOKEN', None)
+
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+        app.add_url_rule('/metrics', 'metricas', self._expor)
+
+        # Scrapes periódicos não devem consumir a cota padrão do limiter
+        from extensions import limiter
+        limiter.exempt(app.view_functions['metricas'])
+
+    @staticmethod
+    def _iniciar():
+        g._metricas_inicio = time.perf_counter()
+
+    @staticmethod
+    def _finalizar(response):
+        endpoint = request.endpoint or 'desconhecido'
+
+        # O limiter rejeita em um before_request anterior ao nosso: conta antes do early return
+        if response.status_code == 429:
+            RATE_LIMIT.labels(endpoint).inc()
+
+        inicio = g.get('_metricas_inicio')
+        if inicio is None or endpoint == 'metricas':
+            return response
+
+        LATENCIA.labels(endpoint, request.method, response.status_code).observe(time.perf_counter() - inicio)
+
+        stats = g.get('_sql_stats')
+        if stats:
+            QUERIES.labels(endpoint).inc(stats['queries'])
+            TEMPO_BANCO.labels(endpoint).inc(stats['tempo_ms'] / 1000)
+
+        _atualizar_pool()
+        return response
+
+    @staticmethod
+    def _expor():
+        token = current_app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+
+        _atualizar_pool()
+
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            dados = generate_latest(registry)
+        else:
+            dados = generate_latest()
+
+        return Response(dados, content_type=CONTENT_TYPE_LATEST)
+
+
+def _atualizar_pool():
+    from extensions import db
+
+    pool = db.engine.pool
+    if hasattr(pool, 'checkedout'):
+        POOL_EM_USO.set(pool.checkedout())
+        POOL_TAMANHO.set(pool.size())
@@ -0,0 +1,85 @@
+"""
+Ocupação de salas com aritmética de intervalos vetorizada (NumPy)
+Funções puras, sem acesso ao banco: recebem os eventos em colunas
+(arrays alinhados de sala, início, fim e inscritos) e devolvem um valor
+por sala, sem laço Python por evento.
+
+Truque usado em todas as funções: cada sala é deslocada para uma faixa
+própria do eixo do tempo (índice da sala * `extensao`), de modo que uma
+única ordenação / soma acumulada processa todas as salas sem misturá-las.
+"""
+import numpy as np
+
+
+def para_segundos(datas):
+    """Lista de datetime -> array int64 de segundos"""
+    return np.array(datas, dtype='datetime64[s]').astype(np.int64)
+
+
+def _deslocar(salas, inicios, fins):
+    """Coloca cada sala em uma faixa disjunta do eixo do tempo"""
+    base = inicios.min()
+    extensao = fins.max() - base + 1
+    deslocamento = salas.astype(np.int64) * extensao
+    return inicios - base + deslocamento, fins - base + deslocamento
+
+
+def recortar(inicios, fins, periodo_inicio, periodo_fim):
+    """Limita os intervalos ao período; retorna (inicios, fins, máscara dos que sobram)"""
+    inicios = np.maximum(inicios, periodo_inicio)
+    fins = np.minimum(fins, periodo_fim)
+    return inicios, fins, inicios < fins
+
+
+def tempo_ocupado(salas, inicios, fins, num_salas):
+    """
+    Tempo coberto pela união dos intervalos de cada sala (sobreposições
+    contam uma vez). Mesma unidade dos arrays de entrada.
+    """
+    if not len(salas):
+        return np.zeros(num_salas)
+
+    a, b = _deslocar(salas, inicios, fins)
+    ordem = np.argsort(a, kind='stable')
+    a, b, salas = a[ordem], b[ordem], salas[ordem]
+
+    # Maior fim visto antes de cada intervalo: o que já estava coberto
+    coberto = np.maximum.accumulate(b)
+    anterior = np.concatenate(([a[0]], coberto[:-1]))
+    novo = np.maximum(b - np.maximum(a, anterior), 0)
+
+    return np.bincount(salas, weights=novo, minlength=num_salas)
+
+
+def pico_simultaneo(salas, inicios, fins, pesos, num_salas):
+    """
+    Maior soma de `pesos` (ex.: inscritos) em um mesmo instante, por sala.
+    Varredura de eventos +peso no início / -peso no fim; no mesmo instante,
+    as saídas vêm antes das entradas (intervalos encostados não se somam).
+    """
+    pico = np.zeros(num_salas)
+    if not len(salas):
+        return pico
+
+    a, b = _deslocar(salas, inicios, fins)
+    instantes = np.concatenate((a, b))
+    variacao = np.concatenate((pesos, -pesos)).astype(np.float64)
+    sala_do_instante = np.concatenate((salas, salas))
+
+    ordem = np.lexsort((variacao, instantes))
+    em_uso = np.cumsum(variacao[ordem])
+    np.maximum.at(pico, sala_do_instante[ordem], em_uso)
+    return pico
+
+
+def preenchimento_medio(salas, inicios, fins, inscritos, capacidades, num_salas):
+    """
+    Taxa média de preenchimento (inscritos / capacidade) por sala,
+    ponderada pela duração de cada evento. NaN para salas sem eventos.
+    """
+    duracao = (fins - inicios).astype(np.float64)
+    pessoas_tempo = np.bincount(salas, weights=inscritos * duracao, minlength=num_salas)
+    tempo = np.bincount(salas, weights=duracao, minlength=num_salas)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pessoas_tempo / (tempo * capacidades)
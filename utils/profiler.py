@@ -0,0 +1,117 @@
+"""
+Profiler de SQL por requisição
+Conta queries, soma o tempo de banco e guarda os comandos mais lentos de cada
+requisição (eventos before/after_cursor_execute do SQLAlchemy).
+
+Configuração (config.py):
+    SQL_PROFILER_ENABLED      liga/desliga a instrumentação
+    SQL_PROFILER_HEADERS      envia Server-Timing e X-Query-Count (fora de produção)
+    SQL_SLOW_REQUEST_QUERIES  loga requisições com mais queries que isso
+    SQL_SLOW_REQUEST_MS       loga requisições com mais tempo de banco que isso
+    SQL_SLOW_QUERY_MS         loga requisições com algum comando mais lento que isso
+"""
+import time
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MAX_LENTAS = 3
+
+
+class ProfilerSQL:
+    """Extensão Flask no mesmo padrão das demais (instância em extensions.py)"""
+
+    def __init__(self, app=None):
+        self._listeners_registrados = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_PROFILER_ENABLED', True)
+        app.config.setdefault('SQL_PROFILER_HEADERS', False)
+        app.config.setdefault('SQL_SLOW_REQUEST_QUERIES', 30)
+        app.config.setdefault('SQL_SLOW_REQUEST_MS', 200)
+        app.config.setdefault('SQL_SLOW_QUERY_MS', 50)
+
+        if not app.config['SQL_PROFILER_ENABLED']:
+            return
+
+        # Listener na classe Engine: vale para todos os engines do processo
+        if not self._listeners_registrados:
+            event.listen(Engine, 'before_cursor_execute', self._antes)
+            event.listen(Engine, 'after_cursor_execute', self._depois)
+            self._listeners_registrados = True
+
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+
+    # ------------------------------------------------------------
+    #  Eventos do SQLAlchemy
+    # ------------------------------------------------------------
+    @staticmethod
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_profiler_inicio', []).append(time.perf_counter())
+
+    @staticmethod
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        pilha = conn.info.get('_profiler_inicio')
+        if not pilha:
+            return
+        duracao_ms = (time.perf_counter() - pilha.pop()) * 1000
+
+        if not has_request_context():
+            return
+        stats = g.get('_sql_stats')
+        if stats is None:
+            return
+
+        stats['queries'] += 1
+        stats['tempo_ms'] += duracao_ms
+
+        lentas = stats['lentas']
+        if len(lentas) < MAX_LENTAS or duracao_ms > lentas[-1][0]:
+            lentas.append((duracao_ms, statement))
+            lentas.sort(key=lambda item: item[0], reverse=True)
+            del lentas[MAX_LENTAS:]
+
+    # ------------------------------------------------------------
+    #  Ciclo da requisição
+    # ------------------------------------------------------------
+    @staticmethod
+    def _iniciar():
+        g._sql_stats = {'queries': 0, 'tempo_ms': 0.0, 'lentas': [], 'inicio': time.perf_counter()}
+
+    @staticmethod
+    def _finalizar(response):
+        # Mantido em g até o fim do contexto: utils/metricas.py também lê
+        stats = g.get('_sql_stats')
+        if stats is None:
+            return response
+
+        config = current_app.config
+        total_ms = (time.perf_counter() - stats['inicio']) * 1000
+        mais_lenta_ms = stats['lentas'][0][0] if stats['lentas'] else 0.0
+
+        if (stats['queries'] > config['SQL_SLOW_REQUEST_QUERIES']
+                or stats['tempo_ms'] > config['SQL_SLOW_REQUEST_MS']
+                or mais_lenta_ms > config['SQL_SLOW_QUERY_MS']):
+            lentas = '\n'.join(
+                f'    {duracao:7.1f} ms  {" ".join(sql.split())[:300]}'
+                for duracao, sql in stats['lentas']
+            )
+            current_app.logger.warning(
+                'Requisição com SQL pesado: %s %s (rota=%s, view_args=%s, args=%s) '
+                '— %d queries, %.1f ms de banco, %.1f ms no total\n%s',
+                request.method, request.path, request.endpoint, request.view_args,
+                request.args.to_dict(), stats['queries'], stats['tempo_ms'], total_ms, lentas
+            )
+
+        if config['SQL_PROFILER_HEADERS']:
+            response.headers['X-Query-Count'] = str(stats['queries'])
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats["tempo_ms"]:.1f};desc="{stats["queries"]} queries"'
+            )
+            response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+        return response
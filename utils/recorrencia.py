@@ -0,0 +1,115 @@
+"""
+Recorrência de eventos (séries diárias/semanais)
+Subconjunto do RRULE (RFC 5545) suficiente para a agenda do CEI:
+FREQ=DAILY|WEEKLY, INTERVAL, COUNT, UNTIL e BYDAY.
+Funções puras, sem acesso ao banco.
+"""
+from datetime import datetime, timedelta
+
+DIAS_SEMANA = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+FREQUENCIAS = ('DAILY', 'WEEKLY')
+MAX_OCORRENCIAS = 100
+
+
+def interpretar_rrule(regra):
+    """
+    Converte 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10' em
+    {'freq', 'intervalo', 'count', 'until', 'byday'}.
+    Lança ValueError para regras fora do subconjunto suportado.
+    """
+    campos = {}
+    for parte in regra.strip().upper().removeprefix('RRULE:').split(';'):
+        if not parte:
+            continue
+        chave, sep, valor = parte.partition('=')
+        if not sep or not valor:
+            raise ValueError(f'Trecho inválido na regra: {parte}')
+        campos[chave] = valor
+
+    desconhecidos = set(campos) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'WKST'}
+    if desconhecidos:
+        raise ValueError(f'Parâmetros não suportados: {", ".join(sorted(desconhecidos))}')
+
+    freq = campos.get('FREQ')
+    if freq not in FREQUENCIAS:
+        raise ValueError('FREQ deve ser DAILY ou WEEKLY')
+
+    until = None
+    if 'UNTIL' in campos:
+        valor = campos['UNTIL'].rstrip('Z')
+        formato = '%Y%m%dT%H%M%S' if 'T' in valor else '%Y%m%d'
+        until = datetime.strptime(valor, formato)
+        if 'T' not in valor:
+            until = until.replace(hour=23, minute=59, second=59)
+
+    byday = None
+    if 'BYDAY' in campos:
+        try:
+            byday = [DIAS_SEMANA[dia] for dia in campos['BYDAY'].split(',')]
+        except KeyError:
+            raise ValueError('BYDAY aceita apenas MO, TU, WE, TH, FR, SA, SU')
+
+    return {
+        'freq': freq,
+        'intervalo': int(campos.get('INTERVAL', 1)),
+        'count': int(campos['COUNT']) if 'COUNT' in campos else None,
+        'until': until,
+        'byday': byday,
+    }
+
+
+def gerar_ocorrencias(inicio, freq='WEEKLY', intervalo=1, count=None, until=None, byday=None,
+                      limite=MAX_OCORRENCIAS):
+    """
+    Datas/horas de cada ocorrência, em ordem, a partir de `inicio` (inclusive).
+    Toda ocorrência mantém o horário de `inicio`.
+    WEEKLY sem BYDAY repete o dia da semana de `inicio`; em DAILY, BYDAY filtra os dias.
+    É obrigatório limitar a série por `count` ou `until`.
+    """
+    if freq not in FREQUENCIAS:
+        raise ValueError('Frequência deve ser DAILY ou WEEKLY')
+    if intervalo < 1:
+        raise ValueError('O intervalo deve ser de pelo menos 1')
+    if count is None and until is None:
+        raise ValueError('Informe o número de ocorrências ou a data final')
+    if count is not None and not 1 <= count <= limite:
+        raise ValueError(f'A série deve ter entre 1 e {limite} ocorrências')
+    if until is not None and until < inicio:
+        raise ValueError('A data final é anterior ao início da série')
+
+    dias = sorted(set(byday)) if byday else None
+    ocorrencias = []
+
+    if freq == 'DAILY':
+        passo = timedelta(days=intervalo)
+        candidatas = (inicio + passo * k for k in range(_passos_possiveis(inicio, until, passo, count, limite)))
+        candidatas = (c for c in candidatas if dias is None or c.weekday() in dias)
+    else:
+        dias = dias or [inicio.weekday()]
+        segunda = inicio - timedelta(days=inicio.weekday())
+        passo = timedelta(weeks=intervalo)
+        candidatas = (
+            segunda + passo * k + timedelta(days=dia)
+            for k in range(_passos_possiveis(segunda, until, passo, count, limite))
+            for dia in dias
+        )
+        candidatas = (c for c in candidatas if c >= inicio)
+
+    for ocorrencia in candidatas:
+        if until is not None and ocorrencia > until:
+            break
+        ocorrencias.append(ocorrencia)
+        if count is not None and len(ocorrencias) == count:
+            break
+        if len(ocorrencias) > limite:
+            raise ValueError(f'A série ultrapassa o limite de {limite} ocorrências')
+
+    return ocorrencias
+
+
+def _passos_possiveis(inicio, until, passo, count, limite):
+    """Quantidade de períodos a percorrer (com folga para filtros de BYDAY)"""
+    if until is not None:
+        return (until - inicio) // passo + 1
+    # COUNT com BYDAY filtrando: no pior caso 1 ocorrência a cada 7 períodos
+    return (count or limite) * 7 + 1
@@ -0,0 +1,187 @@
+"""
+Agregação incremental dos resumos de presença (models/resumo_presenca.py)
+
+A cada execução, só os eventos alterados desde a última são recalculados:
+- inscrições novas ou check-ins (inscrito_em / presenca_confirmada_em após a
+  marca d'água em progresso_tarefa)
+- eventos editados ou cancelados (evento.atualizado_em)
+- eventos que terminaram desde então (as ausências passam a contar)
+- eventos marcados como desatualizados (inscrição cancelada) ou apagados
+
+O total de cada evento é recalculado do zero e a diferença para o valor
+anterior é somada aos resumos por organizador, sala e dia; por isso reler
+um evento é inofensivo e a marca d'água pode voltar um pouco (FOLGA) para
+pegar commits que terminaram atrasados.
+
+Execução: `flask --app app atualizar-resumos` (cron, ou pela fila de tarefas)
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, func, select
+from extensions import db
+from models.evento import Evento
+from models.inscricao import Inscricao
+from models.progresso_tarefa import ProgressoTarefa
+from models.resumo_presenca import ResumoDia, ResumoEvento, ResumoOrganizador, ResumoSala
+from utils.db import transacao_escrita
+
+TAREFA = 'resumo_presenca'
+FOLGA = timedelta(minutes=1)
+
+
+def _eventos_alterados(marca, agora):
+    """Ids dos eventos cujo resumo precisa ser recalculado"""
+    if marca is None:
+        consultas = [select(Evento.id)]
+    else:
+        desde = marca - FOLGA
+        consultas = [
+            select(Inscricao.evento_id).where(Inscricao.inscrito_em > desde),
+            select(Inscricao.evento_id).where(Inscricao.presenca_confirmada_em > desde),
+            select(Evento.id).where(Evento.atualizado_em > desde),
+        ]
+
+    consultas += [
+        select(ResumoEvento.evento_id).where(ResumoEvento.desatualizado.is_(True)),
+        select(ResumoEvento.evento_id)
+        .join(Evento, Evento.id == ResumoEvento.evento_id)
+        .where(ResumoEvento.encerrado.is_(False), Evento.data_hora_fim <= agora),
+        select(ResumoEvento.evento_id)
+        .outerjoin(Evento, Evento.id == ResumoEvento.evento_id)
+        .where(Evento.id.is_(None)),
+    ]
+
+    ids = set()
+    for consulta in consultas:
+        ids.update(db.session.scalars(consulta))
+    return sorted(ids)
+
+
+def _totais_atuais(ids, agora):
+    """{evento_id: (chaves, totais, encerrado)} com uma consulta agrupada; eventos cancelados ficam de fora"""
+    presentes = func.sum(case((Inscricao.status_presenca == Inscricao.STATUS_PRESENTE, 1), else_=0))
+    linhas = db.session.execute(
+        select(
+            Evento.id, Evento.organizador_id, Evento.sala_id, Evento.data_hora,
+            Evento.data_hora_fim, func.count(Inscricao.id), presentes
+        )
+        .outerjoin(Inscricao, Inscricao.evento_id == Evento.id)
+        .where(Evento.id.in_(ids), Evento.status != 'cancelado')
+        .group_by(Evento.id)
+    ).all()
+
+    atuais = {}
+    for evento_id, organizador_id, sala_id, data_hora, fim, inscritos, presencas in linhas:
+        presencas = presencas or 0
+        encerrado = fim is not None and fim <= agora
+        chaves = (organizador_id, sala_id, data_hora.date() if data_hora else None)
+        totais = {
+            'eventos': 1,
+            'inscricoes': inscritos,
+            'presencas': presencas,
+            'ausencias': inscritos - presencas if encerrado else 0,
+        }
+        atuais[evento_id] = (chaves, totais, encerrado)
+    return atuais
+
+
+def _repassar(variacoes, sinal, chaves, totais):
+    """Acumula +totais/-totais nas chaves (organizador, sala, dia) do evento"""
+    organizador_id, sala_id, dia = chaves
+    alvos = [(ResumoOrganizador, organizador_id), (ResumoSala, sala_id)]
+    if dia is not None:
+        alvos.append((ResumoDia, dia))
+    for modelo, chave in alvos:
+        for campo, valor in totais.items():
+            variacoes[modelo][chave][campo] += sinal * valor
+
+
+def _aplicar(variacoes):
+    """Soma as variações nos resumos agregados (uma consulta por tabela)"""
+    for modelo, por_chave in variacoes.items():
+        coluna = modelo.__mapper__.primary_key[0]
+        existentes = {
+            getattr(resumo, coluna.key): resumo
+            for resumo in modelo.query.filter(coluna.in_(list(por_chave)))
+        }
+        for chave, delta in por_chave.items():
+            resumo = existentes.get(chave)
+            if resumo is None:
+                if delta['eventos'] <= 0:
+                    continue
+                resumo = modelo(**{coluna.key: chave, **{campo: 0 for campo in modelo.CAMPOS}})
+                db.session.add(resumo)
+            resumo.somar(delta)
+            if resumo.eventos <= 0:
+                db.session.delete(resumo)
+
+
+def _atualizar_lote(ids, agora):
+    """Recalcula os eventos do lote e repassa as diferenças. Retorna quantos mudaram"""
+    atuais = _totais_atuais(ids, agora)
+    anteriores = {r.evento_id: r for r in ResumoEvento.query.filter(ResumoEvento.evento_id.in_(ids))}
+    variacoes = defaultdict(lambda: defaultdict(Counter))
+    alterados = 0
+
+    for evento_id in ids:
+        anterior = anteriores.get(evento_id)
+        atual = atuais.get(evento_id)
+
+        if anterior is not None:
+            chaves_anteriores = (anterior.organizador_id, anterior.sala_id, anterior.dia)
+            totais_anteriores = {campo: getattr(anterior, campo) for campo in ResumoEvento.CAMPOS}
+            if atual is not None and atual[:2] == (chaves_anteriores, totais_anteriores):
+                anterior.encerrado = atual[2]
+                anterior.desatualizado = False
+                continue
+            _repassar(variacoes, -1, chaves_anteriores, totais_anteriores)
+
+        if atual is None:
+            if anterior is not None:
+                db.session.delete(anterior)
+                alterados += 1
+            continue
+
+        chaves, totais, encerrado = atual
+        _repassar(variacoes, +1, chaves, totais)
+        if anterior is None:
+            anterior = ResumoEvento(evento_id=evento_id)
+            db.session.add(anterior)
+        anterior.organizador_id, anterior.sala_id, anterior.dia = chaves
+        for campo, valor in totais.items():
+            setattr(anterior, campo, valor)
+        anterior.encerrado = encerrado
+        anterior.desatualizado = False
+        alterados += 1
+
+    _aplicar(variacoes)
+    return alterados
+
+
+@transacao_escrita()
+def atualizar_resumos(tamanho_lote=500, agora=None, desde_o_inicio=False):
+    """
+    Atualiza os resumos de presença com o que mudou desde a última execução.
+    desde_o_inicio=True apaga os resumos e recalcula todos os eventos.
+    Retorna {'eventos_verificados', 'eventos_alterados'}
+    """
+    agora = agora or datetime.now()
+    corte = datetime.utcnow()  # inscrito_em / atualizado_em são gravados em UTC
+
+    progresso = ProgressoTarefa.obter(TAREFA)
+    if desde_o_inicio:
+        for modelo in (ResumoEvento, ResumoOrganizador, ResumoSala, ResumoDia):
+            db.session.execute(delete(modelo))
+        progresso.marca_data = None
+
+    ids = _eventos_alterados(progresso.marca_data, agora)
+    alterados = 0
+    for inicio in range(0, len(ids), tamanho_lote):
+        alterados += _atualizar_lote(ids[inicio:inicio + tamanho_lote], agora)
+        db.session.commit()
+
+    progresso = ProgressoTarefa.obter(TAREFA)
+    progresso.avancar(corte, None, alterados)
+    db.session.commit()
+
+    return {'eventos_verificados': len(ids), 'eventos_alterados': alterados}
@@ -0,0 +1,29 @@
+"""
+Tarefas executadas pelo worker (flask --app app worker)
+Cada função recebe o payload (dict) e retorna um resultado serializável em JSON.
+"""
+from flask import current_app
+from utils.fila import tarefa
+
+
+@tarefa('marcar_ausentes', concorrencia=1, timeout=600)
+def marcar_ausentes_tarefa(dados):
+    """Varredura de ausências (utils/ausencias.py)"""
+    from utils.ausencias import marcar_ausentes
+
+    return marcar_ausentes(
+        current_app.config['QR_CODE_JANELA_DEPOIS_MINUTOS'],
+        tamanho_lote=dados.get('lote') or current_app.config['AUSENCIAS_TAMANHO_LOTE'],
+        desde_o_inicio=dados.get('desde_o_inicio', False)
+    )
+
+
+@tarefa('atualizar_resumos', concorrencia=1, timeout=600)
+def atualizar_resumos_tarefa(dados):
+    """Agregação incremental dos resumos de presença (utils/resumos.py)"""
+    from utils.resumos import atualizar_resumos
+
+    return atualizar_resumos(
+        tamanho_lote=current_app.config['RESUMOS_TAMANHO_LOTE'],
+        desde_o_inicio=dados.get('desde_o_inicio', False)
+    )
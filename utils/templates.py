@@ -0,0 +1,32 @@
+"""
+Cache de bytecode dos templates Jinja
+
+Os templates são compilados uma vez no build (`flask --app app compilar-templates`)
+e o bytecode fica em disco (instance/jinja_cache), compartilhado por todos os
+workers do gunicorn. Na subida, cada worker só carrega o bytecode pronto
+(gunicorn.conf.py), em vez de compilar na primeira requisição de cada página.
+O Jinja confere o checksum do fonte: template alterado é recompilado sozinho.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache
+
+
+def configurar_cache(app):
+    """Liga o cache de bytecode (antes do primeiro uso de app.jinja_env)"""
+    if not app.config['JINJA_BYTECODE_CACHE']:
+        return
+    diretorio = app.config['JINJA_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(diretorio, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(diretorio)}
+
+
+def carregar_templates(app):
+    """
+    Carrega todos os templates .html no ambiente Jinja do app (lendo ou
+    gravando o bytecode no cache). Retorna quantos foram carregados
+    """
+    ambiente = app.jinja_env
+    nomes = ambiente.list_templates(extensions=('html',))
+    for nome in nomes:
+        ambiente.get_template(nome)
+    return len(nomes)